@@ -0,0 +1,86 @@
+"""
+Замер перезагрузки и прокрутки списка карточек партнёров главного окна
+Данные синтетические (БД не нужна): N строк PartnerListItem
+Замеряется:
+    перезагрузка модели (set_items) с отрисовкой первого экрана
+    прокрутка всего списка с отрисовкой каждого экрана
+    пиковый RSS процесса
+Запуск из корня проекта:
+    python -m benchmarks.partner_list_reload [N] [повторов]
+"""
+
+import os
+import sys
+import time
+import resource
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication, QListView, QAbstractItemView
+from PyQt6.QtCore import Qt
+
+from services.partner_service import PartnerListItem, partner_sort_key
+from ui.partner_list_model import PartnerListModel
+from ui.partner_card import PartnerCardDelegate
+
+
+def make_items(count: int) -> list:
+    items = [
+        PartnerListItem(
+            i, ("ЗАО", "ООО", "ПАО", "ОАО")[i % 4], f"Партнёр {i}", f"Директор {i}",
+            f"{1000000000 + i}", f"9{i:09d}" if i % 3 else None, i * 37 % 600000, i % 11,
+        )
+        for i in range(count)
+    ]
+    items.sort(key=partner_sort_key)
+    return items
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss в Linux — в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    app = QApplication(sys.argv)
+    model = PartnerListModel()
+    view = QListView()
+    view.setModel(model)
+    view.setItemDelegate(PartnerCardDelegate(view))
+    view.setUniformItemSizes(True)
+    view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+    view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+    view.resize(980, 700)
+    view.show()
+    app.processEvents()
+
+    items = make_items(count)
+    rss_before = peak_rss_mb()
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        model.set_items(items)
+        view.grab()
+    reload_ms = (time.perf_counter() - started) * 1000 / repeats
+
+    scrollbar = view.verticalScrollBar()
+    step = max(1, view.viewport().height())
+    screens = 0
+    started = time.perf_counter()
+    for value in range(0, scrollbar.maximum() + 1, step):
+        scrollbar.setValue(value)
+        view.viewport().grab()
+        screens += 1
+    scroll_ms = (time.perf_counter() - started) * 1000 / max(1, screens)
+
+    print(f"партнёров: {count}")
+    print(f"перезагрузка + первый экран: {reload_ms:.2f} мс (среднее из {repeats})")
+    print(f"отрисовка экрана при прокрутке: {scroll_ms:.2f} мс (экранов: {screens})")
+    print(f"пиковый RSS: {peak_rss_mb():.1f} МБ (до перезагрузок {rss_before:.1f} МБ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Замер поиска партнёров по индексу в памяти (PartnerSearchIndex)
+Данные синтетические (БД не нужна): N строк PartnerListItem
+Замеряется:
+    построение индекса (строки добавляются по порядку, как из фонового загрузчика)
+    поиск сразу после построения — для нескольких видов запросов
+    изменение одной строки (add_item) вместе с первым поиском после него
+Запуск из корня проекта:
+    python -m benchmarks.partner_search [N] [повторов]
+"""
+
+import random
+import sys
+import time
+
+from services.partner_search import PartnerSearchIndex
+from services.partner_service import PartnerListItem, partner_sort_key
+
+# Запросы: наименование, редкое наименование, ИНН, телефон в формате +7 и цифрами, директор
+QUERIES = ["партнёр 12", "партнёр 99999", "10000123", "+7 (912", "912 00", "директор 5"]
+
+
+def make_items(count: int) -> list:
+    items = [
+        PartnerListItem(
+            i, ("ЗАО", "ООО", "ПАО", "ОАО")[i % 4], f"Партнёр {i}", f"Директор {i}",
+            f"{1000000000 + i}", f"9{i % 1000:03d}{i:06d}" if i % 3 else None, i * 37 % 600000, i % 11,
+        )
+        for i in range(count)
+    ]
+    items.sort(key=partner_sort_key)
+    return items
+
+
+def timed_ms(function, repeats: int) -> tuple[float, float]:
+    # Среднее и наибольшее время вызова, мс
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - started) * 1000)
+    return sum(times) / len(times), max(times)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    items = make_items(count)
+    started = time.perf_counter()
+    index = PartnerSearchIndex(items)
+    index.prepare()
+    print(f"партнёров: {count}")
+    print(f"построение индекса: {(time.perf_counter() - started) * 1000:.0f} мс")
+
+    print("поиск после построения (среднее / наибольшее):")
+    for query in QUERIES:
+        found, truncated = index.search(query)
+        average, worst = timed_ms(lambda: index.search(query), repeats)
+        more = "+" if truncated else ""
+        print(f"    «{query}»: {average:.2f} / {worst:.2f} мс, найдено {len(found)}{more}")
+
+    print("изменение строки и первый поиск после него (среднее / наибольшее):")
+    rng = random.Random(1)
+    for query in QUERIES:
+        def edit_and_search() -> None:
+            item = items[rng.randrange(count)]
+            index.add_item(item._replace(name=item.name + " (изм.)", rating=rng.randrange(11)))
+            index.search(query)
+        average, worst = timed_ms(edit_and_search, repeats)
+        print(f"    «{query}»: {average:.2f} / {worst:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
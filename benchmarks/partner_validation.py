@@ -0,0 +1,47 @@
+"""
+Замер пакетной проверки данных партнёров
+Данные синтетические (БД не нужна): N строк, примерно каждая десятая с ошибками
+Замеряется проверка пакета по столбцам (validate_partner_columns) вместе с переводом строк в столбцы
+Запуск из корня проекта:
+    python -m benchmarks.partner_validation [N] [повторов]
+"""
+
+import sys
+import time
+
+from services.partner_validation import rows_to_columns, validate_partner_columns
+
+
+def make_rows(count: int) -> list[dict]:
+    rows = []
+    for i in range(count):
+        broken = i % 10 == 0
+        rows.append({
+            "name": "" if broken else f"Партнёр {i}",
+            "director_full_name": f"Директор {i}",
+            "legal_address": "г. Москва, ул. Строителей, д. 1",
+            "inn": f"{1000000000 + i}" if not broken else f"12 34 {i}",
+            "email": f"partner{i}@mail.ru" if not broken else "partner",
+            "phone": f"+7 9{i % 10**9:09d}" if not broken else "8 900 123",
+            "rating": i % 11 if not broken else 15,
+        })
+    return rows
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    rows = make_rows(count)
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = validate_partner_columns(rows_to_columns(rows))
+    batch_ms = (time.perf_counter() - started) * 1000 / repeats
+
+    print(f"строк: {count}, с ошибками: {len(result.errors)}")
+    print(f"пакетная проверка: {batch_ms:.0f} мс (среднее из {repeats}), {count / batch_ms * 1000:.0f} строк/с")
+
+
+if __name__ == "__main__":
+    main()
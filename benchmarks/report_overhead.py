@@ -0,0 +1,67 @@
+"""
+Замер постоянных затрат на один PDF-отчёт (БД не нужна)
+Замеряются:
+    первая загрузка: импорт reportlab, чтение шрифтов, создание стилей (один раз на процесс)
+    создание стилей отчёта — то, что раньше повторялось в каждом отчёте
+    формирование небольшого отчёта (заголовок, сведения о партнёре, 10 строк истории)
+    с общими стилями — постоянные затраты отчёта при пакетном формировании
+Запуск из корня проекта:
+    python -m benchmarks.report_overhead [отчётов]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    from services.report_service import preload_report_resources
+
+    started = time.perf_counter()
+    preload_report_resources()
+    preload_ms = (time.perf_counter() - started) * 1000
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import Paragraph, Spacer
+    from services.report_history_table import StreamingHistoryDocTemplate, history_table_rows
+    from services.report_templates import FONT_BOLD_NAME, FONT_NAME, _build_styles, report_styles
+
+    started = time.perf_counter()
+    for _ in range(count):
+        _build_styles()
+    styles_ms = (time.perf_counter() - started) * 1000 / count
+
+    styles = report_styles()
+    rows = [(date(2024, 12, 31 - i), f"Продукция {i}", 100 + i) for i in range(10)]
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        for i in range(count):
+            doc = StreamingHistoryDocTemplate(
+                os.path.join(directory, f"{i}.pdf"),
+                history_table_rows(rows),
+                FONT_NAME,
+                FONT_BOLD_NAME,
+                table_style=styles.history_table,
+                pagesize=A4,
+                leftMargin=40,
+                rightMargin=40,
+                topMargin=40,
+                bottomMargin=40,
+            )
+            elems = [Paragraph("История реализации продукции", styles.title), Spacer(1, 12)]
+            elems += [Paragraph(f"Строка сведений о партнёре {n}", styles.body) for n in range(7)]
+            elems += [Spacer(1, 18), Paragraph("Таблица продаж", styles.body_bold), Spacer(1, 6)]
+            doc.build(elems)
+        report_ms = (time.perf_counter() - started) * 1000 / count
+
+    print(f"первая загрузка (reportlab, шрифты, стили): {preload_ms:.0f} мс")
+    print(f"создание стилей, которое раньше выполнялось в каждом отчёте: {styles_ms:.2f} мс")
+    print(f"небольшой отчёт с общими стилями: {report_ms:.1f} мс (среднее из {count})")
+
+
+if __name__ == "__main__":
+    main()
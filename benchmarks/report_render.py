@@ -0,0 +1,74 @@
+"""
+Замер вёрстки таблицы истории продаж в PDF-отчёте
+Данные синтетические (БД не нужна): N строк истории по убыванию даты, несколько строк на день
+Для каждого N замеряются время вёрстки, число страниц и пиковый объём памяти Python (tracemalloc,
+отдельным проходом: с ним вёрстка медленнее); при потоковой вёрстке время растёт линейно с N
+Память растёт только на содержимое готовых страниц (около 0,4 КБ на строку), которое reportlab
+хранит до записи файла; строки истории и таблицы reportlab в памяти не накапливаются
+Запуск из корня проекта:
+    python -m benchmarks.report_render [N ...] [--monthly-subtotals]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from services.report_history_table import StreamingHistoryDocTemplate, history_table_rows
+from services.report_service import preload_report_resources
+from services.report_templates import FONT_BOLD_NAME, FONT_NAME
+
+
+def make_rows(count: int):
+    # Строки (дата, продукция, количество) по убыванию даты: по 20 строк на день
+    first_day = date(2024, 12, 31)
+    for i in range(count):
+        yield first_day - timedelta(days=i // 20), f"Продукция {i % 37}", 1 + i % 500
+
+
+def render(count: int, monthly_subtotals: bool) -> StreamingHistoryDocTemplate:
+    from reportlab.lib.pagesizes import A4
+
+    with tempfile.TemporaryDirectory() as directory:
+        doc = StreamingHistoryDocTemplate(
+            os.path.join(directory, "report.pdf"),
+            history_table_rows(make_rows(count), monthly_subtotals),
+            FONT_NAME,
+            FONT_BOLD_NAME,
+            pagesize=A4,
+            leftMargin=40,
+            rightMargin=40,
+            topMargin=40,
+            bottomMargin=40,
+        )
+        doc.build([])
+    return doc
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    monthly_subtotals = "--monthly-subtotals" in sys.argv
+    counts = [int(arg) for arg in args] or [10_000, 50_000, 100_000]
+
+    preload_report_resources()
+    for count in counts:
+        started = time.perf_counter()
+        doc = render(count, monthly_subtotals)
+        seconds = time.perf_counter() - started
+
+        tracemalloc.start()
+        render(count, monthly_subtotals)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"строк: {count}, страниц: {doc.page}, вёрстка: {seconds:.1f} с "
+            f"({count / seconds:.0f} строк/с, {seconds / count * 1e6:.0f} мкс/строка), "
+            f"пик памяти: {peak / 2**20:.1f} МБ"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Замер запуска приложения
+Каждый замер выполняется в отдельном процессе Python, чтобы модули не были уже загружены
+Замеряется:
+    импорт main (python -X importtime): общее время и собственное время импорта по пакетам
+    время от старта процесса до первого показа главного окна (медиана из нескольких запусков)
+К БД окно при запуске не обращается (список загружается в фоне), поэтому замер не зависит
+от доступности PostgreSQL; фоновая загрузка после замера не ожидается
+Запуск из корня проекта:
+    python -m benchmarks.startup [запусков] [пакетов в разбивке]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# Код дочернего процесса: время до первого прохода цикла событий после window.show()
+_FIRST_WINDOW_CODE = """
+import os, time
+started = time.perf_counter()
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
+import main
+from db.db import get_sessionmaker, PROFILE_GUI
+from ui.main_window import MainWindow
+
+app = QApplication([])
+window = MainWindow(get_sessionmaker(PROFILE_GUI))
+window.show()
+
+def shown():
+    print(f"{(time.perf_counter() - started) * 1000:.1f} {int(window.snapshot_shown)}", flush=True)
+    # Фоновые потоки загрузки не дожидаемся
+    os._exit(0)
+
+QTimer.singleShot(0, shown)
+app.exec()
+"""
+
+
+def _child_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def import_breakdown() -> tuple[float, dict, bool]:
+    """
+    Импортирует main в отдельном процессе с -X importtime
+    Возвращает общее время импорта (мс), собственное время по пакетам верхнего уровня
+    и признак того, что при запуске был загружен reportlab
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=_child_env(), check=True,
+    )
+    total_us = 0
+    by_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        by_package[module.split(".")[0]] += int(self_us)
+        if module == "main":
+            total_us = int(cumulative_us)
+    return total_us / 1000, {name: us / 1000 for name, us in by_package.items()}, "reportlab" in by_package
+
+
+def first_window_ms() -> tuple[float, bool]:
+    # Время до первого показа окна в новом процессе и признак показа сохранённого снимка списка
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_WINDOW_CODE],
+        capture_output=True, text=True, env=_child_env(), check=True,
+    )
+    elapsed, snapshot = result.stdout.split()
+    return float(elapsed), snapshot == "1"
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    total_ms, by_package, reportlab_loaded = import_breakdown()
+    print(f"импорт main: {total_ms:.1f} мс")
+    print("собственное время импорта по пакетам:")
+    for name, ms in sorted(by_package.items(), key=lambda pair: pair[1], reverse=True)[:top]:
+        print(f"    {name:<20} {ms:8.1f} мс")
+    print(f"reportlab загружен при запуске: {'да' if reportlab_loaded else 'нет'}")
+
+    results = [first_window_ms() for _ in range(runs)]
+    times = [elapsed for elapsed, _ in results]
+    print(
+        f"до первого показа окна: медиана {statistics.median(times):.1f} мс, "
+        f"мин {min(times):.1f} мс, макс {max(times):.1f} мс (запусков: {runs})"
+    )
+    print(f"показан сохранённый список: {'да' if results[-1][1] else 'нет'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Модуль версионных миграций схемы partner_module
+
+'''
+Миграции — SQL-скрипты в каталоге db/migrations с именами вида NNNN_описание.sql
+Каждая миграция применяется один раз, в своей транзакции, в порядке номеров
+Применённые миграции записываются в таблицу partner_module.schema_migrations
+вместе с контрольной суммой файла: изменение уже применённого скрипта считается ошибкой
+Одновременный запуск из нескольких процессов исключается рекомендательной блокировкой PostgreSQL
+Исходная схема создаётся из db/partner_module_dump.sql, миграции применяются поверх неё
+'''
+
+import hashlib
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import text
+
+from db.db import DB_SCHEMA, PROFILE_BATCH, get_engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# Таблица учёта применённых миграций
+MIGRATIONS_TABLE = f"{DB_SCHEMA}.schema_migrations"
+
+# Ключ рекомендательной блокировки на время применения миграций
+_LOCK_KEY = 0x70617274
+
+_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+class Migration(NamedTuple):
+    # Файл миграции
+    version: int
+    name: str
+    path: Path
+    checksum: str
+
+
+class MigrationStatus(NamedTuple):
+    # Миграция и время её применения (None — ещё не применена)
+    migration: Migration
+    applied_at: object | None
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    # Файлы миграций каталога в порядке номеров
+    migrations = []
+    for path in sorted(Path(directory).glob("*.sql")):
+        match = _FILE_RE.match(path.name)
+        if match is None:
+            raise ValueError(f"Неверное имя файла миграции: {path.name} (ожидается NNNN_описание.sql)")
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations.append(Migration(int(match.group(1)), match.group(2), path, checksum))
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Номера миграций в каталоге повторяются.")
+    return migrations
+
+
+def _ensure_table(connection) -> None:
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        "version integer PRIMARY KEY, "
+        "name text NOT NULL, "
+        "checksum text NOT NULL, "
+        "applied_at timestamptz NOT NULL DEFAULT now())"
+    ))
+
+
+def _applied(connection) -> dict:
+    # Применённые миграции: номер -> (контрольная сумма, время применения)
+    rows = connection.execute(text(f"SELECT version, checksum, applied_at FROM {MIGRATIONS_TABLE}"))
+    return {version: (checksum, applied_at) for version, checksum, applied_at in rows}
+
+
+def _check_checksums(migrations: list[Migration], applied: dict) -> None:
+    # Уже применённые скрипты менять нельзя: изменения оформляются новой миграцией
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version][0] != migration.checksum:
+            raise RuntimeError(
+                f"Миграция {migration.path.name} изменена после применения. "
+                "Верните исходный текст и оформите изменения новой миграцией."
+            )
+
+
+def migration_status(engine=None, directory: Path = MIGRATIONS_DIR) -> list[MigrationStatus]:
+    # Все миграции каталога с отметкой о применении
+    engine = engine or get_engine(PROFILE_BATCH)
+    migrations = discover_migrations(directory)
+    with engine.begin() as connection:
+        _ensure_table(connection)
+        applied = _applied(connection)
+    _check_checksums(migrations, applied)
+    return [
+        MigrationStatus(migration, applied.get(migration.version, (None, None))[1])
+        for migration in migrations
+    ]
+
+
+def migrate(engine=None, target: int | None = None, directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """
+    Применяет неприменённые миграции до номера target включительно (None — все)
+    Каждая миграция выполняется в своей транзакции вместе с записью в schema_migrations,
+    поэтому ошибка в скрипте не оставляет схему в промежуточном состоянии
+    Возвращает список применённых миграций
+    """
+    engine = engine or get_engine(PROFILE_BATCH)
+    migrations = [
+        migration for migration in discover_migrations(directory)
+        if target is None or migration.version <= target
+    ]
+
+    done = []
+    with engine.connect() as connection:
+        # Блокировка уровня сессии: второй процесс дождётся окончания применения миграций
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        connection.commit()
+        try:
+            with connection.begin():
+                _ensure_table(connection)
+                applied = _applied(connection)
+            _check_checksums(migrations, applied)
+
+            for migration in migrations:
+                if migration.version in applied:
+                    continue
+                with connection.begin():
+                    connection.exec_driver_sql(migration.path.read_text(encoding="utf-8"))
+                    connection.execute(
+                        text(f"INSERT INTO {MIGRATIONS_TABLE} (version, name, checksum) VALUES (:version, :name, :checksum)"),
+                        {"version": migration.version, "name": migration.name, "checksum": migration.checksum},
+                    )
+                done.append(migration)
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+            connection.commit()
+    return done
@@ -0,0 +1,26 @@
+-- Индексы для частых запросов приложения
+-- История продаж партнёра (get_partner_sales): отбор продаж по партнёру с сортировкой по дате
+-- и соединения sale_items -> sales и sale_items -> products
+-- Список партнёров (get_partner_page): keyset-пагинация по рейтингу и по наименованию
+-- Первый контакт партнёра (min(id) по partner_id) в строках списка
+
+CREATE INDEX IF NOT EXISTS sales_partner_id_sale_date_idx
+    ON partner_module.sales (partner_id, sale_date DESC);
+
+CREATE INDEX IF NOT EXISTS sales_sale_date_idx
+    ON partner_module.sales (sale_date);
+
+CREATE INDEX IF NOT EXISTS sale_items_sale_id_idx
+    ON partner_module.sale_items (sale_id);
+
+CREATE INDEX IF NOT EXISTS sale_items_product_id_idx
+    ON partner_module.sale_items (product_id);
+
+CREATE INDEX IF NOT EXISTS partners_rating_name_id_idx
+    ON partner_module.partners (rating DESC, name, id);
+
+CREATE INDEX IF NOT EXISTS partners_name_id_idx
+    ON partner_module.partners (name, id);
+
+CREATE INDEX IF NOT EXISTS partner_contacts_partner_id_id_idx
+    ON partner_module.partner_contacts (partner_id, id);
@@ -0,0 +1,181 @@
+-- Поддержание partner_sales_summary в актуальном состоянии
+-- Суммарное количество проданной продукции партнёра меняется триггерами в той же транзакции,
+-- что и изменение sales / sale_items, поэтому при показе карточек SUM по продажам не нужен
+-- Триггеры sale_items уровня оператора: пакетная вставка обновляет сводку одним запросом
+-- Удаление продажи (BEFORE DELETE по строке sales) вычитает её строки заранее: строки,
+-- удаляемые каскадом, к этому моменту уже не соединяются с продажей и второй раз не вычитаются
+
+-- Прибавляет к сводке изменения количества по партнёрам (отрицательные — вычитание)
+CREATE OR REPLACE FUNCTION partner_module.apply_sales_summary_delta(partner_ids bigint[], deltas bigint[])
+RETURNS void
+LANGUAGE sql
+AS $$
+    WITH delta AS (
+        SELECT partner_id, sum(quantity) AS quantity
+        FROM unnest(partner_ids, deltas) AS d(partner_id, quantity)
+        GROUP BY partner_id
+        HAVING sum(quantity) <> 0
+    ),
+    updated AS (
+        UPDATE partner_module.partner_sales_summary AS s
+        SET total_quantity = greatest(s.total_quantity + delta.quantity, 0)
+        FROM delta
+        WHERE s.partner_id = delta.partner_id
+        RETURNING s.partner_id
+    )
+    INSERT INTO partner_module.partner_sales_summary AS summary (partner_id, total_quantity)
+    SELECT partner_id, quantity
+    FROM delta
+    WHERE quantity > 0
+      AND partner_id NOT IN (SELECT partner_id FROM updated)
+    ON CONFLICT (partner_id) DO UPDATE
+        SET total_quantity = summary.total_quantity + EXCLUDED.total_quantity;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sale_items_summary_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.apply_sales_summary_delta(array_agg(partner_id), array_agg(quantity))
+    FROM (
+        SELECT s.partner_id, sum(n.quantity)::bigint AS quantity
+        FROM new_rows AS n
+        JOIN partner_module.sales AS s ON s.id = n.sale_id
+        GROUP BY s.partner_id
+    ) AS delta;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sale_items_summary_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.apply_sales_summary_delta(array_agg(partner_id), array_agg(quantity))
+    FROM (
+        SELECT s.partner_id, -sum(o.quantity)::bigint AS quantity
+        FROM old_rows AS o
+        JOIN partner_module.sales AS s ON s.id = o.sale_id
+        GROUP BY s.partner_id
+    ) AS delta;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sale_items_summary_update()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.apply_sales_summary_delta(array_agg(partner_id), array_agg(quantity))
+    FROM (
+        SELECT s.partner_id, sum(change.quantity)::bigint AS quantity
+        FROM (
+            SELECT sale_id, -quantity AS quantity FROM old_rows
+            UNION ALL
+            SELECT sale_id, quantity FROM new_rows
+        ) AS change
+        JOIN partner_module.sales AS s ON s.id = change.sale_id
+        GROUP BY s.partner_id
+    ) AS delta;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sales_summary_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.apply_sales_summary_delta(
+        ARRAY[OLD.partner_id],
+        ARRAY[-coalesce((SELECT sum(quantity) FROM partner_module.sale_items WHERE sale_id = OLD.id), 0)::bigint]
+    );
+    RETURN OLD;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sales_summary_update()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Продажа передана другому партнёру: её количество переносится между партнёрами
+    PERFORM partner_module.apply_sales_summary_delta(array_agg(partner_id), array_agg(quantity))
+    FROM (
+        SELECT moved.partner_id, sum(moved.quantity)::bigint AS quantity
+        FROM (
+            SELECT o.partner_id, -i.quantity AS quantity
+            FROM old_rows AS o
+            JOIN new_rows AS n ON n.id = o.id
+            JOIN partner_module.sale_items AS i ON i.sale_id = o.id
+            WHERE o.partner_id <> n.partner_id
+            UNION ALL
+            SELECT n.partner_id, i.quantity
+            FROM old_rows AS o
+            JOIN new_rows AS n ON n.id = o.id
+            JOIN partner_module.sale_items AS i ON i.sale_id = n.id
+            WHERE o.partner_id <> n.partner_id
+        ) AS moved
+        GROUP BY moved.partner_id
+    ) AS delta;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER sale_items_summary_insert
+    AFTER INSERT ON partner_module.sale_items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sale_items_summary_insert();
+
+CREATE TRIGGER sale_items_summary_delete
+    AFTER DELETE ON partner_module.sale_items
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sale_items_summary_delete();
+
+CREATE TRIGGER sale_items_summary_update
+    AFTER UPDATE ON partner_module.sale_items
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sale_items_summary_update();
+
+CREATE TRIGGER sales_summary_delete
+    BEFORE DELETE ON partner_module.sales
+    FOR EACH ROW EXECUTE FUNCTION partner_module.sales_summary_delete();
+
+CREATE TRIGGER sales_summary_update
+    AFTER UPDATE ON partner_module.sales
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sales_summary_update();
+
+-- Пересчёт всей сводки одним запросом (используется и командой manage.py rebuild-summary)
+-- Сводка приводится в соответствие с продажами, с которых начинают работать триггеры
+CREATE OR REPLACE FUNCTION partner_module.rebuild_sales_summary()
+RETURNS integer
+LANGUAGE sql
+AS $$
+    WITH totals AS (
+        SELECT s.partner_id, sum(i.quantity)::bigint AS total_quantity
+        FROM partner_module.sales AS s
+        JOIN partner_module.sale_items AS i ON i.sale_id = s.id
+        GROUP BY s.partner_id
+    ),
+    upserted AS (
+        INSERT INTO partner_module.partner_sales_summary AS summary (partner_id, total_quantity)
+        SELECT partner_id, total_quantity FROM totals
+        ON CONFLICT (partner_id) DO UPDATE
+            SET total_quantity = EXCLUDED.total_quantity
+            WHERE summary.total_quantity <> EXCLUDED.total_quantity
+        RETURNING summary.partner_id
+    ),
+    removed AS (
+        DELETE FROM partner_module.partner_sales_summary AS summary
+        WHERE NOT EXISTS (SELECT 1 FROM totals WHERE totals.partner_id = summary.partner_id)
+        RETURNING summary.partner_id
+    )
+    SELECT ((SELECT count(*) FROM upserted) + (SELECT count(*) FROM removed))::integer;
+$$;
+
+LOCK TABLE partner_module.sales, partner_module.sale_items IN SHARE MODE;
+SELECT partner_module.rebuild_sales_summary();
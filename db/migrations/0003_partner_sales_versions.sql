@@ -0,0 +1,118 @@
+-- Номер версии истории продаж каждого партнёра
+-- Любое изменение sales / sale_items увеличивает версию затронутых партнёров в той же транзакции
+-- По версии приложение проверяет, не устарела ли закэшированная история продаж партнёра:
+-- одно чтение строки по первичному ключу вместо повторной выборки всей истории
+-- Версия меняется и при изменениях, не меняющих сводку (дата продажи, продукция в строке)
+-- Триггеры уровня оператора: пакетная загрузка увеличивает версию партнёра один раз на оператор
+-- Строки продаж, удаляемые каскадом вместе с продажей, уже не соединяются с ней:
+-- партнёра таких строк учитывает триггер удаления sales
+
+CREATE TABLE partner_module.partner_sales_versions (
+    partner_id bigint PRIMARY KEY REFERENCES partner_module.partners (id) ON DELETE CASCADE,
+    version bigint NOT NULL DEFAULT 1
+);
+
+-- Увеличивает версии истории продаж партнёров (повторы id допускаются)
+CREATE OR REPLACE FUNCTION partner_module.bump_partner_sales_versions(partner_ids bigint[])
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO partner_module.partner_sales_versions AS v (partner_id)
+    SELECT DISTINCT partner_id
+    FROM unnest(partner_ids) AS p(partner_id)
+    WHERE partner_id IS NOT NULL
+    ORDER BY partner_id
+    ON CONFLICT (partner_id) DO UPDATE SET version = v.version + 1;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sale_items_version_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.bump_partner_sales_versions(array_agg(s.partner_id))
+    FROM new_rows AS n
+    JOIN partner_module.sales AS s ON s.id = n.sale_id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sale_items_version_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.bump_partner_sales_versions(array_agg(s.partner_id))
+    FROM old_rows AS o
+    JOIN partner_module.sales AS s ON s.id = o.sale_id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sale_items_version_update()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.bump_partner_sales_versions(array_agg(s.partner_id))
+    FROM (
+        SELECT sale_id FROM old_rows
+        UNION
+        SELECT sale_id FROM new_rows
+    ) AS changed
+    JOIN partner_module.sales AS s ON s.id = changed.sale_id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sales_version_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM partner_module.bump_partner_sales_versions(array_agg(partner_id))
+    FROM old_rows;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION partner_module.sales_version_update()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Изменились дата или партнёр продажи: история меняется у прежнего и нового партнёра
+    PERFORM partner_module.bump_partner_sales_versions(array_agg(partner_id))
+    FROM (
+        SELECT partner_id FROM old_rows
+        UNION
+        SELECT partner_id FROM new_rows
+    ) AS changed;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER sale_items_version_insert
+    AFTER INSERT ON partner_module.sale_items
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sale_items_version_insert();
+
+CREATE TRIGGER sale_items_version_delete
+    AFTER DELETE ON partner_module.sale_items
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sale_items_version_delete();
+
+CREATE TRIGGER sale_items_version_update
+    AFTER UPDATE ON partner_module.sale_items
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sale_items_version_update();
+
+CREATE TRIGGER sales_version_delete
+    AFTER DELETE ON partner_module.sales
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sales_version_delete();
+
+CREATE TRIGGER sales_version_update
+    AFTER UPDATE ON partner_module.sales
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION partner_module.sales_version_update();
@@ -0,0 +1,16 @@
+-- Индексы keyset-пагинации списка партнёров (get_partner_page)
+-- Наименование упорядочивается в побайтовой сортировке COLLATE "C" (порядок кодов символов,
+-- как при сравнении строк в Python): иначе порядок правила сортировки базы для кириллицы
+-- (ё, регистр букв) расходится с местом, куда окно ставит изменённую карточку
+-- Порядок по рейтингу задан ключом (-rating, name, id): все столбцы по возрастанию,
+-- поэтому условие по курсору записывается сравнением строк (-rating, name, id) > (...)
+-- и страница читается диапазоном индекса прямо с места курсора
+
+DROP INDEX IF EXISTS partner_module.partners_rating_name_id_idx;
+DROP INDEX IF EXISTS partner_module.partners_name_id_idx;
+
+CREATE INDEX partners_neg_rating_name_c_id_idx
+    ON partner_module.partners ((-rating), name COLLATE "C", id);
+
+CREATE INDEX partners_name_c_id_idx
+    ON partner_module.partners (name COLLATE "C", id);
@@ -0,0 +1,12 @@
+-- Номер документа продажи из выгрузки (sales_import_service)
+-- Загруженная продажа определяется ключом (партнёр, дата, номер документа); у позиций выгрузки
+-- без номера документа он записывается пустой строкой, у продаж, созданных не импортом, — NULL
+-- Уникальный индекс по ключу позволяет импорту пропускать уже загруженные продажи
+-- (INSERT ... ON CONFLICT DO NOTHING): повторная загрузка того же файла не создаёт дублей
+-- и не увеличивает сводку продаж; NULL в ключе не совпадает ни с чем, поэтому прочие продажи не затронуты
+-- Продажи, загруженные до этой миграции, номера документа не имеют и от повторной загрузки не защищены
+
+ALTER TABLE partner_module.sales ADD COLUMN sale_ref text;
+
+CREATE UNIQUE INDEX sales_partner_id_sale_date_sale_ref_key
+    ON partner_module.sales (partner_id, sale_date, sale_ref);
@@ -9,7 +9,7 @@
 - агрегированная таблица с суммарным количеством реализованной продукции по партнёру.
 '''
 
-from sqlalchemy import Column, Integer, BigInteger, String, Numeric, Date, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Numeric, Date, ForeignKey
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -96,6 +96,8 @@ class Sale(Base):
     id = Column(BigInteger, primary_key=True, autoincrement=True)
     partner_id = Column(BigInteger, ForeignKey("partner_module.partners.id", ondelete="RESTRICT"), nullable=False)
     sale_date = Column(Date, nullable=False)
+    # Номер документа продажи из выгрузки (миграция 0005), NULL — продажа создана не импортом
+    sale_ref = Column(Text, nullable=True)
 
     partner = relationship("Partner", back_populates="sales")
     items = relationship("SaleItem", back_populates="sale", cascade="all, delete-orphan")
@@ -122,3 +124,12 @@ class PartnerSalesSummary(Base):
     total_quantity = Column(BigInteger, nullable=False)
 
     partner = relationship("Partner", back_populates="summary")
+
+
+class PartnerSalesVersion(Base):
+    # Версия истории продаж партнёра, увеличивается триггерами (миграция 0003)
+    __tablename__ = "partner_sales_versions"
+    __table_args__ = {"schema": "partner_module"}
+
+    partner_id = Column(BigInteger, ForeignKey("partner_module.partners.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False)
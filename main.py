@@ -3,7 +3,7 @@
 import sys
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QFont
-from db.db import SessionLocal
+from db.db import get_sessionmaker, PROFILE_GUI
 from ui.main_window import MainWindow
 
 def main():
@@ -12,7 +12,7 @@ def main():
 
     app.setFont(QFont("Segoe UI", 10))
 
-    window = MainWindow(SessionLocal)
+    window = MainWindow(get_sessionmaker(PROFILE_GUI))
     window.show()
 
     sys.exit(app.exec())
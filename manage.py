@@ -0,0 +1,217 @@
+# Командная строка для обслуживания базы данных модуля
+
+'''
+Запуск из корня проекта:
+    python manage.py migrate [--target N]   применить неприменённые миграции схемы
+    python manage.py migrations             показать миграции и отметки об их применении
+    python manage.py rebuild-summary        пересчитать сводку продаж партнёров
+    python manage.py import-sales FILE      загрузить продажи из выгрузки CSV или JSON Lines
+    python manage.py upsert-partners FILE   создать или обновить партнёров по ИНН из выгрузки CRM
+    python manage.py batch-reports DIR      сформировать PDF-отчёты по истории продаж всех партнёров
+    python manage.py export-sales FILE      выгрузить историю продаж в CSV или XLSX
+Подключение настраивается переменными окружения PARTNER_DB_* (профиль batch, см. db/db.py)
+'''
+
+import argparse
+import sys
+import time
+from collections import Counter
+from datetime import date
+
+# Сколько ошибок по строкам выводится командами загрузки
+MAX_PRINTED_ERRORS = 20
+
+
+def cmd_migrate(args) -> int:
+    from db.migrate import migrate
+
+    applied = migrate(target=args.target)
+    if not applied:
+        print("Схема в актуальном состоянии, новых миграций нет.")
+    for migration in applied:
+        print(f"Применена миграция {migration.path.name}")
+    return 0
+
+
+def cmd_migrations(args) -> int:
+    from db.migrate import migration_status
+
+    for status in migration_status():
+        applied = status.applied_at.strftime("%d.%m.%Y %H:%M") if status.applied_at else "не применена"
+        print(f"{status.migration.path.name:<40} {applied}")
+    return 0
+
+
+def cmd_rebuild_summary(args) -> int:
+    from db.db import get_sessionmaker, PROFILE_BATCH
+    from services.sales_summary_service import rebuild_sales_summary
+    from services.unit_of_work import unit_of_work
+
+    with unit_of_work(get_sessionmaker(PROFILE_BATCH)) as session:
+        changed = rebuild_sales_summary(session)
+    print(f"Сводка продаж пересчитана, изменено строк: {changed}")
+    return 0
+
+
+def cmd_import_sales(args) -> int:
+    from db.db import get_sessionmaker, PROFILE_BATCH
+    from services.sales_import_service import import_sales, iter_import_rows
+    from services.unit_of_work import unit_of_work
+
+    started = time.perf_counter()
+
+    def progress(rows_read: int) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"  прочитано строк: {rows_read} ({rows_read / elapsed:.0f} строк/с)", flush=True)
+
+    with unit_of_work(get_sessionmaker(PROFILE_BATCH)) as session:
+        result = import_sales(session, iter_import_rows(args.file, args.format), args.batch_size, progress)
+
+    print(
+        f"Загружено продаж: {result.sales_created}, позиций: {result.items_created}, "
+        f"пропущено строк: {result.rows_skipped} из {result.rows_read}"
+    )
+    if result.sales_existing:
+        print(f"Уже загруженных ранее продаж пропущено: {result.sales_existing}")
+    print(f"Время: {result.seconds:.1f} с, {result.rows_per_second:.0f} строк/с")
+    for error in result.errors:
+        print("  пропущена", error)
+    return 0
+
+
+def cmd_upsert_partners(args) -> int:
+    from db.db import get_sessionmaker, PROFILE_BATCH
+    from services.partner_sync_service import (
+        STATUS_CREATED, STATUS_ERROR, STATUS_UNCHANGED, STATUS_UPDATED, upsert_partners,
+    )
+    from services.sales_import_service import iter_import_rows
+    from services.unit_of_work import unit_of_work
+
+    started = time.perf_counter()
+
+    def progress(rows_done: int, rows_total: int) -> None:
+        print(f"  записано строк: {rows_done} из {rows_total}", flush=True)
+
+    with unit_of_work(get_sessionmaker(PROFILE_BATCH)) as session:
+        results = upsert_partners(session, iter_import_rows(args.file, args.format), args.chunk_size, progress)
+
+    counts = Counter(result.status for result in results)
+    print(
+        f"Создано партнёров: {counts[STATUS_CREATED]}, изменено: {counts[STATUS_UPDATED]}, "
+        f"без изменений: {counts[STATUS_UNCHANGED]}, с ошибками: {counts[STATUS_ERROR]} "
+        f"(время: {time.perf_counter() - started:.1f} с)"
+    )
+    errors = [result for result in results if result.status == STATUS_ERROR]
+    for result in errors[:MAX_PRINTED_ERRORS]:
+        print(f"  строка {result.row} (ИНН {result.inn or '—'}):", result.error.replace("\n", " "))
+    return 1 if errors else 0
+
+
+def cmd_batch_reports(args) -> int:
+    from services.batch_report_service import generate_partner_reports
+    from services.sales_history_service import SalesHistoryFilter
+
+    history_filter = None
+    if args.date_from or args.date_to:
+        history_filter = SalesHistoryFilter(args.date_from, args.date_to)
+
+    def progress(done: int, total: int) -> None:
+        if done == total or done % 100 == 0:
+            print(f"  готово отчётов: {done} из {total}", flush=True)
+
+    result = generate_partner_reports(
+        args.output_dir, args.partner or None, args.workers, history_filter, progress, args.monthly_subtotals,
+    )
+    print(
+        f"Сформировано отчётов: {result.succeeded} из {result.total}, с ошибками: {result.failed}. "
+        f"Время: {result.seconds:.1f} с, {result.reports_per_second:.1f} отчётов/с"
+    )
+    print(f"Манифест: {result.manifest_path}")
+    return 1 if result.failed else 0
+
+
+def cmd_export_sales(args) -> int:
+    from db.db import get_sessionmaker, PROFILE_BATCH
+    from services.sales_export_service import export_sales
+    from services.sales_history_service import SalesHistoryFilter
+    from services.unit_of_work import read_session
+
+    history_filter = None
+    if args.date_from or args.date_to:
+        history_filter = SalesHistoryFilter(args.date_from, args.date_to)
+
+    started = time.perf_counter()
+
+    def progress(rows_written: int) -> None:
+        if rows_written % 100_000 == 0:
+            elapsed = time.perf_counter() - started
+            print(f"  выгружено строк: {rows_written} ({rows_written / elapsed:.0f} строк/с)", flush=True)
+
+    with read_session(get_sessionmaker(PROFILE_BATCH)) as session:
+        result = export_sales(session, args.file, args.format, args.partner or None, history_filter, progress)
+    print(f"Выгружено строк: {result.rows} в {result.path}")
+    print(f"Время: {result.seconds:.1f} с, {result.rows_per_second:.0f} строк/с")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="manage.py", description="Обслуживание базы данных модуля работы с партнёрами")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="применить миграции схемы partner_module")
+    migrate_parser.add_argument("--target", type=int, default=None, help="применить миграции до номера N включительно")
+    migrate_parser.set_defaults(handler=cmd_migrate)
+
+    status_parser = commands.add_parser("migrations", help="показать состояние миграций")
+    status_parser.set_defaults(handler=cmd_migrations)
+
+    rebuild_parser = commands.add_parser("rebuild-summary", help="пересчитать partner_sales_summary по продажам")
+    rebuild_parser.set_defaults(handler=cmd_rebuild_summary)
+
+    import_parser = commands.add_parser("import-sales", help="загрузить продажи из выгрузки")
+    import_parser.add_argument("file", help="файл выгрузки: CSV (inn, article, sale_date, quantity[, sale_ref]) или JSON Lines")
+    import_parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="формат файла (по умолчанию по расширению)")
+    import_parser.add_argument("--batch-size", type=int, default=10000, help="строк в одной пачке COPY")
+    import_parser.set_defaults(handler=cmd_import_sales)
+
+    upsert_parser = commands.add_parser("upsert-partners", help="создать или обновить партнёров по ИНН")
+    upsert_parser.add_argument(
+        "file",
+        help="файл выгрузки: CSV (partner_type или partner_type_id, name, director_full_name, "
+             "legal_address, inn, email, phone, rating) или JSON Lines",
+    )
+    upsert_parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="формат файла (по умолчанию по расширению)")
+    upsert_parser.add_argument("--chunk-size", type=int, default=1000, help="строк в одном запросе к БД")
+    upsert_parser.set_defaults(handler=cmd_upsert_partners)
+
+    reports_parser = commands.add_parser("batch-reports", help="сформировать PDF-отчёты по истории продаж партнёров")
+    reports_parser.add_argument("output_dir", help="каталог для отчётов и manifest.json")
+    reports_parser.add_argument("--workers", type=int, default=None, help="число процессов (по умолчанию по числу ядер)")
+    reports_parser.add_argument("--partner", type=int, action="append", help="id партнёра (можно указать несколько раз)")
+    reports_parser.add_argument("--date-from", type=date.fromisoformat, default=None, help="начало периода продаж, ГГГГ-ММ-ДД")
+    reports_parser.add_argument("--date-to", type=date.fromisoformat, default=None, help="конец периода продаж, ГГГГ-ММ-ДД")
+    reports_parser.add_argument("--monthly-subtotals", action="store_true", help="итоги по месяцам в таблицах отчётов")
+    reports_parser.set_defaults(handler=cmd_batch_reports)
+
+    export_parser = commands.add_parser("export-sales", help="выгрузить историю продаж в CSV или XLSX")
+    export_parser.add_argument("file", help="файл выгрузки (.csv или .xlsx)")
+    export_parser.add_argument("--format", choices=("csv", "xlsx"), default=None, help="формат файла (по умолчанию по расширению)")
+    export_parser.add_argument("--partner", type=int, action="append", help="id партнёра (можно указать несколько раз)")
+    export_parser.add_argument("--date-from", type=date.fromisoformat, default=None, help="начало периода продаж, ГГГГ-ММ-ДД")
+    export_parser.add_argument("--date-to", type=date.fromisoformat, default=None, help="конец периода продаж, ГГГГ-ММ-ДД")
+    export_parser.set_defaults(handler=cmd_export_sales)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except Exception as e:
+        print("Ошибка:", e, file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
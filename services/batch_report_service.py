@@ -0,0 +1,181 @@
+"""
+Пакетное формирование PDF-отчётов по истории продаж партнёров (например, на конец месяца)
+Устройство:
+    список партнёров читается одним запросом; партнёры с большим объёмом продаж
+    отправляются в работу первыми, чтобы крупные отчёты не оказались в конце очереди
+    отчёты формируются параллельно в пуле процессов: у каждого процесса свои соединения с БД
+    (унаследованные от родителя отбрасываются) и один раз зарегистрированные шрифты
+    каждый отчёт — отдельная короткая сессия только для чтения; ошибка одного отчёта
+    записывается в манифест и не останавливает остальные
+В каталоге результата кроме PDF-файлов создаётся manifest.json: список отчётов
+с результатом, временем формирования и размером файла, итоги и производительность пакета
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import func
+
+from db.db import PROFILE_BATCH, dispose_engines, get_sessionmaker
+from db.models import Partner, PartnerSalesSummary
+from services.unit_of_work import read_session
+
+MANIFEST_NAME = "manifest.json"
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+# Символы, недопустимые в именах файлов Windows
+_UNSAFE_NAME_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+
+
+class ReportJobResult(NamedTuple):
+    # Результат формирования отчёта одного партнёра
+    partner_id: int
+    file: str
+    status: str
+    error: str | None
+    seconds: float
+    size: int
+
+
+class BatchReportResult(NamedTuple):
+    # Итог пакета
+    total: int
+    succeeded: int
+    failed: int
+    seconds: float
+    manifest_path: Path
+
+    @property
+    def reports_per_second(self) -> float:
+        return self.total / self.seconds if self.seconds > 0 else 0.0
+
+
+def report_filename(partner_id: int, partner_name: str) -> str:
+    # Имя файла отчёта: id партнёра (для сортировки и уникальности) и наименование без недопустимых символов
+    safe_name = _UNSAFE_NAME_RE.sub("_", partner_name or "").strip(" ._")[:80]
+    return f"{partner_id:06d} {safe_name}.pdf" if safe_name else f"{partner_id:06d}.pdf"
+
+
+def _partners_for_batch(partner_ids: list[int] | None) -> list[tuple]:
+    # (id, наименование, ИНН) партнёров пакета, сначала партнёры с наибольшим объёмом продаж
+    with read_session(get_sessionmaker(PROFILE_BATCH)) as session:
+        query = (
+            session.query(Partner.id, Partner.name, Partner.inn)
+            .outerjoin(PartnerSalesSummary, PartnerSalesSummary.partner_id == Partner.id)
+            .order_by(func.coalesce(PartnerSalesSummary.total_quantity, 0).desc(), Partner.id)
+        )
+        if partner_ids:
+            query = query.filter(Partner.id.in_(partner_ids))
+        return [tuple(row) for row in query.all()]
+
+
+def _init_worker() -> None:
+    # Запускается один раз в каждом процессе пула
+    # Соединения, унаследованные от родителя при fork, процессу не принадлежат
+    dispose_engines(close=False)
+    from services.report_service import preload_report_resources
+    preload_report_resources()
+
+
+def _render_partner_report(partner_id: int, path: str, history_filter, monthly_subtotals: bool) -> ReportJobResult:
+    # Формирует отчёт одного партнёра в процессе пула; ошибки возвращаются в результате
+    from services.report_service import generate_partner_sales_report
+
+    started = time.perf_counter()
+    try:
+        with read_session(get_sessionmaker(PROFILE_BATCH)) as session:
+            generate_partner_sales_report(
+                session, partner_id, path, history_filter, use_cache=False, monthly_subtotals=monthly_subtotals,
+            )
+    except Exception as e:
+        return ReportJobResult(partner_id, os.path.basename(path), STATUS_ERROR, str(e), time.perf_counter() - started, 0)
+    return ReportJobResult(
+        partner_id, os.path.basename(path), STATUS_OK, None, time.perf_counter() - started, os.path.getsize(path),
+    )
+
+
+def _write_manifest(path: Path, manifest: dict) -> None:
+    # Манифест записывается во временный файл и подменяет прежний целиком
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        # Даты отбора записываются строками ГГГГ-ММ-ДД
+        json.dump(manifest, file, ensure_ascii=False, indent=2, default=str)
+    os.replace(temp_path, path)
+
+
+def generate_partner_reports(
+    output_dir,
+    partner_ids: list[int] | None = None,
+    workers: int | None = None,
+    history_filter=None,
+    progress=None,
+    monthly_subtotals: bool = False,
+) -> BatchReportResult:
+    """
+    Формирует отчёты по истории продаж партнёров в каталог output_dir
+    partner_ids - id партнёров (None — все партнёры)
+    workers - число процессов пула (None — по числу ядер процессора)
+    history_filter - отбор строк истории (SalesHistoryFilter) для всех отчётов
+    progress(done, total) вызывается после каждого готового отчёта
+    monthly_subtotals - итоги по месяцам в таблицах отчётов
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    partners = _partners_for_batch(partner_ids)
+    info = {partner_id: (name, inn) for partner_id, name, inn in partners}
+
+    results: list[ReportJobResult] = []
+    if partners:
+        with ProcessPoolExecutor(max_workers=min(workers, len(partners)), initializer=_init_worker) as executor:
+            futures = [
+                executor.submit(
+                    _render_partner_report,
+                    partner_id, str(output_dir / report_filename(partner_id, name)), history_filter, monthly_subtotals,
+                )
+                for partner_id, name, _ in partners
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if progress is not None:
+                    progress(len(results), len(partners))
+    seconds = time.perf_counter() - started
+
+    results.sort(key=lambda result: result.partner_id)
+    succeeded = sum(1 for result in results if result.status == STATUS_OK)
+    manifest_path = output_dir / MANIFEST_NAME
+    _write_manifest(manifest_path, {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "seconds": round(seconds, 3),
+        "reports_per_second": round(len(results) / seconds, 2) if seconds > 0 else 0.0,
+        "filter": history_filter._asdict() if history_filter is not None else None,
+        "monthly_subtotals": monthly_subtotals,
+        "reports": [
+            {
+                "partner_id": result.partner_id,
+                "name": info[result.partner_id][0],
+                "inn": info[result.partner_id][1],
+                "file": result.file if result.status == STATUS_OK else None,
+                "status": result.status,
+                "error": result.error,
+                "seconds": round(result.seconds, 3),
+                "bytes": result.size,
+            }
+            for result in results
+        ],
+    })
+    return BatchReportResult(len(results), succeeded, len(results) - succeeded, seconds, manifest_path)
@@ -1,71 +1,330 @@
 # Сервисные функции для главного окна приложения
 
-from sqlalchemy.orm import Session
-from PyQt6.QtWidgets import QMessageBox
-from db.models import Partner
-from ui.partner_card import PartnerCard
-
-def init_session(window, session_factory):
-    # Инициализирует сессию БД для главного окна
-    try:
-        window.session = session_factory()
-    except Exception as e:
-        window.session = None
-        QMessageBox.critical(window, "Ошибка подключения", f"Не удалось установить подключение к базе данных:\n{e}", QMessageBox.StandardButton.Ok,)
-
-def close_session(window):
-    # Закрывает сессию привязанную к окну
-    if isinstance(getattr(window, "session", None), Session):
-        try:
-            window.session.close()
-        except Exception as e:
-            print("Ошибка при закрытии сессии БД:", e)
-    window.session = None
+from bisect import insort
 
+from PyQt6.QtCore import QPoint
+from PyQt6.QtWidgets import QMessageBox, QAbstractItemView
+from services.partner_service import get_partner_list_item, partner_sort_key
+from services.partner_snapshot import snapshot_path, load_snapshot
+from services.unit_of_work import read_session
+from ui.partner_list_loader import PartnerListLoader, PartnerIndexLoader
+from ui.partner_list_model import PartnerRole
 
 def clear_cards(window):
     """
-    Удаляет все карточки партнёров из контейнера главного окна кроме последнего контейнера-элемента
+    Очищает список партнёров главного окна
     используется перед повторной загрузкой списка партнёров
     """
-    layout = window.cards_layout
-    if layout is None:
+    model = getattr(window, "partner_model", None)
+    if model is not None:
+        model.clear()
+
+
+def set_loading_state(window, loading: bool, text: str = "Загрузка списка партнёров…") -> None:
+    # Показывает или скрывает надпись о загрузке над списком карточек
+    label = getattr(window, "loading_label", None)
+    if label is None:
         return
+    label.setText(text)
+    label.setVisible(loading)
 
-    while layout.count() > 1:
-        item = layout.takeAt(0)
-        w = item.widget()
-        if w is not None:
-            w.setParent(None)
-            w.deleteLater()
+
+def cancel_loading(window, wait: bool = False) -> None:
+    """
+    Отменяет фоновую загрузку списка партнёров, если она идёт
+    Страницы от отменённой загрузки в модель больше не попадают
+    wait=True дожидается остановки потока (используется при закрытии окна)
+    """
+    loader = getattr(window, "partner_loader", None)
+    window.partner_loader = None
+    if loader is None:
+        return
+
+    try:
+        model = getattr(window, "partner_model", None)
+        if model is not None:
+            model.more_requested.disconnect(loader.request_more)
+            model.set_has_more(False)
+        loader.chunk_loaded.disconnect()
+        loader.load_done.disconnect()
+        loader.load_failed.disconnect()
+        loader.cancel()
+        if wait:
+            loader.wait()
+    except (RuntimeError, TypeError) as e:
+        # Поток уже завершился и удалён
+        print("Загрузка партнёров уже завершена:", e)
+
+
+def _on_chunk_loaded(window, items: list, has_more: bool) -> None:
+    # Очередная страница: добавляем строки и сообщаем модели, есть ли продолжение
+    set_loading_state(window, False)
+    model = window.partner_model
+    model.set_has_more(has_more)
+    model.append_items(items)
+
+
+def _on_loading_done(window) -> None:
+    window.partner_loader = None
+    set_loading_state(window, False)
+
+
+def _on_loading_failed(window, message: str) -> None:
+    window.partner_loader = None
+    set_loading_state(window, False)
+    QMessageBox.critical(window, "Ошибка загрузки данных", f"Не удалось загрузить список партнёров из базы данных:\n{message}", QMessageBox.StandardButton.Ok,)
 
 
 def load_partners(window):
     """
-    Загружает из БД список партнёров, сортируя по рейтингу (по убыванию)
-    и наименованию, и создаёт для каждого карточку PartnerCard.
+    Загружает из БД строки списка партнёров, отсортированные по рейтингу (по убыванию)
+    и наименованию, и передаёт их в модель списка главного окна.
+    Запросы выполняются в фоновом потоке постранично: первая страница видна сразу,
+    следующие подгружаются, когда пользователь докручивает список до конца.
+    Карточки рисуются делегатом только для видимых строк.
     """
-    session = getattr(window, "session", None)
-    layout = window.cards_layout
-    if session is None or layout is None:
+    model = getattr(window, "partner_model", None)
+    if getattr(window, "session_factory", None) is None or model is None:
         return
-    
-    # Очищаем текущие карточки.
+
+    # Предыдущая загрузка (если ещё идёт) больше не нужна
+    cancel_loading(window)
     clear_cards(window)
+    window.snapshot_shown = False
+
+    loader = PartnerListLoader(window.session_factory, parent=window)
+    loader.chunk_loaded.connect(lambda items, has_more: _on_chunk_loaded(window, items, has_more))
+    model.more_requested.connect(loader.request_more)
+    loader.load_done.connect(lambda: _on_loading_done(window))
+    loader.load_failed.connect(lambda message: _on_loading_failed(window, message))
+    loader.finished.connect(loader.deleteLater)
+
+    window.partner_loader = loader
+    set_loading_state(window, True)
+    loader.start()
+
+
+def _database_key(window) -> str:
+    # Адрес БД без пароля: по нему снимок списка привязывается к своей базе данных
+    bind = getattr(window.session_factory, "kw", {}).get("bind")
+    if bind is None:
+        return ""
+    return bind.url.render_as_string(hide_password=True)
+
+
+def _snapshot_path(window):
+    # Путь к локальному снимку списка партнёров или None, если база данных неизвестна
+    key = _database_key(window)
+    return snapshot_path(key) if key else None
+
+
+def show_snapshot(window) -> bool:
+    """
+    Показывает сохранённый при прошлом запуске список партнёров, не обращаясь к БД
+    Список сверяется с БД, когда фоновый поток построит индекс поиска по актуальным данным
+    Возвращает False, если подходящего снимка нет и список нужно загружать из БД
+    """
+    window.snapshot_shown = False
+    model = getattr(window, "partner_model", None)
+    path = _snapshot_path(window)
+    if model is None or path is None:
+        return False
+
+    items = load_snapshot(path, _database_key(window))
+    if not items:
+        return False
+
+    model.set_items(items)
+    window.snapshot_shown = True
+    set_loading_state(window, True, "Показан сохранённый список, идёт сверка с базой данных…")
+    return True
+
+
+def _replace_snapshot_items(window, rows, updates) -> None:
+    """
+    Заменяет показанный снимок актуальным списком из БД
+    rows - строки списка в порядке чтения из БД
+    updates - изменения партнёров (id, строка или None), сделанные во время чтения:
+    они накладываются на rows, потому что могли быть прочитаны ещё до изменения
+    Если список не изменился, модель не трогается; иначе прокрутка
+    возвращается к карточке, которая была верхней
+    """
+    items = list(rows)
+    for partner_id, item in updates:
+        items = [row for row in items if row.id != partner_id]
+        if item is not None:
+            insort(items, item, key=partner_sort_key)
+
+    model = window.partner_model
+    if model.rowCount() == len(items) and all(
+        model.item_at(row) == item for row, item in enumerate(items)
+    ):
+        return
+
+    view = window.partner_view
+    top = view.indexAt(QPoint(0, 0)).data(PartnerRole) if view.model() is model else None
+    model.set_items(items)
+    if top is not None:
+        row = model.row_of(top.id)
+        if row is not None:
+            view.scrollTo(model.index(row), QAbstractItemView.ScrollHint.PositionAtTop)
+
+
+def refresh_partner(window, partner_id: int) -> None:
+    """
+    Обновляет в списке главного окна одну карточку после добавления или редактирования партнёра
+    Строка перечитывается из БД и ставится на своё место по рейтингу и наименованию
+    Если это место ещё не загружено, строка придёт позже со своей страницей
+    """
+    model = getattr(window, "partner_model", None)
+    if model is None or getattr(window, "session_factory", None) is None:
+        return
+
     try:
-        partners = (
-            session.query(Partner)
-            .order_by(Partner.rating.desc(), Partner.name)
-            .all()
-        )
+        with read_session(window.session_factory) as session:
+            item = get_partner_list_item(session, partner_id)
     except Exception as e:
-        QMessageBox.critical(window, "Ошибка загрузки данных", f"Не удалось загрузить список партнёров из базы данных:\n{e}", QMessageBox.StandardButton.Ok,)
+        print(f"Ошибка при обновлении карточки партнёра id={partner_id}:", e)
+        load_partners(window)
+        return
+
+    if item is None:
+        model.remove_item(partner_id)
+    else:
+        model.upsert_item(item)
+    _update_search_index(window, partner_id, item)
+
+
+def remove_partner_card(window, partner_id: int) -> None:
+    # Убирает из списка главного окна карточку удалённого партнёра
+    model = getattr(window, "partner_model", None)
+    if model is not None:
+        model.remove_item(partner_id)
+    _update_search_index(window, partner_id, None)
+
+
+def build_search_index(window) -> None:
+    """
+    Запускает в фоне построение поискового индекса по полному списку партнёров
+    Пока индекс не готов, поле поиска недоступно
+    """
+    if getattr(window, "session_factory", None) is None:
+        return
+
+    cancel_search_index(window)
+    _set_search_enabled(window, False)
+    # Изменения партнёров за время построения: индекс читает список до них или во время них,
+    # поэтому они повторяются на готовом индексе
+    window.pending_index_updates = []
+
+    path = _snapshot_path(window)
+    loader = PartnerIndexLoader(window.session_factory, path, _database_key(window), window)
+    loader.index_ready.connect(lambda index, rows: _on_search_index_ready(window, index, rows))
+    loader.load_failed.connect(lambda message: _on_search_index_failed(window, message))
+    loader.finished.connect(loader.deleteLater)
+
+    window.index_loader = loader
+    loader.start()
+
+
+def cancel_search_index(window, wait: bool = False) -> None:
+    # Отменяет построение поискового индекса, если оно идёт
+    loader = getattr(window, "index_loader", None)
+    window.index_loader = None
+    if loader is None:
+        return
+
+    try:
+        loader.index_ready.disconnect()
+        loader.load_failed.disconnect()
+        loader.cancel()
+        if wait:
+            loader.wait()
+    except (RuntimeError, TypeError) as e:
+        print("Построение индекса поиска уже завершено:", e)
+
+
+def _set_search_enabled(window, enabled: bool) -> None:
+    edit = getattr(window, "search_edit", None)
+    if edit is None:
+        return
+    edit.setEnabled(enabled)
+    edit.setPlaceholderText(
+        "Поиск партнёра: наименование, ИНН, директор, телефон" if enabled else "Подготовка поиска…"
+    )
+
+
+def _on_search_index_ready(window, index, rows) -> None:
+    window.index_loader = None
+    updates = getattr(window, "pending_index_updates", [])
+    for partner_id, item in updates:
+        _apply_index_update(index, partner_id, item)
+    window.pending_index_updates = []
+    window.search_index = index
+    if getattr(window, "snapshot_shown", False):
+        # Полный список прочитан из БД: сверяем с ним показанный снимок
+        window.snapshot_shown = False
+        _replace_snapshot_items(window, rows, updates)
+        set_loading_state(window, False)
+    _set_search_enabled(window, True)
+    apply_search(window, window.search_edit.text())
+
+
+def _on_search_index_failed(window, message: str) -> None:
+    window.index_loader = None
+    print("Не удалось построить индекс поиска партнёров:", message)
+    if getattr(window, "snapshot_shown", False):
+        set_loading_state(window, True, "Нет связи с базой данных, показан сохранённый список")
+
+
+def _apply_index_update(index, partner_id: int, item) -> None:
+    # Изменение одного партнёра в индексе: item=None — партнёр удалён
+    if item is None:
+        index.remove(partner_id)
+    else:
+        index.add_item(item)
+
+
+def _update_search_index(window, partner_id: int, item) -> None:
+    # Переносит изменение одного партнёра в поисковый индекс и обновляет результаты поиска
+    if getattr(window, "index_loader", None) is not None:
+        # Индекс ещё строится: изменение повторится на нём, когда он будет готов
+        window.pending_index_updates.append((partner_id, item))
+    index = getattr(window, "search_index", None)
+    if index is None:
+        return
+    _apply_index_update(index, partner_id, item)
+
+    edit = getattr(window, "search_edit", None)
+    if edit is not None and edit.text().strip():
+        apply_search(window, edit.text())
+
+
+def apply_search(window, text: str) -> None:
+    """
+    Фильтрует список карточек по строке поиска
+    Пустая строка возвращает полный (постранично загружаемый) список,
+    иначе представление показывает результаты поиска по индексу в памяти
+    """
+    view = getattr(window, "partner_view", None)
+    index = getattr(window, "search_index", None)
+    if view is None:
         return
 
-    # Для каждого партнёра создаём карточку и добавляем её в layout
-    for partner in partners:
-        try:
-            card = PartnerCard(partner, on_click=window.open_edit_partner_dialog, parent=window,)
-            layout.insertWidget(layout.count() - 1, card)
-        except Exception as e:
-            print(f"Ошибка при создании карточки для партнёра '{partner.name}':", e)
+    if not text.strip() or index is None:
+        if view.model() is not window.partner_model:
+            view.setModel(window.partner_model)
+            set_loading_state(window, False)
+        return
+
+    items, truncated = index.search(text)
+    window.search_model.set_items(items)
+    if view.model() is not window.search_model:
+        view.setModel(window.search_model)
+
+    if not items:
+        set_loading_state(window, True, "Партнёры не найдены")
+    elif truncated:
+        set_loading_state(window, True, f"Показаны первые {len(items)} найденных партнёров, уточните запрос")
+    else:
+        set_loading_state(window, False)
@@ -0,0 +1,239 @@
+"""
+Индекс для мгновенного поиска партнёров в главном окне
+Ищет подстроку в наименовании, ИНН, ФИО директора и телефоне без обращения к БД
+Устройство:
+    строки PartnerListItem хранятся в порядке отображения (рейтинг по убыванию, наименование)
+    и разбиты на блоки по несколько тысяч строк; нормализованные тексты строк блока склеены
+    в одну строку, поиск подстроки в ней выполняется str.find (на C), а позиция совпадения
+    переводится в номер строки по смещениям
+    результаты сразу получаются отсортированными, и просмотр останавливается на лимите
+    правка строки помечает только её блок, и перед поиском заново склеивается только он
+Индекс строится один раз по списку партнёров и обновляется по одной строке после правок
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+
+from services.partner_utils import format_phone
+from services.partner_service import partner_sort_key
+
+# Разделители полей и строк в общем тексте: в нормализованный запрос они попасть не могут
+_FIELD_SEPARATOR = "\x00"
+_ROW_SEPARATOR = "\n"
+_SPACES_RE = re.compile(r"\s+")
+_NON_DIGITS_RE = re.compile(r"\D+")
+_PHONE_QUERY_RE = re.compile(r"[\d\s()+\-]+")
+
+# Строк в блоке: блок вдвое больше делится пополам, пустой блок удаляется
+_BLOCK_ROWS = 2048
+
+# Сколько результатов возвращается по умолчанию (остальные — уточнением запроса)
+DEFAULT_SEARCH_LIMIT = 1000
+
+
+def normalize_search_text(text: str | None) -> str:
+    # Приводит текст к виду для поиска: нижний регистр, ё -> е, одиночные пробелы
+    if not text:
+        return ""
+    return _SPACES_RE.sub(" ", text.lower().replace("ё", "е")).strip()
+
+
+def _documents(item) -> tuple[str, str]:
+    # Тексты строки для поиска: общий (наименование, ИНН, директор)
+    # и телефонный (цифры телефона как введены и в формате +7 без знаков)
+    document = _FIELD_SEPARATOR.join((
+        normalize_search_text(item.name),
+        item.inn or "",
+        normalize_search_text(item.director_full_name),
+    ))
+    phone_digits = _NON_DIGITS_RE.sub("", item.phone or "")
+    if not phone_digits:
+        return document, ""
+    formatted = _NON_DIGITS_RE.sub("", format_phone(phone_digits))
+    if formatted == phone_digits:
+        return document, phone_digits
+    return document, _FIELD_SEPARATOR.join((phone_digits, formatted))
+
+
+class _TextBlock:
+    # Блок подряд идущих строк индекса со склеенными текстами
+
+    __slots__ = ("documents", "phone_documents", "text", "offsets", "phone_text", "phone_offsets")
+
+    def __init__(self, documents=None, phone_documents=None):
+        self.documents: list[str] = documents or []
+        self.phone_documents: list[str] = phone_documents or []
+        # Склеенные тексты; None — блок менялся и будет склеен перед поиском
+        self.text = None
+        self.offsets: list[int] = []
+        self.phone_text = ""
+        self.phone_offsets: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def build(self) -> None:
+        # Склеивает тексты строк блока; смещение строки i — offsets[i]
+        if self.text is not None:
+            return
+        self.text, self.offsets = _join(self.documents)
+        self.phone_text, self.phone_offsets = _join(self.phone_documents)
+
+    def split(self) -> "_TextBlock":
+        # Отделяет вторую половину строк в новый блок
+        half = len(self.documents) // 2
+        tail = _TextBlock(self.documents[half:], self.phone_documents[half:])
+        del self.documents[half:]
+        del self.phone_documents[half:]
+        self.text = None
+        return tail
+
+
+def _join(documents: list[str]) -> tuple[str, list[int]]:
+    # Склеивает тексты строк и считает смещения их начал (последнее — конец текста)
+    offsets = [0]
+    offsets.extend(accumulate(len(doc) + 1 for doc in documents))
+    return _ROW_SEPARATOR.join(documents), offsets
+
+
+def _merge_rows(first, second):
+    # Сливает два возрастающих потока номеров строк в один без повторов
+    a = next(first, None)
+    b = next(second, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a < b):
+            yield a
+            a = next(first, None)
+        elif a is None or b < a:
+            yield b
+            b = next(second, None)
+        else:
+            yield a
+            a = next(first, None)
+            b = next(second, None)
+
+
+class PartnerSearchIndex:
+    # Индекс подстрочного поиска по строкам списка партнёров
+
+    def __init__(self, items=(), sort_key=partner_sort_key):
+        self.sort_key = sort_key
+        # Строки в порядке sort_key
+        self._items: list = []
+        self._keys: list = []
+        # id партнёра -> строка (для поиска места при обновлении)
+        self._by_id: dict = {}
+        # Блоки текстов и номер первой строки каждого блока
+        self._blocks: list[_TextBlock] = []
+        self._starts: list[int] = []
+        for item in items:
+            self.add_item(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add_item(self, item) -> None:
+        # Добавляет строку партнёра (если партнёр уже есть, заменяет его строку)
+        self.remove(item.id)
+        key = self.sort_key(item)
+        # Строки полного списка приходят уже по порядку: обычно это добавление в конец
+        if not self._keys or self._keys[-1] <= key:
+            pos = len(self._items)
+        else:
+            pos = bisect_left(self._keys, key)
+        self._items.insert(pos, item)
+        self._keys.insert(pos, key)
+        self._by_id[item.id] = item
+
+        if not self._blocks:
+            self._blocks.append(_TextBlock())
+            self._starts.append(0)
+        number = max(bisect_right(self._starts, pos) - 1, 0)
+        if pos == len(self._items) - 1:
+            # добавление в конец попадает в последний блок
+            number = len(self._blocks) - 1
+        block = self._blocks[number]
+        row = pos - self._starts[number]
+        document, phone_document = _documents(item)
+        block.documents.insert(row, document)
+        block.phone_documents.insert(row, phone_document)
+        block.text = None
+        self._shift_starts(number + 1, 1)
+        if len(block) >= 2 * _BLOCK_ROWS:
+            self._blocks.insert(number + 1, block.split())
+            self._starts.insert(number + 1, self._starts[number] + len(block))
+
+    def remove(self, partner_id: int) -> None:
+        # Убирает партнёра из индекса
+        item = self._by_id.pop(partner_id, None)
+        if item is None:
+            return
+        pos = bisect_left(self._keys, self.sort_key(item))
+        if pos >= len(self._items) or self._items[pos].id != partner_id:
+            # ключ строки не совпал с сохранённым порядком: ищем строку по id
+            pos = next(row for row, row_item in enumerate(self._items) if row_item.id == partner_id)
+        del self._items[pos]
+        del self._keys[pos]
+
+        number = bisect_right(self._starts, pos) - 1
+        block = self._blocks[number]
+        row = pos - self._starts[number]
+        del block.documents[row]
+        del block.phone_documents[row]
+        block.text = None
+        self._shift_starts(number + 1, -1)
+        if not block:
+            del self._blocks[number]
+            del self._starts[number]
+
+    def _shift_starts(self, first: int, delta: int) -> None:
+        # Сдвигает начала блоков, идущих после изменённого
+        starts = self._starts
+        for number in range(first, len(starts)):
+            starts[number] += delta
+
+    def items(self) -> list:
+        # Все строки индекса в порядке сортировки
+        return list(self._items)
+
+    def prepare(self) -> None:
+        # Заранее склеивает тексты блоков, чтобы первый поиск не тратил на это время
+        for block in self._blocks:
+            block.build()
+
+    def _matching_rows(self, needle: str, phone: bool = False):
+        # Номера строк (по возрастанию), в общем или телефонном тексте которых есть needle
+        for block, start in zip(self._blocks, self._starts):
+            block.build()
+            if phone:
+                text, offsets = block.phone_text, block.phone_offsets
+            else:
+                text, offsets = block.text, block.offsets
+            pos = text.find(needle)
+            while pos != -1:
+                row = bisect_right(offsets, pos) - 1
+                yield start + row
+                # Следующее совпадение ищем уже в следующей строке
+                pos = text.find(needle, offsets[row + 1])
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> tuple[list, bool]:
+        """
+        Возвращает строки партнёров, в тексте которых есть подстрока запроса,
+        в порядке сортировки и признак того, что результатов больше limit
+        Запрос из цифр и знаков телефона ищется и как номер телефона (только цифрами)
+        """
+        needle = normalize_search_text(query)
+        if not needle:
+            return self._items[:limit], len(self._items) > limit
+
+        rows = self._matching_rows(needle)
+        digits = _NON_DIGITS_RE.sub("", needle)
+        if digits and _PHONE_QUERY_RE.fullmatch(needle):
+            # Оба просмотра идут по порядку строк и сливаются за один проход
+            rows = _merge_rows(rows, self._matching_rows(digits, phone=True))
+
+        # Берём на один результат больше, чтобы узнать, есть ли ещё
+        rows = list(islice(rows, limit + 1))
+        truncated = len(rows) > limit
+        return [self._items[row] for row in rows[:limit]], truncated
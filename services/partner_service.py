@@ -1,15 +1,54 @@
 """
 Сервисные функции для работы с партнёрами
 Содержит:
-    загрузку типов партнёров и списка партнёров
+    загрузку типов партнёров
+    выборку строк списка партнёров постранично (keyset-пагинация), страница — один запрос
     валидацию данных, введённых пользователем в диалоге
     создание и обновление партнёров и их контактов
     удаление партнёров
+Функции изменения данных не фиксируют транзакцию сами: её фиксирует или откатывает
+вызывающий код через unit_of_work (services/unit_of_work.py)
 """
-import re
-from sqlalchemy.orm import Session
+from typing import NamedTuple
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
-from db.models import Partner, PartnerType, PartnerContact
+from db.models import Partner, PartnerType, PartnerContact, PartnerSalesSummary
+from services.partner_validation import rows_to_columns, validate_partner_columns
+
+
+class PartnerListItem(NamedTuple):
+    # Данные одной карточки партнёра в списке главного окна
+    id: int
+    type_name: str | None
+    name: str
+    director_full_name: str
+    inn: str
+    phone: str | None
+    total_quantity: int
+    rating: int
+
+
+def partner_sort_key(item: PartnerListItem) -> tuple:
+    # Порядок карточек: рейтинг по убыванию, затем наименование и id (как в get_partner_page)
+    # Наименования сравниваются по кодам символов: get_partner_page сортирует их с COLLATE "C"
+    return (-item.rating, item.name, item.id)
+
+
+# Поддерживаемые порядки постраничного списка партнёров
+ORDER_BY_RATING = "rating"  # рейтинг по убыванию, наименование, id
+ORDER_BY_NAME = "name"      # наименование, id
+
+
+# Наименование в ключе сортировки списка: побайтовое правило сортировки "C" совпадает
+# с порядком сравнения строк в Python (partner_sort_key), индексы списка построены с ним (миграция 0004)
+_LIST_NAME = Partner.name.collate("C")
+
+
+class PartnerPage(NamedTuple):
+    # Страница списка партнёров и курсор для запроса следующей (None — страниц больше нет)
+    items: list[PartnerListItem]
+    next_cursor: tuple | None
 
 def get_partner_types(session: Session) -> list[PartnerType]:
     # Получить список типов партнёров из базы данных
@@ -19,13 +58,105 @@ def get_partner_types(session: Session) -> list[PartnerType]:
         print("Ошибка при загрузке типов партнёров:", e)
         return []
 
-def get_all_partners(session: Session) -> list[Partner]:
-    # Получить всех партнёров
-    try:
-        return session.query(Partner).order_by(Partner.name).all()
-    except Exception as e:
-        print("Ошибка при загрузке списка партнёров:", e)
-        return []
+def _partner_list_query(session: Session):
+    """
+    Запрос строк списка партнёров: тип и объём продаж подтягиваются соединениями,
+    телефон первого контакта — связанным подзапросом, а не ленивыми загрузками по каждому партнёру
+    """
+    # Телефон первого контакта партнёра (с наименьшим id), как partner.contacts[0]:
+    # подзапрос по индексу (partner_id, id) читает одну строку контактов на партнёра
+    first_contact_phone = (
+        session.query(PartnerContact.phone)
+        .filter(PartnerContact.partner_id == Partner.id)
+        .order_by(PartnerContact.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    return (
+        session.query(
+            Partner.id,
+            PartnerType.name,
+            Partner.name,
+            Partner.director_full_name,
+            Partner.inn,
+            first_contact_phone,
+            func.coalesce(PartnerSalesSummary.total_quantity, 0),
+            Partner.rating,
+        )
+        .outerjoin(PartnerType, PartnerType.id == Partner.partner_type_id)
+        .outerjoin(PartnerSalesSummary, PartnerSalesSummary.partner_id == Partner.id)
+    )
+
+def _page_cursor(item: PartnerListItem, order: str) -> tuple:
+    # Курсор страницы: значения ключа сортировки последней строки
+    if order == ORDER_BY_RATING:
+        return (item.rating, item.name, item.id)
+    return (item.name, item.id)
+
+def get_partner_page(session: Session, order: str = ORDER_BY_RATING, after: tuple | None = None, limit: int = 100) -> PartnerPage:
+    """
+    Получить одну страницу списка партнёров без OFFSET (keyset-пагинация)
+    Параметры:
+        order - ORDER_BY_RATING (рейтинг по убыванию, наименование) или ORDER_BY_NAME (наименование)
+        after - курсор next_cursor предыдущей страницы или None для первой страницы
+        limit - размер страницы
+    Стоимость запроса не зависит от номера страницы: условие по курсору
+    отсекает уже выданные строки, id делает порядок однозначным
+    Условие по курсору — сравнение строк по столбцам индекса списка (миграция 0004),
+    поэтому страница читается диапазоном индекса с места курсора, а не с начала
+    Наименования сравниваются по кодам символов (COLLATE "C"), как в partner_sort_key
+    """
+    query = _partner_list_query(session)
+
+    if order == ORDER_BY_RATING:
+        if after is not None:
+            rating, name, partner_id = after
+            query = query.filter(tuple_(-Partner.rating, _LIST_NAME, Partner.id) > tuple_(-rating, name, partner_id))
+        # рейтинг по убыванию задан ключом -rating: все столбцы ключа по возрастанию, как в индексе
+        query = query.order_by(-Partner.rating, _LIST_NAME, Partner.id)
+    elif order == ORDER_BY_NAME:
+        if after is not None:
+            name, partner_id = after
+            query = query.filter(tuple_(_LIST_NAME, Partner.id) > tuple_(name, partner_id))
+        query = query.order_by(_LIST_NAME, Partner.id)
+    else:
+        raise ValueError(f"Неизвестный порядок списка партнёров: {order}")
+
+    # Берём на одну строку больше, чтобы узнать, есть ли следующая страница
+    rows = query.limit(limit + 1).all()
+    items = [PartnerListItem(*row) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = _page_cursor(items[-1], order)
+    return PartnerPage(items, next_cursor)
+
+def get_partner_list_item(session: Session, partner_id: int) -> PartnerListItem | None:
+    # Получить строку списка для одного партнёра (после добавления или редактирования)
+    row = _partner_list_query(session).filter(Partner.id == partner_id).first()
+    return PartnerListItem(*row) if row is not None else None
+
+def get_partner_for_edit(session: Session, partner_id: int) -> Partner | None:
+    # Партнёр с контактами для формы редактирования (контакты загружаются сразу, а не лениво)
+    return session.get(Partner, partner_id, options=[selectinload(Partner.contacts)])
+
+def iter_partner_list(session: Session, order: str = ORDER_BY_RATING, first_chunk: int = 50, chunk_size: int = 500):
+    """
+    Читает весь список партнёров страницами get_partner_page
+    и отдаёт его порциями PartnerListItem
+    Каждая порция — отдельный короткий запрос, курсор на сервере не держится
+    """
+    cursor = None
+    limit = first_chunk
+    while True:
+        page = get_partner_page(session, order, cursor, limit)
+        if page.items:
+            yield page.items
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
+        limit = chunk_size
 
 def validate_partner_data(data: dict) -> None:
     """
@@ -38,50 +169,19 @@ def validate_partner_data(data: dict) -> None:
         формат электронной почты *@*.*
         телефон (строка вида "+7 XXXXXXXXXX", т.е. ровно 10 цифр после +7)
         рейтинг (в диапазоне от 0 до 10)
+    Правила общие с пакетной проверкой (services/partner_validation.py)
     """
-    errors: list[str] = []
-
-    name = (data.get("name") or "").strip()
-    director = (data.get("director_full_name") or "").strip()
-    legal_address = (data.get("legal_address") or "").strip()
-    inn = (data.get("inn") or "").strip()
-    email = (data.get("email") or "").strip()
-    phone_raw = (data.get("phone") or "").strip()
-    rating = data.get("rating")
-
-    if not name:
-        errors.append("Наименование партнёра не заполнено.")
-    if not director:
-        errors.append("ФИО директора не заполнено.")
-    if not legal_address:
-        errors.append("Юридический адрес не заполнен.")
-
-    if not inn:
-        errors.append("ИНН не заполнен.")
-    else:
-        digits_inn = "".join(ch for ch in inn if ch.isdigit())
-        if len(digits_inn) not in (10, 12):
-            errors.append("ИНН должен содержать 10 или 12 цифр.")
-
-    if email:
-        email_pattern = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
-        if not re.match(email_pattern, email):
-            errors.append("Электронная почта указана некорректно (формат: имя@домен.зона).")
-
-    if not phone_raw:
-        errors.append("Телефон не заполнен.")
-    else:
-        if not phone_raw.startswith("+7"):
-            errors.append("Телефон должен начинаться с +7.")
-        digits_phone = "".join(ch for ch in phone_raw if ch.isdigit())
-        if len(digits_phone) != 11 or not digits_phone.startswith("7"):
-            errors.append("Телефон должен содержать ровно 10 цифр после +7.")
+    result = validate_partner_columns(rows_to_columns([data]))
+    if not result.is_valid(0):
+        raise ValueError("\n".join(result.messages(0)))
 
-    if rating is None or not (0 <= rating <= 10):
-        errors.append("Рейтинг должен быть в диапазоне от 0 до 10.")
 
-    if errors:
-        raise ValueError("\n".join(errors))
+def contact_phone_digits(phone_raw: str) -> str:
+    # Телефон для хранения в partner_contacts: 10 цифр после +7 (пустая строка, если номера нет)
+    digits_phone_full = "".join(ch for ch in phone_raw if ch.isdigit())
+    if len(digits_phone_full) >= 11 and digits_phone_full.startswith("7"):
+        return digits_phone_full[-10:]
+    return ""
 
 
 def create_or_update_partner(session: Session, partner: Partner | None, data: dict) -> Partner:
@@ -89,6 +189,7 @@ def create_or_update_partner(session: Session, partner: Partner | None, data: di
     Создать нового партнёра или обновить существующего
     Если он пустой создаём нового партнёра
     Если он не пустой обновляем его данные
+    Изменения отправляются в БД (flush), фиксирует их unit_of_work вызывающего кода
     """
     validate_partner_data(data)
 
@@ -100,12 +201,7 @@ def create_or_update_partner(session: Session, partner: Partner | None, data: di
     rating = int(data.get("rating") or 0)
 
     email = (data.get("email") or "").strip()
-    phone_raw = (data.get("phone") or "").strip()
-
-    digits_phone_full = "".join(ch for ch in phone_raw if ch.isdigit())
-    digits_phone = ""
-    if len(digits_phone_full) >= 11 and digits_phone_full.startswith("7"):
-        digits_phone = digits_phone_full[-10:]
+    digits_phone = contact_phone_digits((data.get("phone") or "").strip())
 
     try:
         # Создаём или обновляем самого партнёра
@@ -143,7 +239,7 @@ def create_or_update_partner(session: Session, partner: Partner | None, data: di
             contact.email = email
             contact.phone = digits_phone
 
-        session.commit()
+        session.flush()
 
     except IntegrityError as e:
         session.rollback()
@@ -156,7 +252,6 @@ def create_or_update_partner(session: Session, partner: Partner | None, data: di
         print("Неожиданная ошибка при сохранении партнёра:", e)
         raise
 
-    session.refresh(partner)
     return partner
 
 
@@ -167,7 +262,7 @@ def delete_partner(session: Session, partner: Partner) -> None:
     """
     try:
         session.delete(partner)
-        session.commit()
+        session.flush()
     except IntegrityError as e:
         session.rollback()
         raise ValueError(
@@ -0,0 +1,118 @@
+"""
+Локальный снимок списка партнёров для быстрого запуска
+Последний полученный из БД список партнёров сохраняется в файл SQLite в каталоге кэша пользователя.
+При запуске главное окно сразу показывает снимок, не дожидаясь ответа PostgreSQL,
+а затем сверяет его с БД в фоне и сохраняет новый снимок
+Устройство файла:
+    таблица snapshot_meta: версия формата, ключ базы данных и время сохранения
+    таблица partner_rows: строки PartnerListItem в порядке отображения
+Снимок несовместимой версии или от другой базы данных не используется
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from services.partner_service import PartnerListItem
+
+# Версия формата файла: увеличивается при изменении полей PartnerListItem или таблиц
+SNAPSHOT_VERSION = 1
+
+# Переменная окружения, которой можно задать свой каталог кэша
+CACHE_DIR_ENV = "PARTNER_MODULE_CACHE_DIR"
+
+_APP_DIR_NAME = "partner_module"
+_COLUMNS = PartnerListItem._fields
+
+
+def default_cache_dir() -> Path:
+    # Каталог кэша пользователя: %LOCALAPPDATA% в Windows, XDG_CACHE_HOME или ~/.cache в остальных ОС
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / _APP_DIR_NAME / "cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / _APP_DIR_NAME
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / _APP_DIR_NAME
+
+
+def snapshot_path(database_key: str, cache_dir: Path | None = None) -> Path:
+    # Путь к снимку для базы данных (у каждой базы свой файл)
+    digest = hashlib.sha1(database_key.encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir or default_cache_dir()) / f"partners-{digest}.sqlite3"
+
+
+def load_snapshot(path: Path, database_key: str) -> list[PartnerListItem] | None:
+    """
+    Читает строки списка партнёров из снимка
+    Возвращает None, если снимка нет, он повреждён, другой версии или от другой базы данных
+    """
+    path = Path(path)
+    if not path.is_file():
+        return None
+
+    connection = None
+    try:
+        connection = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+        meta = dict(connection.execute("SELECT key, value FROM snapshot_meta"))
+        if meta.get("version") != str(SNAPSHOT_VERSION) or meta.get("database") != database_key:
+            return None
+        rows = connection.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM partner_rows ORDER BY position"
+        )
+        return [PartnerListItem._make(row) for row in rows]
+    except sqlite3.Error as e:
+        print("Не удалось прочитать снимок списка партнёров:", e)
+        return None
+    finally:
+        if connection is not None:
+            connection.close()
+
+
+def save_snapshot(path: Path, database_key: str, items) -> None:
+    """
+    Сохраняет строки списка партнёров (в порядке отображения) в снимок
+    Файл сначала пишется рядом под временным именем и затем атомарно заменяет старый,
+    поэтому прерванная запись не портит предыдущий снимок
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        # Файл временный: журнал и синхронизация на каждую запись ему не нужны
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("DROP TABLE IF EXISTS snapshot_meta")
+        connection.execute("DROP TABLE IF EXISTS partner_rows")
+        connection.execute("CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        connection.execute(
+            "CREATE TABLE partner_rows ("
+            "position INTEGER PRIMARY KEY, id INTEGER NOT NULL, type_name TEXT, name TEXT NOT NULL, "
+            "director_full_name TEXT, inn TEXT, phone TEXT, total_quantity INTEGER, rating INTEGER)"
+        )
+        connection.executemany(
+            "INSERT INTO snapshot_meta (key, value) VALUES (?, ?)",
+            (
+                ("version", str(SNAPSHOT_VERSION)),
+                ("database", database_key),
+                ("saved_at", str(int(time.time()))),
+            ),
+        )
+        connection.executemany(
+            f"INSERT INTO partner_rows (position, {', '.join(_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' * len(_COLUMNS))})",
+            ((position, *item) for position, item in enumerate(items)),
+        )
+        connection.commit()
+    except Exception:
+        connection.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    connection.close()
+    os.replace(tmp_path, path)
@@ -0,0 +1,244 @@
+"""
+Сервис пакетной загрузки партнёров (синхронизация с CRM), ключ партнёра — ИНН
+Порядок работы:
+    все строки сначала проверяются пакетом по тем же правилам, что и ввод в диалоге
+    (services/partner_validation.py), ИНН записывается только цифрами (как он и проверяется),
+    строки с ошибками и повторы ИНН в пакете в загрузку не попадают
+    проверенные строки записываются порциями: на порцию — один запрос
+    INSERT ... ON CONFLICT (inn) DO UPDATE для партнёров вместе с обновлением
+    или созданием первого контакта (как partner.contacts[0] в диалоге)
+    каждая порция выполняется в точке сохранения (SAVEPOINT): при ошибке БД порция
+    повторяется по одной строке, и ошибкой отмечаются только строки, на которых она возникла
+Для каждой строки возвращается результат: создан, изменён, без изменений или ошибка
+Транзакцию фиксирует вызывающий код (unit_of_work)
+"""
+
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from db.db import DB_SCHEMA
+from services.partner_service import contact_phone_digits
+from services.partner_validation import (
+    FIELD_DIRECTOR, FIELD_EMAIL, FIELD_INN, FIELD_LEGAL_ADDRESS, FIELD_NAME, FIELD_PHONE, FIELD_RATING,
+    rows_to_columns, validate_partner_columns,
+)
+
+# Строк в одной порции (один запрос к БД)
+DEFAULT_CHUNK_SIZE = 1000
+
+# Результат строки
+STATUS_CREATED = "created"
+STATUS_UPDATED = "updated"
+STATUS_UNCHANGED = "unchanged"
+STATUS_ERROR = "error"
+
+
+class PartnerUpsertResult(NamedTuple):
+    # Результат загрузки одной строки (row — номер строки в пакете, с 1)
+    row: int
+    inn: str
+    partner_id: int | None
+    status: str
+    error: str | None = None
+
+
+class _PartnerRow(NamedTuple):
+    # Проверенная строка в том виде, в каком она записывается в БД
+    row: int
+    inn: str
+    partner_type_id: int
+    name: str
+    director_full_name: str
+    legal_address: str
+    rating: int
+    email: str
+    phone: str
+
+
+# Один запрос на порцию. Входные строки передаются массивами по столбцам (unnest),
+# поэтому число параметров не зависит от размера порции
+# Все части запроса видят данные на момент его начала: первые контакты (first_contact)
+# выбираются до вставки и изменения, у только что созданных партнёров их нет
+_UPSERT_SQL = text(f"""
+WITH input AS (
+    SELECT *
+    FROM unnest(
+        CAST(:inn AS text[]), CAST(:partner_type_id AS bigint[]), CAST(:name AS text[]),
+        CAST(:director_full_name AS text[]), CAST(:legal_address AS text[]), CAST(:rating AS integer[]),
+        CAST(:email AS text[]), CAST(:phone AS text[])
+    ) AS i(inn, partner_type_id, name, director_full_name, legal_address, rating, email, phone)
+),
+upserted AS (
+    INSERT INTO {DB_SCHEMA}.partners AS p (partner_type_id, name, director_full_name, legal_address, inn, rating)
+    SELECT partner_type_id, name, director_full_name, legal_address, inn, rating FROM input
+    ON CONFLICT (inn) DO UPDATE SET
+        partner_type_id = EXCLUDED.partner_type_id,
+        name = EXCLUDED.name,
+        director_full_name = EXCLUDED.director_full_name,
+        legal_address = EXCLUDED.legal_address,
+        rating = EXCLUDED.rating
+    WHERE (p.partner_type_id, p.name, p.director_full_name, p.legal_address, p.rating)
+        IS DISTINCT FROM
+        (EXCLUDED.partner_type_id, EXCLUDED.name, EXCLUDED.director_full_name, EXCLUDED.legal_address, EXCLUDED.rating)
+    RETURNING p.id, p.inn, (p.xmax = 0) AS inserted
+),
+partner_ids AS (
+    SELECT inn, id, CASE WHEN inserted THEN '{STATUS_CREATED}' ELSE '{STATUS_UPDATED}' END AS status
+    FROM upserted
+    UNION ALL
+    SELECT p.inn, p.id, '{STATUS_UNCHANGED}'
+    FROM {DB_SCHEMA}.partners p
+    JOIN input i ON i.inn = p.inn
+    WHERE NOT EXISTS (SELECT 1 FROM upserted u WHERE u.inn = p.inn)
+),
+first_contact AS (
+    SELECT DISTINCT ON (c.partner_id) c.id, c.partner_id, c.email, c.phone
+    FROM {DB_SCHEMA}.partner_contacts c
+    JOIN partner_ids p ON p.id = c.partner_id
+    ORDER BY c.partner_id, c.id
+),
+updated_contacts AS (
+    UPDATE {DB_SCHEMA}.partner_contacts c
+    SET email = i.email, phone = i.phone
+    FROM first_contact f
+    JOIN partner_ids p ON p.id = f.partner_id
+    JOIN input i ON i.inn = p.inn
+    WHERE c.id = f.id AND (f.email, f.phone) IS DISTINCT FROM (i.email, i.phone)
+    RETURNING c.partner_id
+),
+inserted_contacts AS (
+    INSERT INTO {DB_SCHEMA}.partner_contacts (partner_id, email, phone)
+    SELECT p.id, i.email, i.phone
+    FROM partner_ids p
+    JOIN input i ON i.inn = p.inn
+    WHERE (i.email <> '' OR i.phone <> '')
+      AND NOT EXISTS (SELECT 1 FROM first_contact f WHERE f.partner_id = p.id)
+    RETURNING partner_id
+)
+SELECT p.inn, p.id,
+    CASE
+        WHEN p.status = '{STATUS_UNCHANGED}' AND (
+            EXISTS (SELECT 1 FROM updated_contacts c WHERE c.partner_id = p.id)
+            OR EXISTS (SELECT 1 FROM inserted_contacts c WHERE c.partner_id = p.id)
+        ) THEN '{STATUS_UPDATED}'
+        ELSE p.status
+    END
+FROM partner_ids p
+""")
+
+
+def _partner_type_ids(session: Session) -> tuple[dict, set]:
+    # Словарь наименование типа -> id и множество допустимых id типов
+    rows = session.execute(text(f"SELECT name, id FROM {DB_SCHEMA}.partner_types")).all()
+    return {name.strip().lower(): type_id for name, type_id in rows}, {type_id for _, type_id in rows}
+
+
+def _resolve_type(data: dict, type_names: dict, type_ids: set) -> int:
+    # id типа партнёра: поле partner_type_id или наименование типа в поле partner_type
+    value = data.get("partner_type_id")
+    if value not in (None, ""):
+        try:
+            type_id = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Неверный id типа партнёра «{value}».") from None
+        if type_id not in type_ids:
+            raise ValueError(f"Тип партнёра с id {type_id} не найден.")
+        return type_id
+
+    name = str(data.get("partner_type") or "").strip()
+    if not name:
+        raise ValueError("Тип партнёра не указан.")
+    type_id = type_names.get(name.lower())
+    if type_id is None:
+        raise ValueError(f"Тип партнёра «{name}» не найден.")
+    return type_id
+
+
+def _upsert_chunk(session: Session, chunk: list[_PartnerRow]) -> dict:
+    # Записывает порцию одним запросом; возвращает ИНН -> (id партнёра, результат)
+    params = {field: [getattr(item, field) for item in chunk] for field in _PartnerRow._fields[1:]}
+    rows = session.execute(_UPSERT_SQL, params).all()
+    return {inn: (partner_id, status) for inn, partner_id, status in rows}
+
+
+def _upsert_in_savepoint(session: Session, chunk: list[_PartnerRow], results: dict) -> bool:
+    # Записывает порцию в точке сохранения и заносит результаты строк; False — ошибка БД (порция отменена)
+    try:
+        with session.begin_nested():
+            written = _upsert_chunk(session, chunk)
+    except DBAPIError as e:
+        if len(chunk) > 1:
+            return False
+        item = chunk[0]
+        message = str(getattr(e, "orig", e)).strip()
+        results[item.row] = PartnerUpsertResult(item.row, item.inn, None, STATUS_ERROR, message)
+        return True
+    for item in chunk:
+        partner_id, status = written[item.inn]
+        results[item.row] = PartnerUpsertResult(item.row, item.inn, partner_id, status)
+    return True
+
+
+def upsert_partners(session: Session, rows, chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None) -> list[PartnerUpsertResult]:
+    """
+    Создаёт или обновляет партнёров и их первые контакты по ИНН
+    rows — итератор словарей с полями диалога партнёра: name, director_full_name, legal_address,
+    inn, email, phone, rating и partner_type_id или наименование типа в поле partner_type
+    Возвращает результаты в порядке строк пакета
+    progress(rows_done, rows_total) вызывается после каждой записанной порции
+    """
+    rows = list(rows)
+    type_names, type_ids = _partner_type_ids(session)
+
+    # Сначала проверяется весь пакет
+    validation = validate_partner_columns(rows_to_columns(rows))
+    columns = validation.columns
+
+    results: dict[int, PartnerUpsertResult] = {}
+    prepared: list[_PartnerRow] = []
+    first_row_by_inn: dict[str, int] = {}
+
+    for index, data in enumerate(rows):
+        row = index + 1
+        # ИНН проверяется по цифрам, так же он и записывается: «7701-234567» -> «7701234567»
+        inn = "".join(ch for ch in columns[FIELD_INN][index] if ch.isdigit()) or columns[FIELD_INN][index]
+        messages = []
+        try:
+            partner_type_id = _resolve_type(data, type_names, type_ids)
+        except ValueError as e:
+            messages.append(str(e))
+        messages.extend(validation.messages(index))
+        if messages:
+            results[row] = PartnerUpsertResult(row, inn, None, STATUS_ERROR, "\n".join(messages))
+            continue
+
+        first_row = first_row_by_inn.setdefault(inn, row)
+        if first_row != row:
+            results[row] = PartnerUpsertResult(row, inn, None, STATUS_ERROR, f"ИНН уже встречается в строке {first_row}.")
+            continue
+
+        prepared.append(_PartnerRow(
+            row=row,
+            inn=inn,
+            partner_type_id=partner_type_id,
+            name=columns[FIELD_NAME][index],
+            director_full_name=columns[FIELD_DIRECTOR][index],
+            legal_address=columns[FIELD_LEGAL_ADDRESS][index],
+            rating=columns[FIELD_RATING][index],
+            email=columns[FIELD_EMAIL][index],
+            phone=contact_phone_digits(columns[FIELD_PHONE][index]),
+        ))
+
+    for start in range(0, len(prepared), chunk_size):
+        chunk = prepared[start:start + chunk_size]
+        if not _upsert_in_savepoint(session, chunk, results):
+            # Ошибка БД в порции: строки записываются по одной, чтобы ошибка досталась только своей строке
+            for item in chunk:
+                _upsert_in_savepoint(session, [item], results)
+        if progress is not None:
+            progress(min(start + chunk_size, len(prepared)), len(prepared))
+
+    return [results[row] for row in sorted(results)]
@@ -0,0 +1,168 @@
+"""
+Пакетная проверка данных партнёров
+Правила те же, что у проверки в диалоге (validate_partner_data использует этот модуль):
+    наименование, ФИО директора, юридический адрес заполнены
+    ИНН содержит 10 или 12 цифр (прочие символы не учитываются)
+    электронная почта, если указана, имеет вид имя@домен.зона
+    телефон заполнен, начинается с +7 и содержит ровно 10 цифр после +7
+    рейтинг — целое число от 0 до 10
+Данные проверяются по столбцам: каждое правило проходит по всему столбцу
+с заранее скомпилированными регулярными выражениями
+Результат — коды ошибок по строкам и полям; текст для пользователя даёт FieldError.message
+"""
+
+import re
+from typing import NamedTuple
+
+# Поля партнёра, которые проверяются
+FIELD_NAME = "name"
+FIELD_DIRECTOR = "director_full_name"
+FIELD_LEGAL_ADDRESS = "legal_address"
+FIELD_INN = "inn"
+FIELD_EMAIL = "email"
+FIELD_PHONE = "phone"
+FIELD_RATING = "rating"
+
+PARTNER_FIELDS = (FIELD_NAME, FIELD_DIRECTOR, FIELD_LEGAL_ADDRESS, FIELD_INN, FIELD_EMAIL, FIELD_PHONE, FIELD_RATING)
+
+# Коды ошибок
+CODE_REQUIRED = "required"
+CODE_INN_LENGTH = "inn_length"
+CODE_EMAIL_FORMAT = "email_format"
+CODE_PHONE_PREFIX = "phone_prefix"
+CODE_PHONE_LENGTH = "phone_length"
+CODE_RATING_RANGE = "rating_range"
+
+ERROR_MESSAGES = {
+    (FIELD_NAME, CODE_REQUIRED): "Наименование партнёра не заполнено.",
+    (FIELD_DIRECTOR, CODE_REQUIRED): "ФИО директора не заполнено.",
+    (FIELD_LEGAL_ADDRESS, CODE_REQUIRED): "Юридический адрес не заполнен.",
+    (FIELD_INN, CODE_REQUIRED): "ИНН не заполнен.",
+    (FIELD_INN, CODE_INN_LENGTH): "ИНН должен содержать 10 или 12 цифр.",
+    (FIELD_EMAIL, CODE_EMAIL_FORMAT): "Электронная почта указана некорректно (формат: имя@домен.зона).",
+    (FIELD_PHONE, CODE_REQUIRED): "Телефон не заполнен.",
+    (FIELD_PHONE, CODE_PHONE_PREFIX): "Телефон должен начинаться с +7.",
+    (FIELD_PHONE, CODE_PHONE_LENGTH): "Телефон должен содержать ровно 10 цифр после +7.",
+    (FIELD_RATING, CODE_RATING_RANGE): "Рейтинг должен быть в диапазоне от 0 до 10.",
+}
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_NON_DIGIT_RE = re.compile(r"\D+")
+
+
+class FieldError(NamedTuple):
+    # Ошибка одного поля строки
+    field: str
+    code: str
+
+    @property
+    def message(self) -> str:
+        return ERROR_MESSAGES[(self.field, self.code)]
+
+
+class PartnerBatchValidation(NamedTuple):
+    """
+    Результат проверки пакета
+    columns — проверенные столбцы: строки без пробелов по краям, рейтинг — int или None
+    errors — номер строки (с 0) -> ошибки её полей в порядке PARTNER_FIELDS; строк без ошибок в словаре нет
+    """
+    columns: dict[str, list]
+    errors: dict[int, list[FieldError]]
+
+    @property
+    def row_count(self) -> int:
+        return len(self.columns[FIELD_NAME])
+
+    def is_valid(self, index: int) -> bool:
+        return index not in self.errors
+
+    def messages(self, index: int) -> list[str]:
+        return [error.message for error in self.errors.get(index, ())]
+
+
+def _text_column(values) -> list[str]:
+    # Строковый столбец: None -> "", пробелы по краям убираются
+    return [value.strip() if isinstance(value, str) else ("" if value is None else str(value).strip()) for value in values]
+
+
+def _rating_column(values) -> list[int | None]:
+    # Рейтинг как int; пустое или нечисловое значение -> None
+    column = []
+    for value in values:
+        if isinstance(value, int) and not isinstance(value, bool):
+            column.append(value)
+            continue
+        try:
+            column.append(int(str(value).strip()))
+        except (TypeError, ValueError):
+            column.append(None)
+    return column
+
+
+def _digits(values: list[str]) -> list[str]:
+    # Только цифры каждого значения; строки из одних цифр не пересобираются
+    sub = _NON_DIGIT_RE.sub
+    return [value if value.isdigit() else sub("", value) for value in values]
+
+
+def _required(column: list[str]) -> list[int]:
+    return [index for index, value in enumerate(column) if not value]
+
+
+def validate_partner_columns(columns: dict) -> PartnerBatchValidation:
+    """
+    Проверяет пакет, заданный столбцами: поле -> список значений одинаковой длины
+    Отсутствующий столбец считается пустым
+    """
+    row_count = max((len(values) for values in columns.values()), default=0)
+    empty = [None] * row_count
+
+    checked = {field: _text_column(columns.get(field, empty)) for field in PARTNER_FIELDS if field != FIELD_RATING}
+    checked[FIELD_RATING] = _rating_column(columns.get(FIELD_RATING, empty))
+    lengths = {len(values) for values in checked.values()}
+    if len(lengths) > 1:
+        raise ValueError("Столбцы пакета партнёров имеют разную длину.")
+
+    # Ошибки по правилам: каждое правило — номера строк, не прошедших проверку.
+    # Правила перечислены в порядке полей, поэтому ошибки строки идут в том же порядке
+    failures: list[tuple[FieldError, list[int]]] = []
+
+    for field in (FIELD_NAME, FIELD_DIRECTOR, FIELD_LEGAL_ADDRESS):
+        failures.append((FieldError(field, CODE_REQUIRED), _required(checked[field])))
+
+    inn = checked[FIELD_INN]
+    failures.append((FieldError(FIELD_INN, CODE_REQUIRED), _required(inn)))
+    failures.append((FieldError(FIELD_INN, CODE_INN_LENGTH), [
+        index for index, digits in enumerate(_digits(inn))
+        if inn[index] and len(digits) not in (10, 12)
+    ]))
+
+    match_email = _EMAIL_RE.match
+    failures.append((FieldError(FIELD_EMAIL, CODE_EMAIL_FORMAT), [
+        index for index, value in enumerate(checked[FIELD_EMAIL]) if value and not match_email(value)
+    ]))
+
+    phone = checked[FIELD_PHONE]
+    failures.append((FieldError(FIELD_PHONE, CODE_REQUIRED), _required(phone)))
+    failures.append((FieldError(FIELD_PHONE, CODE_PHONE_PREFIX), [
+        index for index, value in enumerate(phone) if value and not value.startswith("+7")
+    ]))
+    failures.append((FieldError(FIELD_PHONE, CODE_PHONE_LENGTH), [
+        index for index, digits in enumerate(_digits(phone))
+        if phone[index] and (len(digits) != 11 or digits[0] != "7")
+    ]))
+
+    failures.append((FieldError(FIELD_RATING, CODE_RATING_RANGE), [
+        index for index, value in enumerate(checked[FIELD_RATING]) if value is None or not (0 <= value <= 10)
+    ]))
+
+    errors: dict[int, list[FieldError]] = {}
+    for error, rows in failures:
+        for index in rows:
+            errors.setdefault(index, []).append(error)
+    return PartnerBatchValidation(checked, errors)
+
+
+def rows_to_columns(rows: list[dict], fields=PARTNER_FIELDS) -> dict[str, list]:
+    # Переводит строки-словари в столбцы для validate_partner_columns
+    return {field: [row.get(field) for row in rows] for field in fields}
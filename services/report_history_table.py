@@ -0,0 +1,184 @@
+"""
+Таблица истории продаж в PDF-отчёте по партнёру
+Таблица верстается частями по мере формирования документа, а не одной таблицей на всю историю:
+    строки истории берутся из итератора (потоковый запрос к БД) только тогда,
+    когда вёрстка дошла до таблицы и предыдущая часть уже размещена на странице
+    каждая часть — таблица reportlab из шапки и стольких строк, сколько помещается
+    в оставшуюся высоту страницы (у строк фиксированная высота), поэтому шапка есть
+    на каждой странице, а частей столько же, сколько страниц
+Время вёрстки растёт линейно с числом строк; из таблицы в памяти одновременно находится одна страница
+(reportlab хранит только уже свёрстанное содержимое страниц до записи файла)
+Необязательные итоги по месяцам добавляются строками «Итого за ММ.ГГГГ» после строк каждого месяца
+Модуль импортирует reportlab, поэтому загружается только при формировании отчёта
+"""
+
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Spacer, Table, TableStyle
+
+HEADER = ["Дата продажи", "Продукция", "Количество (м²)"]
+COLUMN_WIDTHS = [90, 325, 100]
+
+# Высота строк таблицы, пт: фиксированная, чтобы число строк на странице считалось заранее
+HEADER_HEIGHT = 18
+ROW_HEIGHT = 14
+
+# Если на остатке страницы помещается меньше строк, часть таблицы начинается со следующей страницы
+MIN_ROWS_ON_PAGE = 3
+
+# Вид строки таблицы
+ROW_SALE = 0
+ROW_SUBTOTAL = 1
+
+
+def history_table_rows(sales, monthly_subtotals: bool = False):
+    """
+    Строки таблицы (ячейки, вид строки) по строкам истории (дата, продукция, количество)
+    Строки истории идут по дате: строки одного месяца подряд, после них — итог месяца
+    """
+    month = None
+    month_total = 0
+    empty = True
+    for sale_date, product_name, quantity in sales:
+        empty = False
+        if monthly_subtotals:
+            sale_month = (sale_date.year, sale_date.month) if hasattr(sale_date, "year") else None
+            if month is not None and sale_month != month:
+                yield _subtotal_row(month, month_total), ROW_SUBTOTAL
+                month_total = 0
+            month = sale_month
+            month_total += quantity or 0
+
+        date_str = sale_date.strftime("%d.%m.%Y") if hasattr(sale_date, "strftime") else str(sale_date)
+        yield [date_str, product_name or "", str(quantity)], ROW_SALE
+
+    if empty:
+        # если продаж нет — строка заглушка
+        yield ["-", "Нет данных о продажах", "-"], ROW_SALE
+    elif monthly_subtotals and month is not None:
+        yield _subtotal_row(month, month_total), ROW_SUBTOTAL
+
+
+def _subtotal_row(month: tuple, total: int) -> list[str]:
+    year, month_number = month
+    return ["", f"Итого за {month_number:02d}.{year}", str(total)]
+
+
+def history_table_style(font_name: str, font_bold_name: str) -> list:
+    # Команды оформления части таблицы (общие для всех частей)
+    return [
+        # шапка
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#F4E8D3")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+        ("FONTNAME", (0, 0), (-1, 0), font_bold_name),
+        ("FONTSIZE", (0, 0), (-1, 0), 11),
+
+        # выравнивание заголовков по центру
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+
+        # тело
+        ("FONTNAME", (0, 1), (-1, -1), font_name),
+        ("FONTSIZE", (0, 1), (-1, -1), 10),
+
+        # выравнивание тела: даты и продукция слева, количество справа
+        ("ALIGN", (0, 1), (0, -1), "LEFT"),   # даты
+        ("ALIGN", (1, 1), (1, -1), "LEFT"),   # продукция
+        ("ALIGN", (2, 1), (2, -1), "RIGHT"),  # количество
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+
+        # линии
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BOX", (0, 0), (-1, -1), 1, colors.black),
+
+        # отступы
+        ("LEFTPADDING", (0, 0), (-1, -1), 4),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+    ]
+
+
+class StreamingHistoryDocTemplate(SimpleDocTemplate):
+    """
+    Документ отчёта, в конец которого таблица истории добавляется частями во время вёрстки
+    Обычные элементы (заголовок, сведения о партнёре) передаются в build как обычно,
+    части таблицы добавляются, когда эти элементы размещены
+    """
+
+    def __init__(self, filename, table_rows, font_name: str, font_bold_name: str, table_style=None, **kwargs):
+        super().__init__(filename, **kwargs)
+        self._table_rows = iter(table_rows)
+        self._rows_pending = True
+        self._flowables = None
+        self._font_bold_name = font_bold_name
+        self._table_style = table_style if table_style is not None else TableStyle(history_table_style(font_name, font_bold_name))
+        # Счётчики вёрстки: размещённые на страницах строки истории и созданные части таблицы
+        self.rows_done = 0
+        self.chunks_done = 0
+
+    def build(self, flowables, **kwargs):
+        # Без обычных элементов документ состоит из одной таблицы: вёрстке нужен хотя бы один элемент
+        self._flowables = list(flowables) or [Spacer(0, 0)]
+        super().build(self._flowables, **kwargs)
+
+    def handle_flowable(self, flowables):
+        super().handle_flowable(flowables)
+        # Список элементов документа закончился: следующая часть таблицы на остаток текущей страницы
+        # (служебный список отложенных действий reportlab тоже проходит через handle_flowable)
+        if flowables is self._flowables and not flowables and self._rows_pending:
+            chunk = self._next_chunk()
+            if chunk is not None:
+                flowables.append(chunk)
+
+    def afterFlowable(self, flowable):
+        # Часть таблицы размещена на странице; строки итогов в счётчик строк истории не входят
+        if isinstance(flowable, Table):
+            self.rows_done += getattr(flowable, "history_rows", flowable._nrows - 1)
+
+    def _rows_fitting(self) -> int:
+        # Сколько строк таблицы помещается в оставшуюся высоту текущей страницы
+        frame = self.frame
+        available = frame._y - frame._y1p
+        rows = int((available - HEADER_HEIGHT - 0.01) // ROW_HEIGHT)
+        if rows < MIN_ROWS_ON_PAGE:
+            # Часть не поместится на эту страницу и будет перенесена на следующую целиком
+            full_height = frame._height - frame._topPadding - frame._bottomPadding
+            rows = int((full_height - HEADER_HEIGHT - 0.01) // ROW_HEIGHT)
+        return max(1, rows)
+
+    def _next_chunk(self):
+        # Часть таблицы: шапка и следующие строки истории, сколько поместится на странице
+        count = self._rows_fitting()
+        data = [HEADER]
+        subtotal_rows = []
+        history_rows = 0
+        for cells, kind in self._table_rows:
+            data.append(cells)
+            if kind == ROW_SUBTOTAL:
+                subtotal_rows.append(len(data) - 1)
+            else:
+                history_rows += 1
+            if len(data) > count:
+                break
+        else:
+            self._rows_pending = False
+        if len(data) == 1:
+            return None
+
+        table = Table(
+            data,
+            colWidths=COLUMN_WIDTHS,
+            rowHeights=[HEADER_HEIGHT] + [ROW_HEIGHT] * (len(data) - 1),
+            repeatRows=1,
+        )
+        table.setStyle(self._table_style)
+        if subtotal_rows:
+            # строки итогов выделяются жирным шрифтом и фоном
+            commands = []
+            for row in subtotal_rows:
+                commands.append(("FONTNAME", (0, row), (-1, row), self._font_bold_name))
+                commands.append(("BACKGROUND", (0, row), (-1, row), colors.HexColor("#F7F1E6")))
+            table.setStyle(TableStyle(commands))
+
+        table.history_rows = history_rows
+        self.chunks_done += 1
+        return table
@@ -6,44 +6,42 @@
 """
 
 from sqlalchemy.orm import Session
-from db.models import Partner, ProductType, MaterialType
-from services.sales_history_service import get_partner_sales
+from db.models import Partner, PartnerSalesSummary, Product, ProductType, MaterialType
+from services.sales_history_service import (
+    SalesHistoryFilter, iter_partner_sales, get_partner_sales_count,
+)
+from services.sales_history_cache import shared_history_cache
 from services.calculation_service import calculate_required_material
 
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
+# reportlab импортируется внутри функций формирования отчётов:
+# отчёты строятся редко, и загрузка пакета не должна замедлять запуск приложения
+# Шрифты и стили отчётов создаются один раз на процесс (services.report_templates)
 
-# Имена шрифтов, под которыми они регистрируются в reportlab
-FONT_NAME = "DejaVuSans"
-FONT_BOLD_NAME = "DejaVuSans-Bold"
 
-# Путь к TTF-файлу с поддержкой кириллицы
-FONT_PATH = "resources/DejaVuSans.ttf"
+class ReportCancelled(Exception):
+    # Формирование отчёта отменено: исключение возбуждает функция progress, файл отчёта не записывается
+    pass
 
-def _register_fonts() -> None:
-    # Регистрирует TTF-шрифт с поддержкой кириллицы в reportlab
 
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
+def preload_report_resources() -> None:
+    """
+    Заранее загружает reportlab, регистрирует шрифты и создаёт стили отчётов
+    Используется процессами пакетного формирования отчётов, чтобы не делать этого в первом отчёте
+    """
+    _report_styles()
 
-    # если уже зарегистрирован ничего не делаем
-    try:
-        pdfmetrics.getFont(FONT_NAME)
-        return
-    except KeyError:
-        pass
 
+def _report_styles():
+    # Общие стили отчётов (ReportStyles); при первом вызове загружает reportlab и шрифты
     try:
-        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
-        pdfmetrics.registerFont(TTFont(FONT_BOLD_NAME, FONT_PATH))
+        import reportlab.platypus  # noqa: F401
     except Exception as e:
-        # Если шрифт не найден или битый отчёт не сформируется корректно.
         raise RuntimeError(
-            f"Не удалось зарегистрировать шрифт '{FONT_NAME}'. "
-            f"Убедитесь, что файл '{FONT_PATH}' существует и доступен.\n{e}"
+            "Для формирования PDF-отчёта необходим пакет reportlab.\n"
+            "Установите его командой:\n\npip install reportlab"
         ) from e
+    from services.report_templates import report_styles
+    return report_styles()
 
 
 def _format_phone(phone_digits: str | None) -> str:
@@ -74,7 +72,35 @@ def _calculate_discount(total_qty: float) -> int:
     return 10
 
 
-def generate_partner_sales_report(session: Session, partner_id: int, filename: str) -> None:
+def _describe_filter(session: Session, history_filter: SalesHistoryFilter | None, limit: int | None) -> list[str]:
+    # Строки отчёта с описанием отбора истории продаж (пустой список, если отбора нет)
+    lines = []
+    if history_filter is not None:
+        if history_filter.date_from is not None or history_filter.date_to is not None:
+            date_from = history_filter.date_from.strftime("%d.%m.%Y") if history_filter.date_from else "…"
+            date_to = history_filter.date_to.strftime("%d.%m.%Y") if history_filter.date_to else "…"
+            lines.append(f"Период: {date_from} — {date_to}")
+        if history_filter.product_type_id is not None:
+            product_type = session.get(ProductType, history_filter.product_type_id)
+            lines.append(f"Тип продукции: {product_type.name if product_type else history_filter.product_type_id}")
+        if history_filter.product_id is not None:
+            product = session.get(Product, history_filter.product_id)
+            lines.append(f"Продукция: {product.name if product else history_filter.product_id}")
+    if limit:
+        lines.append(f"Показано не более {limit} строк продаж")
+    return lines
+
+
+def generate_partner_sales_report(
+    session: Session,
+    partner_id: int,
+    filename: str,
+    history_filter: SalesHistoryFilter | None = None,
+    limit: int | None = None,
+    use_cache: bool = True,
+    monthly_subtotals: bool = False,
+    progress=None,
+) -> None:
     """
     Формирует PDF-отчёт по истории реализации продукции выбранного партнёра
     В отчёт включаются:
@@ -83,10 +109,21 @@ def generate_partner_sales_report(session: Session, partner_id: int, filename: s
         телефон, email
         суммарный объём реализации и скидка
         таблица: дата продажи, продукция, количество
+    history_filter и limit ограничивают строки таблицы (отбор выполняется в БД),
+    суммарный объём и скидка при этом считаются по всей истории партнёра
+    use_cache=False — история читается без общего кэша (пакетное формирование отчётов)
+    monthly_subtotals — после строк каждого месяца в таблицу добавляется итог за месяц
+    progress(rows_done, rows_total, pages_done) вызывается после каждой свёрстанной страницы;
+    чтобы отменить формирование, progress возбуждает ReportCancelled
+    Таблица читается из БД потоком и верстается частями по странице (services.report_history_table),
+    поэтому отчёт по длинной истории формируется за линейное время без загрузки всей истории в память
     """
-
-    # регистрируем шрифты с кириллицей
-    _register_fonts()
+    # шрифты с кириллицей и готовые стили
+    styles = _report_styles()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import Paragraph, Spacer
+    from services.report_history_table import StreamingHistoryDocTemplate, history_table_rows
+    from services.report_templates import FONT_NAME, FONT_BOLD_NAME
 
     # получаем партнёра
     try:
@@ -113,26 +150,37 @@ def generate_partner_sales_report(session: Session, partner_id: int, filename: s
     phone_formatted = _format_phone(phone_digits)
     rating = getattr(partner, "rating", None) or 0
 
-    # история продаж
+    # суммарный объём берётся из partner_sales_summary (0, если продаж нет):
+    # сведения о партнёре верстаются раньше таблицы продаж
     try:
-        sales = get_partner_sales(session, partner.id)
+        summary_total = (
+            session.query(PartnerSalesSummary.total_quantity)
+            .filter(PartnerSalesSummary.partner_id == partner.id)
+            .scalar()
+        )
+        total_quantity = float(summary_total or 0)
+        # число строк таблицы нужно только для отображения хода формирования
+        rows_total = 0
+        if progress is not None:
+            rows_total = get_partner_sales_count(session, partner.id, history_filter)
+            if limit:
+                rows_total = min(rows_total, limit)
     except Exception as e:
         raise RuntimeError(f"Не удалось получить историю продаж партнёра:\n{e}") from e
 
-    total_quantity = 0.0
-    for _, _, quantity in sales:
-        if quantity is not None:
-            try:
-                total_quantity += float(quantity)
-            except (TypeError, ValueError):
-                # Если вдруг в БД оказались некорректные данные по количеству пропускаем
-                pass
-
     discount = _calculate_discount(total_quantity)
 
-    # собираем документ через platypus 
-    doc = SimpleDocTemplate(
+    # история продаж читается потоком во время вёрстки таблицы
+    # История берётся через общий кэш: повторный отчёт по неизменившейся истории не выбирает её заново
+    sales = iter_partner_sales(session, partner.id, history_filter, limit, shared_history_cache() if use_cache else None)
+
+    # собираем документ через platypus, таблица продаж добавляется в конец документа частями
+    doc = StreamingHistoryDocTemplate(
         filename,
+        history_table_rows(sales, monthly_subtotals),
+        FONT_NAME,
+        FONT_BOLD_NAME,
+        table_style=styles.history_table,
         pagesize=A4,
         leftMargin=40,
         rightMargin=40,
@@ -140,31 +188,10 @@ def generate_partner_sales_report(session: Session, partner_id: int, filename: s
         bottomMargin=40,
     )
 
-    base_styles = getSampleStyleSheet()
-
-    # свои стили с уникальными именами
-    body_style = ParagraphStyle(
-        name="BodyRus",
-        parent=base_styles["Normal"],
-        fontName=FONT_NAME,
-        fontSize=11,
-        leading=14,
-    )
-    body_bold_style = ParagraphStyle(
-        name="BodyRusBold",
-        parent=base_styles["Normal"],
-        fontName=FONT_BOLD_NAME,
-        fontSize=11,
-        leading=14,
-    )
-    title_style = ParagraphStyle(
-        name="TitleRus",
-        parent=base_styles["Heading1"],
-        fontName=FONT_BOLD_NAME,
-        fontSize=18,
-        leading=22,
-        alignment=1,
-    )
+    # стили общие для всех отчётов процесса
+    body_style = styles.body
+    body_bold_style = styles.body_bold
+    title_style = styles.title
 
     elems = []
 
@@ -186,72 +213,28 @@ def generate_partner_sales_report(session: Session, partner_id: int, filename: s
         elems.append(Paragraph(line, body_style))
     elems.append(Spacer(1, 18))
 
-    # заголовок таблицы
+    # заголовок таблицы и условия отбора строк
     elems.append(Paragraph("Таблица продаж", body_bold_style))
+    for line in _describe_filter(session, history_filter, limit):
+        elems.append(Paragraph(line, body_style))
     elems.append(Spacer(1, 6))
 
-    # данные таблицы: шапка
-    table_data = [
-        ["Дата продажи", "Продукция", "Количество (м²)"]
-    ]
-    # строки с продажами
-    for sale_date, product_name, quantity in sales:
-        date_str = sale_date.strftime("%d.%m.%Y") if hasattr(sale_date, "strftime") else str(sale_date)
-        name_str = product_name or ""
-        qty_str = str(quantity)
-        table_data.append([date_str, name_str, qty_str])
-
-    # если продаж нет — добавляем строку заглушку
-    if len(table_data) == 1:
-        table_data.append(["-", "Нет данных о продажах", "-"])
-
-    # создаём таблицу
-    table = Table(
-        table_data,
-        colWidths=[90, 325, 100],
-        repeatRows=1,
-    )
-
-    table.setStyle(TableStyle([
-        # шапка
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#F4E8D3")),
-        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-        ("FONTNAME", (0, 0), (-1, 0), FONT_BOLD_NAME),
-        ("FONTSIZE", (0, 0), (-1, 0), 11),
-
-        # выравнивание заголовков по центру
-        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-
-        # тело
-        ("FONTNAME", (0, 1), (-1, -1), FONT_NAME),
-        ("FONTSIZE", (0, 1), (-1, -1), 10),
-
-        # выравнивание тела: даты и продукция слева, количество справа
-        ("ALIGN", (0, 1), (0, -1), "LEFT"),   # даты
-        ("ALIGN", (1, 1), (1, -1), "LEFT"),   # продукция
-        ("ALIGN", (2, 1), (2, -1), "RIGHT"),  # количество
-
-        # линии
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BOX", (0, 0), (-1, -1), 1, colors.black),
-
-        # отступы
-        ("LEFTPADDING", (0, 0), (-1, -1), 4),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-    ]))
-
-    elems.append(table)
+    if progress is not None:
+        doc.setPageCallBack(lambda page: progress(doc.rows_done, rows_total, page))
 
     # собираем PDF
     try:
         doc.build(elems)
+    except ReportCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"Ошибка при формировании PDF-отчёта по партнёру:\n{e}") from e
+    finally:
+        # при отмене или ошибке курсор истории закрывается, пока сессия ещё открыта
+        sales.close()
 
 
-def generate_material_calc_report(session: Session, product_type_id: int, material_type_id: int, quantity: int, param1: float, param2: float, filename: str,) -> None:
+def generate_material_calc_report(session: Session, product_type_id: int, material_type_id: int, quantity: int, param1: float, param2: float, filename: str, progress=None) -> None:
     """
     Формирует PDF-отчёт по расчёту количества материала
     В отчёт включаются:
@@ -260,19 +243,12 @@ def generate_material_calc_report(session: Session, product_type_id: int, materi
         входные параметры
         результат расчёта
     Отчёт формируется даже при ошибке расчёта в этом случае выводится текст с пояснением
+    progress(0, 0, pages_done) вызывается после каждой свёрстанной страницы (как у отчёта по партнёру)
     """
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    except Exception as e:
-        raise RuntimeError(
-            "Для формирования PDF-отчёта необходим пакет reportlab.\n"
-            "Установите его командой:\n\npip install reportlab"
-        ) from e
-
-    # регистрируем шрифты
-    _register_fonts()
+    # шрифты и готовые стили
+    styles = _report_styles()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 
     # пробуем найти типы продукции и материала в БД
     try:
@@ -300,30 +276,10 @@ def generate_material_calc_report(session: Session, product_type_id: int, materi
         bottomMargin=40,
     )
 
-    base_styles = getSampleStyleSheet()
-
-    body_style = ParagraphStyle(
-        name="BodyRusCalc",
-        parent=base_styles["Normal"],
-        fontName=FONT_NAME,
-        fontSize=11,
-        leading=14,
-    )
-    body_bold_style = ParagraphStyle(
-        name="BodyRusCalcBold",
-        parent=base_styles["Normal"],
-        fontName=FONT_BOLD_NAME,
-        fontSize=11,
-        leading=14,
-    )
-    title_style = ParagraphStyle(
-        name="TitleRusCalc",
-        parent=base_styles["Heading1"],
-        fontName=FONT_BOLD_NAME,
-        fontSize=18,
-        leading=22,
-        alignment=1,
-    )
+    # стили общие для всех отчётов процесса
+    body_style = styles.body
+    body_bold_style = styles.body_bold
+    title_style = styles.title
 
     elems = []
 
@@ -351,7 +307,12 @@ def generate_material_calc_report(session: Session, product_type_id: int, materi
             body_bold_style
         ))
 
+    if progress is not None:
+        doc.setPageCallBack(lambda page: progress(0, 0, page))
+
     try:
         doc.build(elems)
+    except ReportCancelled:
+        raise
     except Exception as e:
         raise RuntimeError(f"Ошибка при формировании PDF-отчёта по расчёту материала:\n{e}") from e
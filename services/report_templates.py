@@ -0,0 +1,123 @@
+"""
+Шрифты и стили PDF-отчётов, общие для всех отчётов процесса
+Шрифты читаются и регистрируются в reportlab, а стили абзацев и таблицы истории продаж
+создаются один раз при первом отчёте (или при preload_report_resources) и затем
+используются всеми отчётами: каждый отчёт только собирает документ из готовых стилей
+Жирный текст (заголовки, шапка таблицы, итоги) набирается настоящим жирным начертанием
+DejaVuSans-Bold; если его файла нет, используется обычное начертание, как раньше
+Модуль импортирует reportlab, поэтому загружается только при формировании отчёта
+"""
+
+import os
+import threading
+from typing import NamedTuple
+
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.fonts import addMapping
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import TableStyle
+
+from services.report_history_table import history_table_style
+
+# Имена шрифтов, под которыми они регистрируются в reportlab
+FONT_NAME = "DejaVuSans"
+FONT_BOLD_NAME = "DejaVuSans-Bold"
+
+# Пути к TTF-файлам с поддержкой кириллицы
+FONT_PATH = "resources/DejaVuSans.ttf"
+FONT_BOLD_PATH = "resources/DejaVuSans-Bold.ttf"
+
+
+class ReportStyles(NamedTuple):
+    # Готовые стили отчётов
+    body: ParagraphStyle
+    body_bold: ParagraphStyle
+    title: ParagraphStyle
+    # Оформление частей таблицы истории продаж
+    history_table: TableStyle
+
+
+_styles: ReportStyles | None = None
+_lock = threading.Lock()
+
+
+def _register_font(name: str, path: str) -> None:
+    try:
+        pdfmetrics.registerFont(TTFont(name, path))
+    except Exception as e:
+        # Если шрифт не найден или битый отчёт не сформируется корректно.
+        raise RuntimeError(
+            f"Не удалось зарегистрировать шрифт '{name}'. "
+            f"Убедитесь, что файл '{path}' существует и доступен.\n{e}"
+        ) from e
+
+
+def _register_fonts() -> None:
+    # Регистрирует TTF-шрифты с поддержкой кириллицы в reportlab (обычный и жирный)
+
+    # если уже зарегистрированы ничего не делаем
+    try:
+        pdfmetrics.getFont(FONT_NAME)
+        pdfmetrics.getFont(FONT_BOLD_NAME)
+        return
+    except KeyError:
+        pass
+
+    _register_font(FONT_NAME, FONT_PATH)
+    if os.path.exists(FONT_BOLD_PATH):
+        _register_font(FONT_BOLD_NAME, FONT_BOLD_PATH)
+    else:
+        print(f"Файл жирного шрифта '{FONT_BOLD_PATH}' не найден, используется обычное начертание")
+        _register_font(FONT_BOLD_NAME, FONT_PATH)
+
+    # семейство шрифтов: разметка <b> в абзацах выбирает жирное начертание
+    addMapping(FONT_NAME, 0, 0, FONT_NAME)
+    addMapping(FONT_NAME, 1, 0, FONT_BOLD_NAME)
+    addMapping(FONT_NAME, 0, 1, FONT_NAME)
+    addMapping(FONT_NAME, 1, 1, FONT_BOLD_NAME)
+
+
+def _build_styles() -> ReportStyles:
+    base_styles = getSampleStyleSheet()
+
+    body_style = ParagraphStyle(
+        name="BodyRus",
+        parent=base_styles["Normal"],
+        fontName=FONT_NAME,
+        fontSize=11,
+        leading=14,
+    )
+    body_bold_style = ParagraphStyle(
+        name="BodyRusBold",
+        parent=base_styles["Normal"],
+        fontName=FONT_BOLD_NAME,
+        fontSize=11,
+        leading=14,
+    )
+    title_style = ParagraphStyle(
+        name="TitleRus",
+        parent=base_styles["Heading1"],
+        fontName=FONT_BOLD_NAME,
+        fontSize=18,
+        leading=22,
+        alignment=1,
+    )
+    return ReportStyles(
+        body_style,
+        body_bold_style,
+        title_style,
+        TableStyle(history_table_style(FONT_NAME, FONT_BOLD_NAME)),
+    )
+
+
+def report_styles() -> ReportStyles:
+    # Стили отчётов; при первом вызове в процессе регистрирует шрифты и создаёт стили
+    global _styles
+    if _styles is None:
+        # отчёты могут формироваться из нескольких потоков: шрифты и стили создаются один раз
+        with _lock:
+            if _styles is None:
+                _register_fonts()
+                _styles = _build_styles()
+    return _styles
@@ -0,0 +1,194 @@
+"""
+Выгрузка истории продаж в CSV и XLSX (для бухгалтерии)
+Строка выгрузки — одна позиция продажи:
+    партнёр, ИНН, дата продажи, артикул, продукция, количество
+Устройство:
+    строки читаются из БД порциями через курсор на стороне сервера и сразу записываются в файл,
+    поэтому объём памяти не зависит от числа строк (выгрузка всех партнёров за все годы)
+    XLSX пишется openpyxl в режиме write-only; лист XLSX вмещает чуть больше миллиона строк,
+    поэтому продолжение выгрузки переносится на следующие листы
+    файл записывается во временный и подменяет прежний целиком: при ошибке или отмене
+    частично записанный файл не остаётся
+Пакет openpyxl нужен только для XLSX и загружается при выгрузке; XLSX формируется в разы
+медленнее CSV (openpyxl строит XML каждой ячейки, с установленным lxml быстрее), поэтому
+для выгрузок в миллионы строк удобнее CSV
+"""
+
+import csv
+import os
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from db.models import Partner, Product, Sale, SaleItem
+from services.sales_history_service import SalesHistoryFilter, apply_history_filter
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+
+EXPORT_HEADER = ["Партнёр", "ИНН", "Дата продажи", "Артикул", "Продукция", "Количество"]
+
+# Строк в одной порции чтения из БД (и между вызовами progress)
+DEFAULT_BATCH_SIZE = 5000
+
+# Строк данных на листе XLSX (предел листа 1 048 576 строк, одна из них — заголовок)
+XLSX_MAX_SHEET_ROWS = 1_048_575
+XLSX_SHEET_TITLE = "Продажи"
+
+
+class SalesExportResult(NamedTuple):
+    # Итог выгрузки
+    rows: int
+    path: Path
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def export_format(path, file_format: str | None = None) -> str:
+    # Формат выгрузки; определяется по расширению файла, если не задан явно
+    file_format = file_format or (FORMAT_XLSX if Path(path).suffix.lower() == ".xlsx" else FORMAT_CSV)
+    if file_format not in (FORMAT_CSV, FORMAT_XLSX):
+        raise ValueError(f"Неизвестный формат выгрузки: {file_format}")
+    return file_format
+
+
+def sales_export_query(
+    session: Session,
+    partner_ids: list[int] | None = None,
+    history_filter: SalesHistoryFilter | None = None,
+):
+    # Запрос строк выгрузки: по наименованию партнёра, затем по дате продажи
+    query = (
+        session.query(
+            Partner.name,
+            Partner.inn,
+            Sale.sale_date,
+            Product.article,
+            Product.name,
+            SaleItem.quantity,
+        )
+        .select_from(Sale)
+        .join(Partner, Partner.id == Sale.partner_id)
+        .join(SaleItem, SaleItem.sale_id == Sale.id)
+        .join(Product, Product.id == SaleItem.product_id)
+    )
+    if partner_ids:
+        query = query.filter(Sale.partner_id.in_(partner_ids))
+    query = apply_history_filter(query, history_filter)
+    return query.order_by(Partner.name, Partner.id, Sale.sale_date, Sale.id, SaleItem.id)
+
+
+def _counted(rows, progress, batch_size: int):
+    # Пропускает строки, вызывая progress(строк записано) через каждые batch_size строк
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if progress is not None and count % batch_size == 0:
+            progress(count)
+
+
+def write_sales_csv(rows, path) -> int:
+    # Записывает строки в CSV (разделитель «;», UTF-8 с BOM — открывается в Excel); возвращает число строк
+    count = 0
+    # даты повторяются во многих строках, а strftime медленный: текст каждой даты строится один раз
+    date_texts = {}
+    with open(path, "w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(EXPORT_HEADER)
+        for partner_name, inn, sale_date, article, product_name, quantity in rows:
+            date_text = date_texts.get(sale_date)
+            if date_text is None:
+                date_text = date_texts[sale_date] = sale_date.strftime("%d.%m.%Y")
+            writer.writerow((partner_name, inn, date_text, article, product_name, quantity))
+            count += 1
+    return count
+
+
+def write_sales_xlsx(rows, path) -> int:
+    # Записывает строки в XLSX в режиме write-only (листы по XLSX_MAX_SHEET_ROWS строк); возвращает число строк
+    try:
+        from openpyxl import Workbook
+    except Exception as e:
+        raise RuntimeError(
+            "Для выгрузки в XLSX необходим пакет openpyxl.\n"
+            "Установите его командой:\n\npip install openpyxl\n\n"
+            "или выберите выгрузку в CSV."
+        ) from e
+
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = XLSX_MAX_SHEET_ROWS
+    count = 0
+    for row in rows:
+        if sheet_rows == XLSX_MAX_SHEET_ROWS:
+            # следующий лист: «Продажи», «Продажи (2)», ...
+            sheet_number = len(workbook.worksheets) + 1
+            sheet = workbook.create_sheet(XLSX_SHEET_TITLE if sheet_number == 1 else f"{XLSX_SHEET_TITLE} ({sheet_number})")
+            sheet.column_dimensions["A"].width = 40
+            sheet.column_dimensions["B"].width = 14
+            sheet.column_dimensions["C"].width = 14
+            sheet.column_dimensions["D"].width = 14
+            sheet.column_dimensions["E"].width = 40
+            sheet.column_dimensions["F"].width = 12
+            sheet.freeze_panes = "A2"
+            sheet.append(EXPORT_HEADER)
+            sheet_rows = 0
+        # дата записывается значением даты: в Excel по ней работают сортировка и фильтры
+        sheet.append(list(row))
+        sheet_rows += 1
+        count += 1
+    if sheet is None:
+        # пустая выгрузка: лист только с заголовком
+        workbook.create_sheet(XLSX_SHEET_TITLE).append(EXPORT_HEADER)
+    workbook.save(path)
+    return count
+
+
+def export_sales(
+    session: Session,
+    path,
+    file_format: str | None = None,
+    partner_ids: list[int] | None = None,
+    history_filter: SalesHistoryFilter | None = None,
+    progress=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> SalesExportResult:
+    """
+    Выгружает историю продаж в файл path (CSV или XLSX)
+    file_format - FORMAT_CSV или FORMAT_XLSX (None — по расширению файла)
+    partner_ids - id партнёров (None — все партнёры)
+    history_filter - отбор по периоду, продукции или типу продукции (SalesHistoryFilter)
+    progress(rows_written) вызывается через каждые batch_size строк; исключение из progress
+    прерывает выгрузку (файл при этом не создаётся)
+    Сессия должна допускать долгий запрос (профиль batch без ограничения времени запроса)
+    """
+    file_format = export_format(path, file_format)
+    path = Path(path)
+    temp_path = path.with_name(path.name + ".tmp")
+
+    started = time.perf_counter()
+    # Запрос выполняется без слоя ORM (строки — простые кортежи столбцов) через курсор на стороне сервера
+    statement = sales_export_query(session, partner_ids, history_filter).statement
+    rows = session.connection().execute(statement.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        counted = _counted(rows, progress, batch_size)
+        if file_format == FORMAT_XLSX:
+            count = write_sales_xlsx(counted, temp_path)
+        else:
+            count = write_sales_csv(counted, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        # курсор закрывается, пока сессия открыта; недописанный файл удаляется
+        rows.close()
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+    if progress is not None:
+        progress(count)
+    return SalesExportResult(count, path, time.perf_counter() - started)
@@ -0,0 +1,178 @@
+"""
+Кэш истории продаж партнёров
+Результаты выборок истории (весь список продаж или страница таблицы) хранятся в памяти
+процесса и используются повторно окном истории продаж и отчётами
+Устройство:
+    вытесняются давно не использованные записи (LRU); ограничен общий объём в строках истории,
+    а не число записей: история крупного партнёра занимает соответствующую долю кэша
+    каждая запись помечена версией истории продаж партнёра (таблица partner_sales_versions,
+    миграция 0003): версию увеличивают триггеры БД при любом изменении продаж партнёра,
+    в том числе сделанном другим процессом или другим рабочим местом
+    перед использованием записи версия читается из БД (одна строка по ключу):
+    если она изменилась, запись устарела и выборка выполняется заново
+    в базе без миграции 0003 версий нет: кэш не используется, история каждый раз читается из БД
+Кэш общий для потоков: доступ к нему защищён блокировкой
+"""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from db.models import PartnerSalesVersion
+
+# Объём кэша в строках истории продаж
+DEFAULT_MAX_ROWS = 200_000
+
+
+class CacheStats(NamedTuple):
+    # Счётчики кэша
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    rows: int
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+class _Entry(NamedTuple):
+    partner_id: int
+    version: int
+    value: object
+    size: int
+
+
+# Есть ли таблица версий в базе данных: адрес БД -> True/False (проверяется один раз за процесс)
+_versions_available: dict[str, bool] = {}
+
+
+def sales_versions_available(session: Session) -> bool:
+    # Есть ли в БД таблица версий истории продаж (миграция 0003)
+    bind = session.get_bind()
+    key = str(bind.engine.url)
+    available = _versions_available.get(key)
+    if available is None:
+        table = PartnerSalesVersion.__table__
+        available = inspect(session.connection()).has_table(table.name, schema=table.schema)
+        if not available:
+            print(
+                "Таблица версий истории продаж не найдена (не применена миграция 0003): "
+                "кэш истории продаж отключён. Примените миграции командой: python manage.py migrate"
+            )
+        _versions_available[key] = available
+    return available
+
+
+def partner_sales_version(session: Session, partner_id: int) -> int | None:
+    """
+    Текущая версия истории продаж партнёра (0 — история не менялась с момента создания таблицы версий)
+    None — в БД нет таблицы версий, и кэшировать историю нельзя
+    """
+    if not sales_versions_available(session):
+        return None
+    version = (
+        session.query(PartnerSalesVersion.version)
+        .filter(PartnerSalesVersion.partner_id == partner_id)
+        .scalar()
+    )
+    return version or 0
+
+
+class SalesHistoryCache:
+    # LRU-кэш результатов выборки истории продаж с проверкой версии партнёра
+
+    def __init__(self, max_rows: int = DEFAULT_MAX_ROWS):
+        self.max_rows = max_rows
+        self._entries: OrderedDict = OrderedDict()
+        # Ключи записей каждого партнёра — для сброса всех его записей
+        self._partner_keys: dict[int, set] = {}
+        self._rows = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version: int):
+        # Значение по ключу, если оно есть и его версия совпадает с текущей; иначе None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry.value
+            if entry is not None:
+                self._remove(key)
+            self._misses += 1
+            return None
+
+    def put(self, key, partner_id: int, version: int, value, size: int) -> None:
+        # Сохраняет значение размером size строк; значение больше всего кэша не сохраняется
+        size = max(1, size)
+        if size > self.max_rows:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._rows + size > self.max_rows and self._entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+            self._entries[key] = _Entry(partner_id, version, value, size)
+            self._partner_keys.setdefault(partner_id, set()).add(key)
+            self._rows += size
+
+    def _remove(self, key) -> None:
+        # Вызывается под блокировкой
+        entry = self._entries.pop(key)
+        self._rows -= entry.size
+        keys = self._partner_keys.get(entry.partner_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._partner_keys[entry.partner_id]
+
+    def get_or_load(self, session: Session, partner_id: int, key, load, size=len):
+        """
+        Значение из кэша или результат load() с сохранением в кэш
+        Версия читается до выборки: если продажи изменятся между двумя запросами,
+        запись получит старую версию и при следующем обращении будет выбрана заново
+        Без таблицы версий в БД значение всегда загружается через load() и не сохраняется
+        size(value) — размер значения в строках истории
+        """
+        version = partner_sales_version(session, partner_id)
+        if version is None:
+            return load()
+        value = self.get(key, version)
+        if value is None:
+            value = load()
+            self.put(key, partner_id, version, value, size(value))
+        return value
+
+    def invalidate_partner(self, partner_id: int) -> None:
+        # Удаляет все записи партнёра (например, после изменения его продаж в этом процессе)
+        with self._lock:
+            for key in list(self._partner_keys.get(partner_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._partner_keys.clear()
+            self._rows = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._rows)
+
+
+_shared_cache = SalesHistoryCache()
+
+
+def shared_history_cache() -> SalesHistoryCache:
+    # Кэш истории продаж, общий для окна истории, отчётов и фоновой подгрузки
+    return _shared_cache
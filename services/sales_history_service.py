@@ -1,27 +1,204 @@
 """
 Сервис работы с историей продаж.
 Содержит функцию которая возвращает список продаж по конкретному партнёру для формирования отчётов и отображения в интерфейсе
+и постраничную выборку той же истории для таблицы окна истории продаж
+Отбор по периоду, продукции или типу продукции и ограничение числа строк выполняются в запросе к БД
+С параметром cache (SalesHistoryCache) результаты берутся из кэша, пока история партнёра не изменилась
 """
 
+from datetime import date
+from typing import NamedTuple
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from db.models import Sale, SaleItem, Product
+from services.sales_history_cache import partner_sales_version
 
-def get_partner_sales(session: Session, partner_id: int):
-    # Возвращает список продаж по партнёру в удобном виде.
-    try:
-        rows = (
-            session.query(
-                Sale.sale_date,
-                Product.name,
-                SaleItem.quantity,
-            )
-            .join(SaleItem, SaleItem.sale_id == Sale.id)
-            .join(Product, Product.id == SaleItem.product_id)
-            .filter(Sale.partner_id == partner_id)
-            .order_by(Sale.sale_date.desc(), Product.name)
-            .all()
+# История длиннее этого числа строк при потоковом чтении (iter_partner_sales) в кэш не сохраняется:
+# иначе потоковое чтение всё равно держало бы её в памяти целиком
+CACHE_MAX_STREAMED_ROWS = 20_000
+
+
+class SalesHistoryRow(NamedTuple):
+    # Строка истории продаж; item_id (id строки продажи) делает порядок строк однозначным
+    sale_date: object
+    product_name: str
+    quantity: int
+    item_id: int
+
+
+class SalesHistoryPage(NamedTuple):
+    # Страница истории и курсор для запроса следующей (None — страниц больше нет)
+    items: list[SalesHistoryRow]
+    next_cursor: tuple | None
+
+
+class SalesHistoryFilter(NamedTuple):
+    """
+    Отбор строк истории продаж; незаданные (None) условия не применяются
+        date_from, date_to - период продаж, обе границы включаются
+        product_id         - одна продукция
+        product_type_id    - все продукции одного типа
+    """
+    date_from: date | None = None
+    date_to: date | None = None
+    product_id: int | None = None
+    product_type_id: int | None = None
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self)
+
+
+def apply_history_filter(query, history_filter: SalesHistoryFilter | None):
+    # Добавляет условия отбора в запрос истории (период ограничивает просмотр индекса sales по дате)
+    if history_filter is None:
+        return query
+    if history_filter.date_from is not None:
+        query = query.filter(Sale.sale_date >= history_filter.date_from)
+    if history_filter.date_to is not None:
+        query = query.filter(Sale.sale_date <= history_filter.date_to)
+    if history_filter.product_id is not None:
+        query = query.filter(SaleItem.product_id == history_filter.product_id)
+    if history_filter.product_type_id is not None:
+        query = query.filter(Product.product_type_id == history_filter.product_type_id)
+    return query
+
+
+def partner_sales_query(session: Session, partner_id: int, history_filter: SalesHistoryFilter | None = None):
+    # Запрос продаж партнёра: дата, продукция, количество (новые продажи первыми)
+    query = (
+        session.query(
+            Sale.sale_date,
+            Product.name,
+            SaleItem.quantity,
         )
-        return rows
+        .join(SaleItem, SaleItem.sale_id == Sale.id)
+        .join(Product, Product.id == SaleItem.product_id)
+        .filter(Sale.partner_id == partner_id)
+    )
+    # id строки продажи делает порядок однозначным (как в get_partner_sales_page)
+    return apply_history_filter(query, history_filter).order_by(Sale.sale_date.desc(), Product.name, SaleItem.id)
+
+def get_partner_sales(
+    session: Session,
+    partner_id: int,
+    history_filter: SalesHistoryFilter | None = None,
+    limit: int | None = None,
+    cache=None,
+):
+    # Возвращает список продаж по партнёру в удобном виде (с отбором и не более limit строк, если заданы)
+    try:
+        query = partner_sales_query(session, partner_id, history_filter)
+        if limit is not None:
+            query = query.limit(limit)
+        if cache is None:
+            return query.all()
+        return cache.get_or_load(session, partner_id, ("sales", partner_id, history_filter, limit), query.all)
     except Exception as e:
         print(f"Ошибка при получении истории продаж для партнёра id={partner_id}:", e)
         return []
+
+def iter_partner_sales(
+    session: Session,
+    partner_id: int,
+    history_filter: SalesHistoryFilter | None = None,
+    limit: int | None = None,
+    cache=None,
+    batch_size: int = 1000,
+):
+    """
+    Строки истории продаж партнёра по одной, в порядке partner_sales_query
+    Строки читаются из БД порциями batch_size через курсор на стороне сервера,
+    поэтому вся история в памяти не собирается
+    С cache (SalesHistoryCache) история, уже лежащая в кэше, отдаётся из памяти, а прочитанная
+    из БД сохраняется в кэш под тем же ключом, что и у get_partner_sales, если она не длиннее
+    CACHE_MAX_STREAMED_ROWS строк
+    Сессия должна оставаться открытой, пока строки не прочитаны до конца
+    """
+    key = ("sales", partner_id, history_filter, limit)
+    version = partner_sales_version(session, partner_id) if cache is not None else None
+    if version is None:
+        # без кэша или без таблицы версий в БД история читается из БД и не сохраняется
+        cache = None
+    else:
+        cached = cache.get(key, version)
+        if cached is not None:
+            yield from cached
+            return
+
+    query = partner_sales_query(session, partner_id, history_filter)
+    if limit is not None:
+        query = query.limit(limit)
+
+    collected = [] if cache is not None else None
+    for row in query.yield_per(batch_size):
+        if collected is not None:
+            collected.append(row)
+            if len(collected) > CACHE_MAX_STREAMED_ROWS:
+                collected = None
+        yield row
+    if collected is not None:
+        cache.put(key, partner_id, version, collected, len(collected))
+
+def get_products(session: Session) -> list[Product]:
+    # Список продукции для отбора истории продаж, по наименованию
+    try:
+        return session.query(Product).order_by(Product.name).all()
+    except Exception as e:
+        print("Ошибка при загрузке списка продукции:", e)
+        return []
+
+def get_partner_sales_count(
+    session: Session,
+    partner_id: int,
+    history_filter: SalesHistoryFilter | None = None,
+) -> int:
+    # Число строк истории продаж партнёра с отбором
+    return partner_sales_query(session, partner_id, history_filter).order_by(None).count()
+
+def get_partner_sales_page(
+    session: Session,
+    partner_id: int,
+    after: tuple | None = None,
+    limit: int = 200,
+    history_filter: SalesHistoryFilter | None = None,
+    cache=None,
+) -> SalesHistoryPage:
+    """
+    Одна страница истории продаж партнёра в порядке partner_sales_query без OFFSET (keyset-пагинация)
+    after - курсор next_cursor предыдущей страницы или None для первой
+    history_filter - отбор строк (SalesHistoryFilter) или None
+    cache - кэш истории продаж (SalesHistoryCache) или None
+    Стоимость запроса не зависит ни от номера страницы, ни от общего объёма истории партнёра:
+    строки читаются по индексу sales (partner_id, sale_date desc) до набора limit строк
+    """
+    query = (
+        session.query(Sale.sale_date, Product.name, SaleItem.quantity, SaleItem.id)
+        .join(SaleItem, SaleItem.sale_id == Sale.id)
+        .join(Product, Product.id == SaleItem.product_id)
+        .filter(Sale.partner_id == partner_id)
+    )
+    query = apply_history_filter(query, history_filter)
+    if after is not None:
+        sale_date, product_name, item_id = after
+        # Условие sale_date <= ... следует из OR ниже, но ограничивает просмотр индекса по дате
+        query = query.filter(Sale.sale_date <= sale_date, or_(
+            Sale.sale_date < sale_date,
+            and_(Sale.sale_date == sale_date, Product.name > product_name),
+            and_(Sale.sale_date == sale_date, Product.name == product_name, SaleItem.id > item_id),
+        ))
+
+    def load() -> SalesHistoryPage:
+        # Берём на одну строку больше, чтобы узнать, есть ли следующая страница
+        rows = query.order_by(Sale.sale_date.desc(), Product.name, SaleItem.id).limit(limit + 1).all()
+        items = [SalesHistoryRow(*row) for row in rows[:limit]]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = (last.sale_date, last.product_name, last.item_id)
+        return SalesHistoryPage(items, next_cursor)
+
+    if cache is None:
+        return load()
+    key = ("page", partner_id, history_filter, after, limit)
+    return cache.get_or_load(session, partner_id, key, load, size=lambda page: len(page.items))
@@ -0,0 +1,312 @@
+"""
+Сервис пакетного импорта продаж из выгрузок (CSV или JSON Lines)
+Строка выгрузки — одна позиция продажи:
+    inn       ИНН партнёра
+    article   артикул продукции
+    sale_date дата продажи (ГГГГ-ММ-ДД или ДД.ММ.ГГГГ)
+    quantity  количество
+    sale_ref  номер документа продажи (необязательно)
+Позиции с одинаковыми ИНН, датой и номером документа образуют одну продажу
+Продажи, которые уже есть в БД (загружены раньше, миграция 0005), пропускаются вместе с позициями,
+поэтому повторная загрузка того же файла не создаёт дублей
+Устройство:
+    файл читается потоково, ИНН и артикулы переводятся в id по словарям в памяти
+    (размер словарей зависит от справочников, а не от размера файла)
+    строки копятся пачками, пачка загружается командой COPY во временные таблицы
+    и переносится в sales и sale_items запросами INSERT ... SELECT; продажа с уже существующим
+    ключом (партнёр, дата, номер документа) не вставляется (ON CONFLICT DO NOTHING), а её позиции
+    добавляются, только если эту продажу создал тот же импорт (ключ повторился в файле не подряд)
+    сводка продаж партнёров обновляется триггерами БД (миграция 0002) один раз на пачку
+Весь файл загружается в одной транзакции: при ошибке БД не остаётся частично загруженных данных
+"""
+
+import csv
+import io
+import json
+import re
+import time
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from db.db import DB_SCHEMA
+
+# Строк выгрузки в одной пачке COPY
+DEFAULT_BATCH_SIZE = 10000
+
+# Сколько сообщений о пропущенных строках сохраняется в результате
+MAX_REPORTED_ERRORS = 20
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+
+_DMY_DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+
+
+class SalesImportResult(NamedTuple):
+    # Итог импорта
+    rows_read: int
+    sales_created: int
+    items_created: int
+    # Продажи, которые уже были в БД до загрузки (пропущены вместе с позициями)
+    sales_existing: int
+    rows_skipped: int
+    errors: list[str]
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds > 0 else 0.0
+
+
+def iter_csv_rows(path):
+    # Строки CSV-файла как словари; разделитель (; или ,) определяется по заголовку
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        header = file.readline()
+        delimiter = ";" if header.count(";") > header.count(",") else ","
+        fieldnames = [name.strip().lower() for name in next(csv.reader([header], delimiter=delimiter))]
+        yield from csv.DictReader(file, fieldnames=fieldnames, delimiter=delimiter)
+
+
+class InvalidImportRow(NamedTuple):
+    # Строка файла, которую не удалось прочитать; import_sales считает её пропущенной
+    message: str
+
+
+def iter_jsonl_rows(path):
+    """
+    Строки файла JSON Lines как словари (пустые строки пропускаются)
+    Вместо строки с неверным JSON отдаётся InvalidImportRow с номером строки файла
+    """
+    with open(path, encoding="utf-8-sig") as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield InvalidImportRow(f"неверный JSON (строка файла {line_number}): {e.msg}")
+
+
+def iter_import_rows(path, file_format: str | None = None):
+    # Строки выгрузки; формат определяется по расширению файла, если не задан явно
+    file_format = file_format or (FORMAT_JSONL if Path(path).suffix.lower() in (".jsonl", ".json", ".ndjson") else FORMAT_CSV)
+    if file_format == FORMAT_CSV:
+        return iter_csv_rows(path)
+    if file_format == FORMAT_JSONL:
+        return iter_jsonl_rows(path)
+    raise ValueError(f"Неизвестный формат выгрузки: {file_format}")
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_text(value: str) -> date:
+    # Даты в выгрузке повторяются, поэтому разобранные значения кэшируются: разбор текста
+    # (fromisoformat или регулярное выражение для ДД.ММ.ГГГГ) выполняется один раз на дату
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pass
+    match = _DMY_DATE_RE.fullmatch(value)
+    if match is not None:
+        day, month, year = map(int, match.groups())
+        try:
+            return date(year, month, day)
+        except ValueError:
+            pass
+    raise ValueError(f"неверная дата «{value}»")
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return _parse_date_text(str(value).strip())
+
+
+def _parse_quantity(value) -> int:
+    try:
+        quantity = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"неверное количество «{value}»") from None
+    if quantity <= 0:
+        raise ValueError("количество должно быть больше нуля")
+    return quantity
+
+
+def _lookup_maps(session: Session) -> tuple[dict, dict]:
+    # Словари ИНН -> id партнёра и артикул -> id продукции
+    partners = dict(session.execute(text(f"SELECT inn, id FROM {DB_SCHEMA}.partners")).all())
+    products = dict(session.execute(text(f"SELECT article, id FROM {DB_SCHEMA}.products")).all())
+    return partners, products
+
+
+def _create_staging(session: Session) -> None:
+    # Временные таблицы для пачек COPY и id продаж, созданных импортом (видны только этому соединению)
+    session.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS import_sales "
+        "(id bigint NOT NULL, partner_id bigint NOT NULL, sale_date date NOT NULL, sale_ref text NOT NULL, "
+        "target_id bigint) ON COMMIT DROP"
+    ))
+    session.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS import_sale_items "
+        "(sale_id bigint NOT NULL, product_id bigint NOT NULL, quantity integer NOT NULL) ON COMMIT DROP"
+    ))
+    session.execute(text("CREATE TEMP TABLE IF NOT EXISTS import_created (id bigint PRIMARY KEY) ON COMMIT DROP"))
+    session.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS import_existing "
+        "(partner_id bigint, sale_date date, sale_ref text, PRIMARY KEY (partner_id, sale_date, sale_ref)) ON COMMIT DROP"
+    ))
+    # Несколько импортов в одной транзакции: продажи прошлого импорта для этого — уже существующие
+    session.execute(text("TRUNCATE import_created, import_existing"))
+
+
+def _copy(cursor, table: str, columns: str, rows: list[tuple], force_not_null: str = "") -> None:
+    # Загружает строки в столбцы таблицы командой COPY (формат CSV; пустое поле — NULL,
+    # кроме столбцов force_not_null, где это пустая строка)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    buffer.seek(0)
+    options = f", FORCE_NOT_NULL ({force_not_null})" if force_not_null else ""
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv{options})", buffer)
+
+
+def _flush(session: Session, sales: list[tuple], items: list[tuple]) -> tuple[int, int, int]:
+    """
+    Переносит пачку в sales и sale_items: COPY во временные таблицы и INSERT ... SELECT
+    id продаж заранее выданы последовательностью sales_id_seq, id позиций — по умолчанию
+    Возвращает (продаж создано, позиций создано, продаж уже было в БД)
+    """
+    if not items:
+        return 0, 0, 0
+    cursor = session.connection().connection.dbapi_connection.cursor()
+    try:
+        _copy(cursor, "import_sales", "id, partner_id, sale_date, sale_ref", sales, force_not_null="sale_ref")
+        _copy(cursor, "import_sale_items", "sale_id, product_id, quantity", items)
+    finally:
+        cursor.close()
+
+    # Новые продажи; id вставленных запоминаются как созданные этим импортом
+    sales_created = session.execute(text(
+        "WITH inserted AS ("
+        f"INSERT INTO {DB_SCHEMA}.sales (id, partner_id, sale_date, sale_ref) "
+        "SELECT id, partner_id, sale_date, sale_ref FROM import_sales "
+        "ON CONFLICT (partner_id, sale_date, sale_ref) DO NOTHING "
+        "RETURNING id) "
+        "INSERT INTO import_created (id) SELECT id FROM inserted"
+    )).rowcount
+    # Продажа пачки -> продажа с тем же ключом, созданная этим импортом (в этой или прошлой пачке);
+    # у продаж, которые были в БД до импорта, target_id остаётся пустым
+    session.execute(text(
+        f"UPDATE import_sales AS s SET target_id = e.id FROM {DB_SCHEMA}.sales AS e "
+        "JOIN import_created AS c ON c.id = e.id "
+        "WHERE e.partner_id = s.partner_id AND e.sale_date = s.sale_date AND e.sale_ref = s.sale_ref"
+    ))
+    items_created = session.execute(text(
+        f"INSERT INTO {DB_SCHEMA}.sale_items (sale_id, product_id, quantity) "
+        "SELECT s.target_id, i.product_id, i.quantity "
+        "FROM import_sale_items AS i JOIN import_sales AS s ON s.id = i.sale_id "
+        "WHERE s.target_id IS NOT NULL"
+    )).rowcount
+    # Ключи пропущенных продаж запоминаются, чтобы продажа, встреченная в файле повторно, считалась один раз
+    sales_existing = session.execute(text(
+        "INSERT INTO import_existing (partner_id, sale_date, sale_ref) "
+        "SELECT partner_id, sale_date, sale_ref FROM import_sales WHERE target_id IS NULL "
+        "ON CONFLICT DO NOTHING"
+    )).rowcount
+    session.execute(text("TRUNCATE import_sales, import_sale_items"))
+    return sales_created, items_created, sales_existing
+
+
+def _sale_ids(session: Session, count: int) -> list[int]:
+    # Выделяет id для новых продаж одной командой
+    return list(session.execute(
+        text(f"SELECT nextval('{DB_SCHEMA}.sales_id_seq') FROM generate_series(1, :count)"),
+        {"count": count},
+    ).scalars())
+
+
+def import_sales(session: Session, rows, batch_size: int = DEFAULT_BATCH_SIZE, progress=None) -> SalesImportResult:
+    """
+    Загружает позиции продаж из итератора строк (словарей) в sales и sale_items
+    Продажи, уже загруженные в БД раньше, пропускаются (SalesImportResult.sales_existing)
+    Строки с неизвестным ИНН или артикулом, с неверными датой или количеством
+    и нечитаемые строки файла (InvalidImportRow) пропускаются,
+    первые MAX_REPORTED_ERRORS сообщений о них возвращаются в результате
+    progress(rows_read) вызывается после каждой загруженной пачки
+    Транзакцию фиксирует вызывающий код (unit_of_work)
+    """
+    started = time.perf_counter()
+    partners, products = _lookup_maps(session)
+    _create_staging(session)
+
+    rows_read = rows_skipped = sales_created = items_created = sales_existing = 0
+    errors: list[str] = []
+
+    # Позиции текущей пачки: (ключ продажи, id партнёра, дата, id продукции, количество)
+    pending: list[tuple] = []
+
+    def flush() -> None:
+        nonlocal sales_created, items_created, sales_existing
+        if not pending:
+            return
+        # Подряд идущие позиции с одинаковым ключом — одна продажа пачки: считаем смены ключа
+        # (продажа, продолженная в следующей пачке, получает там новый id и соединяется
+        # с уже созданной по ключу в _flush)
+        new_sales = 0
+        previous = None
+        for key, *_ in pending:
+            if key != previous:
+                new_sales += 1
+                previous = key
+        ids = iter(_sale_ids(session, new_sales))
+
+        sales, items = [], []
+        last_key = last_sale_id = None
+        for key, partner_id, sale_date, product_id, quantity in pending:
+            if key != last_key:
+                last_key, last_sale_id = key, next(ids)
+                sales.append((last_sale_id, partner_id, sale_date.isoformat(), key[2]))
+            items.append((last_sale_id, product_id, quantity))
+
+        created, items_added, existing = _flush(session, sales, items)
+        sales_created += created
+        items_created += items_added
+        sales_existing += existing
+        pending.clear()
+        if progress is not None:
+            progress(rows_read)
+
+    for row in rows:
+        rows_read += 1
+        try:
+            if isinstance(row, InvalidImportRow):
+                raise ValueError(row.message)
+            inn = str(row.get("inn") or "").strip()
+            article = str(row.get("article") or "").strip()
+            partner_id = partners.get(inn)
+            if partner_id is None:
+                raise ValueError(f"партнёр с ИНН «{inn}» не найден")
+            product_id = products.get(article)
+            if product_id is None:
+                raise ValueError(f"продукция с артикулом «{article}» не найдена")
+            sale_date = _parse_date(row.get("sale_date"))
+            quantity = _parse_quantity(row.get("quantity"))
+        except (ValueError, AttributeError) as e:
+            rows_skipped += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"строка {rows_read}: {e}")
+            continue
+
+        key = (partner_id, sale_date, str(row.get("sale_ref") or "").strip())
+        pending.append((key, partner_id, sale_date, product_id, quantity))
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    return SalesImportResult(
+        rows_read, sales_created, items_created, sales_existing, rows_skipped, errors, time.perf_counter() - started,
+    )
@@ -0,0 +1,22 @@
+"""
+Сервис сводки продаж партнёров (partner_sales_summary)
+Сводка поддерживается триггерами БД (миграция 0002_sales_summary_triggers) в той же транзакции,
+что и изменения sales / sale_items. Полный пересчёт нужен только для восстановления сводки,
+например после загрузки данных в обход триггеров
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from db.db import DB_SCHEMA
+
+
+def rebuild_sales_summary(session: Session) -> int:
+    """
+    Пересчитывает сводку по всем партнёрам одним запросом (функция БД rebuild_sales_summary)
+    На время пересчёта изменения продаж блокируются, чтобы не потерять изменения,
+    сделанные между подсчётом сумм и записью сводки
+    Возвращает количество изменённых строк сводки; транзакцию фиксирует вызывающий код
+    """
+    session.execute(text(f"LOCK TABLE {DB_SCHEMA}.sales, {DB_SCHEMA}.sale_items IN SHARE MODE"))
+    return session.execute(text(f"SELECT {DB_SCHEMA}.rebuild_sales_summary()")).scalar()
@@ -0,0 +1,42 @@
+"""
+Короткие сессии БД на одну операцию (unit of work)
+Вместо одной сессии на всё время работы приложения каждая операция открывает свою сессию:
+    unit_of_work — изменение данных: фиксация при успехе, откат при ошибке
+    read_session — чтение (списки, справочники, отчёты): транзакция только для чтения
+После выхода из блока сессия закрывается, и её карта объектов освобождается,
+поэтому расход памяти не растёт за время работы приложения
+Объекты, полученные в блоке, остаются доступными после его завершения (expire_on_commit=False):
+читать можно уже загруженные атрибуты, ленивые связи нужно загружать внутри блока
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy.orm import Session
+
+
+@contextmanager
+def unit_of_work(session_factory):
+    # Сессия для изменения данных: commit по завершении блока, rollback при исключении
+    session: Session = session_factory()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+@contextmanager
+def read_session(session_factory):
+    # Сессия только для чтения: в PostgreSQL транзакция открывается как READ ONLY
+    session: Session = session_factory()
+    try:
+        if session.get_bind().dialect.name == "postgresql":
+            # Режим задаётся драйверу и уходит вместе с BEGIN, без отдельного запроса
+            session.connection(execution_options={"postgresql_readonly": True})
+        yield session
+    finally:
+        # Изменений нет: транзакция просто завершается вместе с сессией
+        session.close()
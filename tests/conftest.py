@@ -0,0 +1,33 @@
+"""
+Общие фикстуры тестов
+Тесты с базой данных выполняются на PostgreSQL со схемой partner_module (с применёнными миграциями),
+адрес которой задан переменной окружения PARTNER_DB_URI; без неё такие тесты пропускаются
+Каждый тест работает в своей транзакции, которая откатывается после теста: данные в БД не остаются
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.db import PROFILE_BATCH, get_engine
+
+
+@pytest.fixture
+def db_session():
+    # Сессия в транзакции, откатываемой после теста
+    if not os.environ.get("PARTNER_DB_URI"):
+        pytest.skip("База данных не задана (PARTNER_DB_URI)")
+    connection = get_engine(PROFILE_BATCH).connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, autoflush=False, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
@@ -0,0 +1,96 @@
+"""
+План запроса истории продаж партнёра на большом объёме данных использует индексы
+sales по партнёру и sale_items по продаже, а не полный просмотр таблиц
+Данные генерируются в транзакции теста и откатываются после него:
+1 000 000 строк sale_items (250 000 продаж) у 2000 партнёров;
+объём можно уменьшить переменной окружения PARTNER_EXPLAIN_ITEMS
+"""
+
+import json
+import os
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from db.db import DB_SCHEMA
+from db.migrate import migration_status
+from services.sales_history_service import partner_sales_query
+
+# Объём сгенерированных данных: строк sale_items, партнёров и строк на одну продажу
+ITEM_COUNT = int(os.environ.get("PARTNER_EXPLAIN_ITEMS", 1_000_000))
+PARTNER_COUNT = 2000
+ITEMS_PER_SALE = 4
+
+# Индексы sales с ведущими столбцами (partner_id, sale_date): планировщик выбирает любой из них
+PARTNER_SALES_INDEXES = {"sales_partner_id_sale_date_idx", "sales_partner_id_sale_date_sale_ref_key"}
+
+
+def _generate(connection, item_count: int, partner_count: int, items_per_sale: int) -> int:
+    # Генерирует партнёров, продажи и их строки; возвращает id партнёра, у которого есть продажи
+    type_id = connection.execute(text(f"SELECT min(id) FROM {DB_SCHEMA}.partner_types")).scalar()
+    product_ids = connection.execute(text(f"SELECT array_agg(id ORDER BY id) FROM {DB_SCHEMA}.products")).scalar()
+    if type_id is None or not product_ids:
+        raise RuntimeError("Для генерации продаж в БД нужны типы партнёров и продукция.")
+
+    partner_base = connection.execute(text(f"SELECT coalesce(max(id), 0) FROM {DB_SCHEMA}.partners")).scalar()
+    partner_ids = connection.execute(text(
+        f"INSERT INTO {DB_SCHEMA}.partners (id, partner_type_id, name, director_full_name, legal_address, inn, rating) "
+        "SELECT :partner_base + g, :type_id, 'Тестовый партнёр ' || g, 'Директор ' || g, 'Адрес', "
+        "'9' || lpad(g::text, 11, '0'), g % 11 "
+        "FROM generate_series(1, :partner_count) AS g "
+        "RETURNING id"
+    ), {"partner_base": partner_base, "type_id": type_id, "partner_count": partner_count}).scalars().all()
+
+    sale_count = max(1, item_count // items_per_sale)
+    sale_base = connection.execute(text(f"SELECT coalesce(max(id), 0) FROM {DB_SCHEMA}.sales")).scalar()
+    item_base = connection.execute(text(f"SELECT coalesce(max(id), 0) FROM {DB_SCHEMA}.sale_items")).scalar()
+
+    connection.execute(text(
+        f"INSERT INTO {DB_SCHEMA}.sales (id, partner_id, sale_date) "
+        "SELECT :sale_base + g, (:partners)[1 + g % cardinality(:partners)], "
+        "date '2015-01-01' + (g % 3650) "
+        "FROM generate_series(1, :sale_count) AS g"
+    ), {"sale_base": sale_base, "partners": partner_ids, "sale_count": sale_count})
+    connection.execute(text(
+        f"INSERT INTO {DB_SCHEMA}.sale_items (id, sale_id, product_id, quantity) "
+        "SELECT :item_base + g, :sale_base + 1 + (g % :sale_count), "
+        "(:products)[1 + g % cardinality(:products)], 1 + g % 500 "
+        "FROM generate_series(1, :item_count) AS g"
+    ), {
+        "item_base": item_base, "sale_base": sale_base, "sale_count": sale_count,
+        "products": product_ids, "item_count": item_count,
+    })
+    connection.execute(text(f"ANALYZE {DB_SCHEMA}.partners"))
+    connection.execute(text(f"ANALYZE {DB_SCHEMA}.sales"))
+    connection.execute(text(f"ANALYZE {DB_SCHEMA}.sale_items"))
+    return partner_ids[0]
+
+
+def _walk(node: dict):
+    # Все узлы плана EXPLAIN (FORMAT JSON)
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _walk(child)
+
+
+def test_partner_history_plan_uses_indexes(db_session):
+    pending = [status.migration.path.name for status in migration_status() if status.applied_at is None]
+    assert not pending, f"Не применены миграции (python manage.py migrate): {', '.join(pending)}"
+
+    connection = db_session.connection()
+    partner_id = _generate(connection, ITEM_COUNT, PARTNER_COUNT, ITEMS_PER_SALE)
+
+    query = partner_sales_query(db_session, partner_id)
+    sql = str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = connection.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(_walk(plan[0]["Plan"]))
+
+    # (тип узла, таблица или индекс) — для сообщения об ошибке
+    scans = [(node["Node Type"], node.get("Relation Name") or node.get("Index Name")) for node in nodes]
+    assert plan[0]["Plan"]["Actual Rows"] > 0
+    assert not [node for node in nodes if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in ("sales", "sale_items")], scans
+    index_names = {node.get("Index Name") for node in nodes}
+    assert index_names & PARTNER_SALES_INDEXES, scans
+    assert "sale_items_sale_id_idx" in index_names, scans
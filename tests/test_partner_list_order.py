@@ -0,0 +1,52 @@
+"""
+Порядок списка партнёров в БД совпадает с порядком карточек в модели главного окна
+"""
+
+import pytest
+
+from db.models import Partner, PartnerType
+from services.partner_service import ORDER_BY_RATING, get_partner_page, iter_partner_list, partner_sort_key
+from ui.partner_list_model import PartnerListModel
+
+# Наименования, порядок которых зависит от правила сортировки: регистр букв, «ё», латиница
+NAMES = ["ёлка", "Ёлка", "Елена", "елена", "Жук", "алмаз", "Алмаз", "Яхонт", "яхонт", "Apex", "apex", "Ель"]
+
+
+@pytest.fixture
+def named_partners(db_session):
+    # Тестовые партнёры с наименованиями NAMES и одним рейтингом
+    partner_type = db_session.query(PartnerType).order_by(PartnerType.id).first()
+    if partner_type is None:
+        partner_type = PartnerType(name="Тестовый тип")
+    for number, name in enumerate(NAMES):
+        db_session.add(Partner(
+            partner_type=partner_type,
+            name=name,
+            director_full_name="Тестов Тест Тестович",
+            legal_address="Тестовый адрес",
+            inn=f"99{number:08d}",
+            rating=5,
+        ))
+    db_session.flush()
+    return db_session
+
+
+def test_partner_list_order_matches_model_key(named_partners):
+    # маленькие страницы: курсор проходит через строки с «ё» и разным регистром
+    items = [item for chunk in iter_partner_list(named_partners, ORDER_BY_RATING, first_chunk=3, chunk_size=3) for item in chunk]
+
+    assert len({item.id for item in items}) == len(items)
+    assert items == sorted(items, key=partner_sort_key)
+
+
+def test_model_covers_matches_loaded_page(named_partners):
+    # Загруженная часть модели — строки первой страницы, остальные придут со следующими
+    items = get_partner_page(named_partners, ORDER_BY_RATING, None, 10**6).items
+    first_page = get_partner_page(named_partners, ORDER_BY_RATING, None, len(items) // 2)
+
+    model = PartnerListModel()
+    model.append_items(first_page.items)
+    model.set_has_more(first_page.next_cursor is not None)
+
+    loaded = {item.id for item in first_page.items}
+    assert [item.id for item in items if model.covers(item)] == [item.id for item in items if item.id in loaded]
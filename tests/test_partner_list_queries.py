@@ -0,0 +1,71 @@
+"""
+Число запросов при загрузке списка партнёров не зависит от числа партнёров
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from db.models import Partner, PartnerContact, PartnerType
+from services.partner_service import get_partner_page
+
+# Префикс ИНН тестовых партнёров (в рабочих данных таких ИНН нет)
+TEST_INN_PREFIX = "99"
+
+
+@contextmanager
+def count_statements(session):
+    # Считает SQL-запросы, отправленные соединением сессии
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    connection = session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+
+def add_partners(session, count: int, start: int = 0) -> None:
+    # Тестовые партнёры с контактом у каждого второго
+    partner_type = session.query(PartnerType).order_by(PartnerType.id).first()
+    if partner_type is None:
+        partner_type = PartnerType(name="Тестовый тип")
+        session.add(partner_type)
+    for number in range(start, start + count):
+        partner = Partner(
+            partner_type=partner_type,
+            name=f"Тест партнёр {number}",
+            director_full_name="Тестов Тест Тестович",
+            legal_address="Тестовый адрес",
+            inn=f"{TEST_INN_PREFIX}{number:08d}",
+            rating=number % 11,
+        )
+        if number % 2 == 0:
+            partner.contacts.append(PartnerContact(email=f"p{number}@test.ru", phone="9001234567"))
+        session.add(partner)
+    session.flush()
+
+
+def load_partner_list(session) -> tuple[int, int]:
+    # Загружает весь список одной страницей; возвращает (строк, запросов)
+    total = session.query(Partner).count()
+    session.expunge_all()
+    with count_statements(session) as statements:
+        page = get_partner_page(session, limit=total)
+    return len(page.items), len(statements)
+
+
+def test_partner_list_query_count_does_not_grow(db_session):
+    count = 20
+    add_partners(db_session, count)
+    rows_small, queries_small = load_partner_list(db_session)
+
+    add_partners(db_session, count * 9, start=count)
+    rows_large, queries_large = load_partner_list(db_session)
+
+    assert rows_large - rows_small == count * 9
+    assert queries_small == queries_large == 1
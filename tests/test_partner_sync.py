@@ -0,0 +1,42 @@
+"""
+Пакетная загрузка партнёров: ИНН записывается цифрами, ошибка БД в строке не отменяет остальные строки порции
+"""
+
+from db.models import Partner, PartnerType
+from services.partner_sync_service import STATUS_CREATED, STATUS_ERROR, upsert_partners
+
+
+def _row(inn: str, name: str, partner_type: str) -> dict:
+    return {
+        "partner_type": partner_type,
+        "name": name,
+        "director_full_name": "Тестов Тест Тестович",
+        "legal_address": "Тестовый адрес",
+        "inn": inn,
+        "email": "test@test.ru",
+        "phone": "+7 900 123 45 67",
+        "rating": 5,
+    }
+
+
+def test_upsert_normalises_inn_and_isolates_row_errors(db_session):
+    partner_type = db_session.query(PartnerType).order_by(PartnerType.id).first()
+    if partner_type is None:
+        partner_type = PartnerType(name="Тестовый тип")
+        db_session.add(partner_type)
+        db_session.flush()
+
+    rows = [
+        # ИНН с разделителями длиннее столбца inn (12 символов), но из 12 цифр
+        _row("9901-2345-6789", "Партнёр с ИНН через дефисы", partner_type.name),
+        # наименование длиннее столбца name: ошибка БД только у этой строки
+        _row("990000000002", "Н" * 300, partner_type.name),
+        _row("990000000003", "Обычный партнёр", partner_type.name),
+    ]
+
+    results = upsert_partners(db_session, rows, chunk_size=10)
+
+    assert [result.status for result in results] == [STATUS_CREATED, STATUS_ERROR, STATUS_CREATED]
+    assert results[0].inn == "990123456789"
+    assert results[1].error
+    assert db_session.query(Partner).filter(Partner.inn.in_(["990123456789", "990000000003"])).count() == 2
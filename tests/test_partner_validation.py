@@ -0,0 +1,151 @@
+"""
+Проверка данных партнёров (без БД):
+    validate_partner_columns выдаёт код каждого нарушенного правила
+    validate_partner_data принимает и отклоняет те же данные, что и прежняя проверка диалога
+"""
+
+import re
+
+import pytest
+
+from services.partner_service import validate_partner_data
+from services.partner_validation import (
+    CODE_EMAIL_FORMAT, CODE_INN_LENGTH, CODE_PHONE_LENGTH, CODE_PHONE_PREFIX, CODE_RATING_RANGE, CODE_REQUIRED,
+    FIELD_DIRECTOR, FIELD_EMAIL, FIELD_INN, FIELD_LEGAL_ADDRESS, FIELD_NAME, FIELD_PHONE, FIELD_RATING,
+    FieldError, rows_to_columns, validate_partner_columns,
+)
+
+VALID = {
+    "name": "ООО Ромашка",
+    "director_full_name": "Иванов Иван Иванович",
+    "legal_address": "г. Москва, ул. Ленина, 1",
+    "inn": "7701234567",
+    "email": "info@romashka.ru",
+    "phone": "+7 9161234567",
+    "rating": 5,
+}
+
+
+def _errors(**changes) -> list[FieldError]:
+    result = validate_partner_columns(rows_to_columns([dict(VALID, **changes)]))
+    return result.errors.get(0, [])
+
+
+def test_valid_row_has_no_errors():
+    result = validate_partner_columns(rows_to_columns([VALID, dict(VALID, inn="770123456789", email="")]))
+    assert result.errors == {}
+    assert result.row_count == 2
+
+
+@pytest.mark.parametrize("changes, expected", [
+    ({"name": "  "}, [FieldError(FIELD_NAME, CODE_REQUIRED)]),
+    ({"director_full_name": None}, [FieldError(FIELD_DIRECTOR, CODE_REQUIRED)]),
+    ({"legal_address": ""}, [FieldError(FIELD_LEGAL_ADDRESS, CODE_REQUIRED)]),
+    ({"inn": ""}, [FieldError(FIELD_INN, CODE_REQUIRED)]),
+    ({"inn": "77012345"}, [FieldError(FIELD_INN, CODE_INN_LENGTH)]),
+    ({"inn": "77 0123 4567 8"}, [FieldError(FIELD_INN, CODE_INN_LENGTH)]),
+    ({"email": "info@romashka"}, [FieldError(FIELD_EMAIL, CODE_EMAIL_FORMAT)]),
+    ({"email": "info romashka@mail.ru"}, [FieldError(FIELD_EMAIL, CODE_EMAIL_FORMAT)]),
+    ({"phone": ""}, [FieldError(FIELD_PHONE, CODE_REQUIRED)]),
+    ({"phone": "+7 916123456"}, [FieldError(FIELD_PHONE, CODE_PHONE_LENGTH)]),
+    ({"phone": "+7 91612345678"}, [FieldError(FIELD_PHONE, CODE_PHONE_LENGTH)]),
+    # номер без +7 нарушает и правило начала, и правило длины
+    ({"phone": "89161234567"}, [FieldError(FIELD_PHONE, CODE_PHONE_PREFIX), FieldError(FIELD_PHONE, CODE_PHONE_LENGTH)]),
+    ({"phone": "9161234567"}, [FieldError(FIELD_PHONE, CODE_PHONE_PREFIX), FieldError(FIELD_PHONE, CODE_PHONE_LENGTH)]),
+    ({"rating": 11}, [FieldError(FIELD_RATING, CODE_RATING_RANGE)]),
+    ({"rating": -1}, [FieldError(FIELD_RATING, CODE_RATING_RANGE)]),
+    ({"rating": None}, [FieldError(FIELD_RATING, CODE_RATING_RANGE)]),
+])
+def test_each_rule_reports_its_code(changes, expected):
+    assert _errors(**changes) == expected
+
+
+def test_row_errors_follow_field_order():
+    errors = _errors(name="", inn="123", phone="123", rating=20)
+    assert errors == [
+        FieldError(FIELD_NAME, CODE_REQUIRED),
+        FieldError(FIELD_INN, CODE_INN_LENGTH),
+        FieldError(FIELD_PHONE, CODE_PHONE_PREFIX),
+        FieldError(FIELD_PHONE, CODE_PHONE_LENGTH),
+        FieldError(FIELD_RATING, CODE_RATING_RANGE),
+    ]
+    assert all(error.message for error in errors)
+
+
+def _dialog_errors(data: dict) -> list[str]:
+    # Прежняя проверка диалога (до перевода validate_partner_data на пакетную проверку)
+    errors: list[str] = []
+
+    name = (data.get("name") or "").strip()
+    director = (data.get("director_full_name") or "").strip()
+    legal_address = (data.get("legal_address") or "").strip()
+    inn = (data.get("inn") or "").strip()
+    email = (data.get("email") or "").strip()
+    phone_raw = (data.get("phone") or "").strip()
+    rating = data.get("rating")
+
+    if not name:
+        errors.append("Наименование партнёра не заполнено.")
+    if not director:
+        errors.append("ФИО директора не заполнено.")
+    if not legal_address:
+        errors.append("Юридический адрес не заполнен.")
+
+    if not inn:
+        errors.append("ИНН не заполнен.")
+    else:
+        digits_inn = "".join(ch for ch in inn if ch.isdigit())
+        if len(digits_inn) not in (10, 12):
+            errors.append("ИНН должен содержать 10 или 12 цифр.")
+
+    if email:
+        if not re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email):
+            errors.append("Электронная почта указана некорректно (формат: имя@домен.зона).")
+
+    if not phone_raw:
+        errors.append("Телефон не заполнен.")
+    else:
+        if not phone_raw.startswith("+7"):
+            errors.append("Телефон должен начинаться с +7.")
+        digits_phone = "".join(ch for ch in phone_raw if ch.isdigit())
+        if len(digits_phone) != 11 or not digits_phone.startswith("7"):
+            errors.append("Телефон должен содержать ровно 10 цифр после +7.")
+
+    if rating is None or not (0 <= rating <= 10):
+        errors.append("Рейтинг должен быть в диапазоне от 0 до 10.")
+    return errors
+
+
+@pytest.mark.parametrize("changes", [
+    {},
+    {"inn": "770123456789"},
+    {"inn": " 7701-234-567 "},
+    {"inn": "77012345678"},
+    {"inn": None},
+    {"email": None},
+    {"email": "  "},
+    {"email": "a@b.c"},
+    {"email": "a@@b.c"},
+    {"email": "@b.c"},
+    {"phone": "+79161234567"},
+    {"phone": "+7 (916) 123-45-67"},
+    {"phone": " +7 9161234567 "},
+    {"phone": "+8 9161234567"},
+    {"phone": "+7 8161234567"},
+    {"phone": "+77 9161234567"},
+    {"phone": "7 9161234567"},
+    {"phone": None},
+    {"rating": 0},
+    {"rating": 10},
+    {"rating": 11},
+    {"name": "", "director_full_name": " ", "legal_address": None, "inn": "", "phone": "", "rating": None},
+])
+def test_validate_partner_data_matches_dialog_rules(changes):
+    data = dict(VALID, **changes)
+    expected = _dialog_errors(data)
+    if not expected:
+        validate_partner_data(data)
+        return
+    with pytest.raises(ValueError) as error:
+        validate_partner_data(data)
+    assert str(error.value) == "\n".join(expected)
@@ -0,0 +1,131 @@
+"""
+Кэш истории продаж:
+    вытеснение давно не использованных записей по объёму в строках, счётчики,
+    сброс записи при смене версии и всех записей партнёра (без БД)
+    после добавления строки продажи триггер миграции 0003 меняет версию, и запись читается заново
+    история продаж в базе без таблицы версий (миграция 0003 не применена) читается без кэша
+"""
+
+import pytest
+from sqlalchemy import func, text
+
+from db.models import Sale, SaleItem
+import services.sales_history_cache as sales_history_cache
+from services.sales_history_cache import CacheStats, SalesHistoryCache
+from services.sales_history_service import get_partner_sales, get_partner_sales_page, iter_partner_sales
+
+
+def test_put_evicts_least_recently_used_by_rows():
+    cache = SalesHistoryCache(max_rows=10)
+    cache.put("a", 1, 0, "A", 4)
+    cache.put("b", 2, 0, "B", 4)
+    assert cache.get("a", 0) == "A"
+
+    # на "c" не хватает места: вытесняется "b", к которой обращались раньше всех
+    cache.put("c", 3, 0, "C", 5)
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == "A"
+    assert cache.get("c", 0) == "C"
+    assert cache.stats().rows == 9
+
+    # значение больше всего кэша не сохраняется и ничего не вытесняет
+    cache.put("d", 4, 0, "D", 11)
+    assert cache.get("d", 0) is None
+    assert cache.stats().entries == 2
+
+
+def test_stats_count_hits_misses_and_evictions():
+    cache = SalesHistoryCache(max_rows=3)
+    assert cache.get("a", 0) is None
+    cache.put("a", 1, 0, "A", 2)
+    assert cache.get("a", 0) == "A"
+    assert cache.get("a", 0) == "A"
+    cache.put("b", 2, 0, "B", 2)
+
+    stats = cache.stats()
+    assert stats == CacheStats(hits=2, misses=1, evictions=1, entries=1, rows=2)
+    assert stats.hit_ratio == pytest.approx(2 / 3)
+
+
+def test_version_mismatch_drops_entry(monkeypatch):
+    versions = {1: 0}
+    monkeypatch.setattr(sales_history_cache, "partner_sales_version", lambda session, partner_id: versions[partner_id])
+    cache = SalesHistoryCache()
+    loads = []
+
+    def load():
+        loads.append(versions[1])
+        return [("row", versions[1])]
+
+    assert cache.get_or_load(None, 1, "a", load) == [("row", 0)]
+    assert cache.get_or_load(None, 1, "a", load) == [("row", 0)]
+    assert loads == [0]
+
+    # версия партнёра изменилась: запись устарела и выбирается заново
+    versions[1] = 1
+    assert cache.get_or_load(None, 1, "a", load) == [("row", 1)]
+    assert loads == [0, 1]
+
+    # запись старой версии удаляется при обращении с новой
+    cache.put("b", 1, 0, "B", 1)
+    assert cache.get("b", 1) is None
+    assert cache.stats().entries == 1
+
+
+def test_invalidate_partner_drops_only_its_entries():
+    cache = SalesHistoryCache()
+    cache.put("a1", 1, 0, "A1", 2)
+    cache.put("a2", 1, 0, "A2", 3)
+    cache.put("b", 2, 0, "B", 4)
+
+    cache.invalidate_partner(1)
+    cache.invalidate_partner(3)
+
+    assert cache.get("a1", 0) is None
+    assert cache.get("a2", 0) is None
+    assert cache.get("b", 0) == "B"
+    assert cache.stats().rows == 4
+
+
+def test_new_sale_item_invalidates_cached_history(db_session, monkeypatch):
+    sale = db_session.query(Sale).order_by(Sale.id).first()
+    if sale is None:
+        pytest.skip("В базе данных нет продаж")
+    monkeypatch.setattr(sales_history_cache, "_versions_available", {})
+    if sales_history_cache.partner_sales_version(db_session, sale.partner_id) is None:
+        pytest.skip("В базе данных нет таблицы версий истории продаж (миграция 0003)")
+    cache = SalesHistoryCache()
+
+    def load():
+        return get_partner_sales(db_session, sale.partner_id, limit=20)
+
+    cache.get_or_load(db_session, sale.partner_id, "history", load)
+    cache.get_or_load(db_session, sale.partner_id, "history", load)
+    assert cache.stats().hits == 1
+
+    # строка добавляется в транзакции теста и после него убирается откатом
+    item_id = db_session.query(func.coalesce(func.max(SaleItem.id), 0)).scalar() + 1
+    product_id = db_session.query(SaleItem.product_id).filter(SaleItem.sale_id == sale.id).limit(1).scalar()
+    db_session.add(SaleItem(id=item_id, sale_id=sale.id, product_id=product_id, quantity=1))
+    db_session.flush()
+
+    cache.get_or_load(db_session, sale.partner_id, "history", load)
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+
+
+def test_history_without_versions_table_is_read_uncached(db_session, monkeypatch):
+    partner_id = db_session.query(Sale.partner_id).limit(1).scalar()
+    if partner_id is None:
+        pytest.skip("В базе данных нет продаж")
+    expected = get_partner_sales(db_session, partner_id, limit=20)
+
+    # таблица удаляется в транзакции теста и после него возвращается откатом
+    db_session.execute(text("DROP TABLE partner_module.partner_sales_versions CASCADE"))
+    monkeypatch.setattr(sales_history_cache, "_versions_available", {})
+    cache = SalesHistoryCache()
+
+    assert get_partner_sales(db_session, partner_id, limit=20, cache=cache) == expected
+    assert list(iter_partner_sales(db_session, partner_id, limit=20, cache=cache)) == expected
+    assert [row[:3] for row in get_partner_sales_page(db_session, partner_id, limit=20, cache=cache).items] == expected
+    assert cache.stats().entries == 0
@@ -0,0 +1,66 @@
+"""
+Импорт продаж: повторная загрузка не создаёт дублей, нечитаемые строки JSON Lines пропускаются
+"""
+
+from datetime import date
+
+import pytest
+
+from db.models import Partner, PartnerSalesSummary, Product, Sale
+from services.sales_import_service import import_sales, iter_jsonl_rows
+
+SALE_DATE = date(2099, 1, 15)
+
+
+@pytest.fixture
+def partner_and_product(db_session):
+    partner = db_session.query(Partner).order_by(Partner.id).first()
+    product = db_session.query(Product).order_by(Product.id).first()
+    if partner is None or product is None:
+        pytest.skip("В базе данных нет партнёров или продукции")
+    return partner, product
+
+
+def _summary(session, partner_id: int) -> int:
+    summary = session.get(PartnerSalesSummary, partner_id, populate_existing=True)
+    return summary.total_quantity if summary is not None else 0
+
+
+def test_repeated_import_skips_existing_sales(db_session, partner_and_product):
+    partner, product = partner_and_product
+    row = {"inn": partner.inn, "article": product.article, "sale_date": SALE_DATE.isoformat(), "quantity": 3}
+    rows = [
+        dict(row, sale_ref="A-1"),
+        dict(row, sale_ref="A-1"),
+        dict(row, sale_ref="B-2"),
+        # продажа A-1 продолжается не подряд и в другой пачке
+        dict(row, sale_ref="A-1"),
+        dict(row),
+    ]
+    total_before = _summary(db_session, partner.id)
+
+    first = import_sales(db_session, rows, batch_size=2)
+    assert (first.sales_created, first.items_created, first.sales_existing) == (3, 5, 0)
+    total_after = _summary(db_session, partner.id)
+    assert total_after == total_before + 15
+
+    second = import_sales(db_session, rows, batch_size=2)
+    assert (second.sales_created, second.items_created, second.sales_existing) == (0, 0, 3)
+    assert _summary(db_session, partner.id) == total_after
+    assert db_session.query(Sale).filter(Sale.partner_id == partner.id, Sale.sale_date == SALE_DATE).count() == 3
+
+
+def test_malformed_jsonl_line_is_skipped(db_session, partner_and_product, tmp_path):
+    partner, product = partner_and_product
+    path = tmp_path / "sales.jsonl"
+    path.write_text(
+        f'{{"inn": "{partner.inn}", "article": "{product.article}", "sale_date": "15.01.2099", "quantity": 1}}\n'
+        "\n"
+        '{"inn": "оборванная строка\n',
+        encoding="utf-8",
+    )
+
+    result = import_sales(db_session, iter_jsonl_rows(path))
+
+    assert (result.rows_read, result.items_created, result.rows_skipped) == (2, 1, 1)
+    assert "строка файла 3" in result.errors[0]
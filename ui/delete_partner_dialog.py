@@ -6,19 +6,27 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QFont, QPixmap
 from PyQt6.QtCore import Qt
-from sqlalchemy.orm import Session
 
 from db.models import Partner
-from services.partner_service import get_all_partners, delete_partner
+from services.partner_service import delete_partner
+from services.unit_of_work import unit_of_work
+from ui.partner_combo_model import PartnerComboModel
 
 class DeletePartnerDialog(QDialog):
     # Диалог удаления партнёра
-    def __init__(self, session: Session, parent: QWidget | None = None):
+    def __init__(self, session_factory, parent: QWidget | None = None):
         super().__init__(parent)
-        self.session = session
-        # Список партнёров, загружаемых из БД для заполнения комбобокса
-        self.partners: list[Partner] = []
+        # Фабрика сессий: каждая операция диалога работает в своей короткой сессии
+        self.session_factory = session_factory
+        # Постраничная модель партнёров для комбобокса
+        self.partners_model = PartnerComboModel(
+            session_factory,
+            display=lambda item: f"{item.name} (рейтинг {item.rating})",
+            parent=self,
+        )
         self.combo_partners: QComboBox | None = None
+        # id удалённого партнёра, чтобы главное окно убрало только его карточку
+        self.deleted_partner_id: int | None = None
         
         self.init_ui()
         self.load_partners()
@@ -97,6 +105,7 @@ class DeletePartnerDialog(QDialog):
 
         # Выпадающий список со списком партнёров
         self.combo_partners = QComboBox(self)
+        self.combo_partners.setModel(self.partners_model)
         combo_font = QFont("Segoe UI", 13)
         combo_font.setBold(True)
         self.combo_partners.setFont(combo_font)
@@ -153,38 +162,32 @@ class DeletePartnerDialog(QDialog):
 
     def load_partners(self) -> None:
         """
-        Загружает список партнёров из БД и заполняет список
+        Загружает первую страницу партнёров из БД в список, остальные подгружаются при прокрутке
         В списке отображается: «Имя партнёра рейтинг », а в качестве пользовательских данных в QComboBox хранится id партнёра.
         """
         try:
-            self.partners = get_all_partners(self.session)
+            self.partners_model.reload()
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить список партнёров:\n{e}", QMessageBox.StandardButton.Ok,)
-            self.partners = []
             return
 
-        self.combo_partners.clear()
-        for p in self.partners:
-            display = f"{p.name} (рейтинг {p.rating})"
-            self.combo_partners.addItem(display, p.id)
+        self.combo_partners.setCurrentIndex(0 if self.partners_model.rowCount() else -1)
 
     def on_delete_clicked(self) -> None:
         # Обработчик нажатия кнопки «Удалить»
 
-        if not self.partners:
+        if self.partners_model.rowCount() == 0:
             QMessageBox.information(self, "Удаление", "Нет партнёров для удаления.", QMessageBox.StandardButton.Ok,)
             return
 
-        idx = self.combo_partners.currentIndex()
-        if idx < 0:
+        item = self.partners_model.item_at(self.combo_partners.currentIndex())
+        if item is None:
             return
 
-        partner = self.partners[idx]
-
         # Своё окно подтверждения с подписями Да / Нет
         msg = QMessageBox(self)
         msg.setWindowTitle("Подтверждение")
-        msg.setText(f"Вы действительно хотите удалить партнёра:\n«{partner.name}»?")
+        msg.setText(f"Вы действительно хотите удалить партнёра:\n«{item.name}»?")
         msg.setIcon(QMessageBox.Icon.Question)
 
         btn_yes = msg.addButton("Да", QMessageBox.ButtonRole.YesRole)
@@ -197,11 +200,19 @@ class DeletePartnerDialog(QDialog):
         if msg.clickedButton() is not btn_yes:
             return
 
-        # Пытаемся удалить партнёра через сервис
+        # Пытаемся удалить партнёра через сервис в отдельной транзакции
         try:
-            delete_partner(self.session, partner)
+            with unit_of_work(self.session_factory) as session:
+                partner = session.get(Partner, item.id)
+                if partner is not None:
+                    delete_partner(session, partner)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось удалить партнёра:\n{e}", QMessageBox.StandardButton.Ok,)
             return
+        if partner is None:
+            # Партнёра удалили раньше: его карточку тоже нужно убрать из главного окна
+            QMessageBox.information(self, "Удаление", "Партнёр уже удалён.", QMessageBox.StandardButton.Ok,)
+
         # Успешное удаление закрываем диалог
+        self.deleted_partner_id = item.id
         self.accept()
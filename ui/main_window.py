@@ -2,17 +2,21 @@
 
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QLabel, QVBoxLayout, QHBoxLayout,
-    QScrollArea, QFrame, QPushButton, QMessageBox
+    QListView, QFrame, QPushButton, QMessageBox, QAbstractItemView, QLineEdit
 )
 from PyQt6.QtGui import QPixmap, QIcon, QFont
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QModelIndex
 
-from services.main_window_service import init_session, load_partners, close_session
-from ui.partner_dialog import PartnerDialog
+from services.main_window_service import (
+    load_partners, show_snapshot, cancel_loading,
+    refresh_partner, remove_partner_card,
+    build_search_index, cancel_search_index, apply_search,
+)
+from services.partner_service import get_partner_for_edit
+from services.unit_of_work import read_session
 from db.models import Partner
-from ui.delete_partner_dialog import DeletePartnerDialog
-from ui.sales_history_dialog import SalesHistoryDialog
-from ui.material_calc_dialog import MaterialCalcDialog
+from ui.partner_list_model import PartnerListModel, PartnerRole
+from ui.partner_card import PartnerCardDelegate
 
 
 class MainWindow(QMainWindow):
@@ -20,23 +24,37 @@ class MainWindow(QMainWindow):
 
     def __init__(self, session_factory, parent=None):
         super().__init__(parent)
+        # Фабрика сессий: каждая операция окна и диалогов открывает свою короткую сессию
         self.session_factory = session_factory
-        # Активная сессия БД
-        self.session = None
-        # Вертикальный layout в который добавляются карточки партнёров
-        self.cards_layout = None
+        # Модель и представление списка карточек партнёров
+        self.partner_model = None
+        self.partner_view = None
+        # Надпись о загрузке и поток фоновой загрузки списка
+        self.loading_label = None
+        self.partner_loader = None
+        # Поле поиска, поисковый индекс, поток его построения и модель результатов поиска
+        self.search_edit = None
+        self.search_index = None
+        self.index_loader = None
+        self.search_model = None
+        # Изменения партнёров, сделанные во время построения индекса поиска
+        self.pending_index_updates = []
+        # Показан ли сохранённый при прошлом запуске список (до сверки с БД)
+        self.snapshot_shown = False
 
         self.init_ui()
         
-        # Инициализируем сессию и загружаем партнёров
-        init_session(self, self.session_factory)
-        load_partners(self)
+        # Сразу показываем сохранённый список, если он есть, иначе загружаем партнёров из БД
+        # Индекс поиска строится в фоне по актуальному списку и заодно сверяет с ним снимок
+        if not show_snapshot(self):
+            load_partners(self)
+        build_search_index(self)
 
     def init_ui(self):
         """
         Создаёт и настраивает визуальные элементы главного окна:
             шапка с логотипом, заголовком и блоком кнопок
-            прокручиваемая область с карточками партнёров
+            список карточек партнёров (рисуются только видимые)
         """
         self.setWindowTitle("Модуль работы с партнёрами")
         self.setWindowIcon(QIcon("resources/logo.png"))
@@ -101,7 +119,7 @@ class MainWindow(QMainWindow):
         btn_history.setFont(font_btn)
         btn_calc_material.setFont(font_btn)
 
-        # Общий зелёный стиль кнопок
+        # Общий зелёный стиль кнопок задаётся один раз на контейнер, а не каждой кнопке
         common_style = """
             QPushButton {
                 background-color: #67BA80;
@@ -117,10 +135,7 @@ class MainWindow(QMainWindow):
                 background-color: #4C9462;
             }
         """
-        btn_add.setStyleSheet(common_style)
-        btn_delete.setStyleSheet(common_style)
-        btn_history.setStyleSheet(common_style)
-        btn_calc_material.setStyleSheet(common_style)
+        btns_widget.setStyleSheet(common_style)
 
         # Подключаем обработчики нажатий
         btn_add.clicked.connect(self.open_add_partner_dialog)
@@ -141,79 +156,120 @@ class MainWindow(QMainWindow):
 
         root_layout.addWidget(header_widget)
 
-        # Прокручиваемая область, внутри которой находится контейнер с карточками
-        scroll = QScrollArea(self)
-        scroll.setWidgetResizable(True)
-        scroll.setFrameShape(QFrame.Shape.NoFrame)
-
-        container = QWidget(scroll)
-        self.cards_layout = QVBoxLayout(container)
-        self.cards_layout.setContentsMargins(0, 0, 0, 0)
-        self.cards_layout.setSpacing(10)
-        # Добавляем stretch чтобы карточки опирались к верху.
-        self.cards_layout.addStretch()
-
-        scroll.setWidget(container)
-        root_layout.addWidget(scroll)
+        # Поле поиска по наименованию, ИНН, директору и телефону
+        self.search_edit = QLineEdit(self)
+        self.search_edit.setFont(QFont("Segoe UI", 12))
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setPlaceholderText("Поиск партнёра: наименование, ИНН, директор, телефон")
+        self.search_edit.setStyleSheet("QLineEdit { padding: 6px; border: 1px solid #67BA80; border-radius: 6px; }")
+        self.search_edit.textChanged.connect(lambda text: apply_search(self, text))
+        root_layout.addWidget(self.search_edit)
+
+        # Надпись о загрузке списка (видна, пока идёт фоновая загрузка)
+        self.loading_label = QLabel(self)
+        self.loading_label.setFont(QFont("Segoe UI", 11))
+        self.loading_label.setStyleSheet("QLabel { color: #67BA80; }")
+        self.loading_label.setVisible(False)
+        root_layout.addWidget(self.loading_label)
+
+        # Список карточек: модель хранит партнёров, делегат рисует видимые строки
+        self.partner_model = PartnerListModel(self)
+        self.search_model = PartnerListModel(self)
+        self.partner_view = QListView(self)
+        self.partner_view.setModel(self.partner_model)
+        self.partner_view.setItemDelegate(PartnerCardDelegate(self.partner_view))
+        self.partner_view.setFrameShape(QFrame.Shape.NoFrame)
+        # Все карточки одной высоты: представлению не нужно измерять каждую строку
+        self.partner_view.setUniformItemSizes(True)
+        self.partner_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.partner_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.partner_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.partner_view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.partner_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.partner_view.setMouseTracking(True)
+        self.partner_view.clicked.connect(self.on_partner_clicked)
+
+        root_layout.addWidget(self.partner_view)
+
+    def on_partner_clicked(self, index: QModelIndex) -> None:
+        # Клик по карточке открывает диалог редактирования партнёра
+        item = index.data(PartnerRole)
+        if item is None or self.session_factory is None:
+            return
+        try:
+            with read_session(self.session_factory) as session:
+                partner = get_partner_for_edit(session, item.id)
+            if partner is not None:
+                self.open_edit_partner_dialog(partner)
+        except Exception as e:
+            print(f"Ошибка при обработке клика по карточке партнёра: {e}")
 
     # Диалоги
+    # Модули диалогов импортируются при первом открытии, а не при запуске приложения
 
     def open_add_partner_dialog(self) -> None:
         # Открытие диалога добавления нового партнёра
 
-        if self.session is None:
+        if self.session_factory is None:
             QMessageBox.warning(self, "Добавление партнёра", "Нет подключения к базе данных.", QMessageBox.StandardButton.Ok,)
             return
 
-        dlg = PartnerDialog(self.session, partner=None, parent=self)
-        if dlg.exec() == dlg.DialogCode.Accepted:
-            load_partners(self)
+        from ui.partner_dialog import PartnerDialog
+        dlg = PartnerDialog(self.session_factory, partner=None, parent=self)
+        if dlg.exec() == dlg.DialogCode.Accepted and dlg.saved_partner_id is not None:
+            refresh_partner(self, dlg.saved_partner_id)
 
     def open_edit_partner_dialog(self, partner: Partner) -> None:
         # Открытие диалога редактирования существующего партнёра при нажатии на карточку
 
-        if self.session is None:
+        if self.session_factory is None:
             QMessageBox.warning(self, "Редактирование партнёра", "Нет подключения к базе данных.", QMessageBox.StandardButton.Ok,)
             return
 
-        dlg = PartnerDialog(self.session, partner=partner, parent=self)
-        if dlg.exec() == dlg.DialogCode.Accepted:
-            load_partners(self)
+        from ui.partner_dialog import PartnerDialog
+        dlg = PartnerDialog(self.session_factory, partner=partner, parent=self)
+        if dlg.exec() == dlg.DialogCode.Accepted and dlg.saved_partner_id is not None:
+            refresh_partner(self, dlg.saved_partner_id)
 
     def open_delete_partner_dialog(self) -> None:
         # Открытие диалога удаления партнёра
         
-        if self.session is None:
+        if self.session_factory is None:
             QMessageBox.warning(self, "Удаление партнёра", "Нет подключения к базе данных.", QMessageBox.StandardButton.Ok,)
             return
 
-        dlg = DeletePartnerDialog(self.session, parent=self)
-        if dlg.exec() == dlg.DialogCode.Accepted:
-            load_partners(self)
+        from ui.delete_partner_dialog import DeletePartnerDialog
+        dlg = DeletePartnerDialog(self.session_factory, parent=self)
+        if dlg.exec() == dlg.DialogCode.Accepted and dlg.deleted_partner_id is not None:
+            remove_partner_card(self, dlg.deleted_partner_id)
 
     def open_sales_history_dialog(self) -> None:
         # Открытие окна истории реализации продукции
         
-        if self.session is None:
+        if self.session_factory is None:
             QMessageBox.warning(self, "История", "Нет подключения к базе данных.", QMessageBox.StandardButton.Ok,)
             return
 
-        dlg = SalesHistoryDialog(self.session, self)
+        from ui.sales_history_dialog import SalesHistoryDialog
+        dlg = SalesHistoryDialog(self.session_factory, self)
         dlg.exec()
 
     def open_material_calc_dialog(self) -> None:
         # Открытие окна расчёта количества материала
         
-        if self.session is None:
+        if self.session_factory is None:
             QMessageBox.warning(self, "Расчёт материала", "Нет подключения к базе данных.", QMessageBox.StandardButton.Ok,)
             return
 
-        dlg = MaterialCalcDialog(self.session, self)
+        from ui.material_calc_dialog import MaterialCalcDialog
+        dlg = MaterialCalcDialog(self.session_factory, self)
         dlg.exec()
 
     # События
     def closeEvent(self, event):
         # Переопределение события закрытия окна
         
-        close_session(self)
+        # Останавливаем фоновую загрузку до закрытия сессий
+        cancel_loading(self, wait=True)
+        cancel_search_index(self, wait=True)
         super().closeEvent(event)
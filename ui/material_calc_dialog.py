@@ -7,22 +7,23 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QFont, QPixmap
 from PyQt6.QtCore import Qt
-from sqlalchemy.orm import Session
 
 from services.calculation_service import (
     get_product_types,
     get_material_types,
     calculate_required_material,
 )
-from services.report_service import generate_material_calc_report
+from services.unit_of_work import read_session
+from ui.report_job import start_report_job, release_report_jobs
 
 
 class MaterialCalcDialog(QDialog):
     # Диалог расчёта количества материала
 
-    def __init__(self, session: Session, parent: QWidget | None = None):
+    def __init__(self, session_factory, parent: QWidget | None = None):
         super().__init__(parent)
-        self.session = session
+        # Фабрика сессий: справочники, расчёт и отчёт читаются каждый в своей короткой сессии
+        self.session_factory = session_factory
 
         # Кэш справочников типов продукции и материалов
         self.product_types = []
@@ -202,8 +203,9 @@ class MaterialCalcDialog(QDialog):
     def load_reference_data(self) -> None:
         # Загрузка данных из БД
         try:
-            self.product_types = get_product_types(self.session)
-            self.material_types = get_material_types(self.session)
+            with read_session(self.session_factory) as session:
+                self.product_types = get_product_types(session)
+                self.material_types = get_material_types(session)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить типы продукции/материалов:\n{e}", QMessageBox.StandardButton.Ok,)
             self.product_types = []
@@ -248,14 +250,15 @@ class MaterialCalcDialog(QDialog):
         
         try:
             product_type_id, material_type_id, quantity, param1, param2 = self._collect_params()
-            result = calculate_required_material(
-                self.session,
-                product_type_id,
-                material_type_id,
-                quantity,
-                param1,
-                param2,
-            )
+            with read_session(self.session_factory) as session:
+                result = calculate_required_material(
+                    session,
+                    product_type_id,
+                    material_type_id,
+                    quantity,
+                    param1,
+                    param2,
+                )
         except ValueError as e:
             QMessageBox.warning(self, "Ошибка ввода", str(e), QMessageBox.StandardButton.Ok,)
             return
@@ -305,18 +308,24 @@ class MaterialCalcDialog(QDialog):
         if not filename:
             return
 
-        try:
+        def render(session, progress) -> None:
+            # Сервис отчётов (и reportlab) загружается только при первом формировании отчёта
+            from services.report_service import generate_material_calc_report
             generate_material_calc_report(
-                self.session,
+                session,
                 product_type_id,
                 material_type_id,
                 quantity,
                 param1,
                 param2,
                 filename,
+                progress,
             )
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось сформировать PDF-отчёт:\n{e}", QMessageBox.StandardButton.Ok,)
-            return
 
-        QMessageBox.information(self, "Готово", "PDF-отчёт по расчёту материала успешно сформирован.", QMessageBox.StandardButton.Ok,)
+        # Отчёт формируется в фоне, о готовом файле сообщит уведомление
+        start_report_job(self, self.session_factory, "Отчёт по расчёту материала", filename, render)
+
+    def done(self, result: int) -> None:
+        # При закрытии окна незавершённые отчёты продолжают формироваться
+        release_report_jobs(self)
+        super().done(result)
@@ -1,115 +1,188 @@
 """
-Виджет «карточка партнёра» для главного окна
-Отображает:
+Делегат «карточка партнёра» для главного окна
+Рисует в строке списка:
     тип партнёра и его наименование
     ФИО директора
     телефон
     суммарный объём продаж
     рассчитанную скидку
     рейтинг партнёра
+Карточка не является виджетом: она рисуется только для видимых строк QListView,
+поэтому количество партнёров не влияет на время открытия окна и расход памяти.
+Оформление карточки (шрифты, метрики, высота) строится один раз на процесс
+и общее для всех представлений, тексты карточек кэшируются для недавно показанных строк.
 """
 
-from PyQt6.QtWidgets import QFrame, QLabel, QVBoxLayout, QHBoxLayout
-from PyQt6.QtGui import QFont, QMouseEvent
-from PyQt6.QtCore import Qt
+from functools import lru_cache
+from typing import NamedTuple
+
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtGui import QFont, QFontMetrics, QColor, QPainter
+from PyQt6.QtCore import Qt, QRect, QSize
 
 from services.partner_utils import format_phone, calc_discount
+from ui.partner_list_model import PartnerRole
+
+# Оформление карточки
+CARD_BACKGROUND = QColor("#F4E8D3")
+CARD_BACKGROUND_HOVER = QColor("#EFDDBE")
+ACCENT_COLOR = QColor("#67BA80")
+TEXT_COLOR = QColor("#000000")
+CARD_RADIUS = 12
+CARD_PADDING = 16
+LINE_SPACING = 10
+# Расстояние между соседними карточками
+CARD_GAP = 10
+
+# Сколько недавно показанных карточек хранят готовые тексты
+CARD_TEXTS_CACHE_SIZE = 2048
+
+
+class CardTexts(NamedTuple):
+    # Тексты одной карточки
+    title: str
+    discount: str
+    director: str
+    phone: str
+    summary: str
+    rating: str
+
+
+@lru_cache(maxsize=CARD_TEXTS_CACHE_SIZE)
+def card_texts(item) -> CardTexts:
+    """
+    Возвращает тексты карточки для строки списка партнёров (PartnerListItem)
+    Строки неизменяемы, поэтому тексты при повторной отрисовке берутся из кэша
+    """
+    partner_type = item.type_name or "Тип не указан"
+    total_qty = int(item.total_quantity or 0)
+
+    # Форматируем номер первого контакта в читабельный вид.
+    phone = format_phone(item.phone) if item.phone else "—"
+
+    return CardTexts(
+        title=f"{partner_type} «{item.name}»",
+        discount=f"{calc_discount(total_qty)}%",
+        director=f"Директор: {item.director_full_name}",
+        phone=f"Телефон: {phone}",
+        summary=f"Объём продаж: {total_qty} м²",
+        rating=f"Рейтинг партнёра: {item.rating}",
+    )
+
+
+class CardStyle:
+    # Шрифты, метрики и размеры карточки для одного базового шрифта
+
+    def __init__(self, base_font: QFont):
+        self.title_font = QFont(base_font)
+        self.title_font.setPointSize(16)
+        self.title_font.setWeight(QFont.Weight.ExtraBold)
+
+        self.accent_font = QFont(base_font)
+        self.accent_font.setPointSize(14)
+        self.accent_font.setWeight(QFont.Weight.Bold)
+
+        self.normal_font = QFont(base_font)
+        self.normal_font.setPointSize(14)
+
+        self.title_metrics = QFontMetrics(self.title_font)
+        self.accent_metrics = QFontMetrics(self.accent_font)
+        self.normal_metrics = QFontMetrics(self.normal_font)
+
+        self.header_height = max(self.title_metrics.height(), self.accent_metrics.height())
+
+        # Строки под шапкой: поле текстов, шрифт, метрики и цвет
+        self.lines = (
+            ("director", self.normal_font, self.normal_metrics, TEXT_COLOR),
+            ("phone", self.normal_font, self.normal_metrics, TEXT_COLOR),
+            ("summary", self.accent_font, self.accent_metrics, ACCENT_COLOR),
+            ("rating", self.accent_font, self.accent_metrics, TEXT_COLOR),
+        )
 
-class PartnerCard(QFrame):
-    # Карточка партнёра одна компания
-
-    def __init__(self, partner, on_click=None, parent=None):
-        super().__init__(parent)
-        self.partner = partner
-        self.on_click = on_click
-        self.init_ui()
-
-    def init_ui(self) -> None:
-        """
-        Создаёт визуальное оформление карточки:
-            фон, скруглённые углы, отсутствие рамки
-            заголовок тип + имя партнёра
-            зелёный акцент со скидкой
-            информация о директоре, телефоне, объёме продаж, рейтинге.
-        """
-        self.setFrameShape(QFrame.Shape.NoFrame)
-        self.setStyleSheet(
-            """
-            QFrame {
-                background-color: #F4E8D3;
-                border-radius: 12px;
-                border: none;
-            }
-            QLabel[role="accent"] {
-                color: #67BA80;
-                font-weight: 700;
-                font-size: 14pt;
-            }
-            QLabel[role="title"] {
-                font-size: 16pt;
-                font-weight: 800;
-            }
-            QLabel {
-                font-size: 14pt;
-            }
-            """
+        # шапка + директор + телефон + объём + рейтинг и отступы между ними
+        self.card_height = (
+            CARD_PADDING * 2
+            + self.header_height
+            + sum(metrics.height() for _, _, metrics, _ in self.lines)
+            + LINE_SPACING * len(self.lines)
         )
 
-        main_layout = QVBoxLayout(self)
-        main_layout.setContentsMargins(16, 16, 16, 16)
-        main_layout.setSpacing(10)
-
-        # Верхняя строка: тип + название партнёра и скидка
-        header_layout = QHBoxLayout()
-
-        # Тип партнёра берём из связанной сущности типы партнеров
-        partner_type = self.partner.partner_type.name if self.partner.partner_type else "Тип не указан"
-
-        # Заголовок: «Тип партнёра «Наименование»»
-        lbl_title = QLabel(f"{partner_type} «{self.partner.name}»")
-        lbl_title.setProperty("role", "title")
-
-        # Суммарный объём продаж и скидка
-        total_qty = int(self.partner.summary.total_quantity or 0) if self.partner.summary else 0
-        discount = calc_discount(total_qty)
-        lbl_discount = QLabel(f"{discount}%")
-        lbl_discount.setProperty("role", "accent")
-
-        header_layout.addWidget(lbl_title, stretch=1)
-        header_layout.addStretch()
-        header_layout.addWidget(lbl_discount)
-
-        # Информация о директоре
-        lbl_director = QLabel(f"Директор: {self.partner.director_full_name}")
-
-        # Телефон
-        phone = "—"
-        if self.partner.contacts:
-            # Берём первый контакт и форматируем номер в чтебарельный вид.
-            phone = format_phone(self.partner.contacts[0].phone)
-        lbl_phone = QLabel(f"Телефон: {phone}")
-
-        # Объём продаж и рейтинг 
-        lbl_summary = QLabel(f"Объём продаж: {total_qty} м²")
-        lbl_summary.setProperty("role", "accent")
-
-        lbl_rating = QLabel(f"Рейтинг партнёра: {self.partner.rating}")
-        rating_font = QFont()
-        rating_font.setBold(True)
-        rating_font.setPointSize(14)
-        lbl_rating.setFont(rating_font)
-
-        main_layout.addLayout(header_layout)
-        main_layout.addWidget(lbl_director)
-        main_layout.addWidget(lbl_phone)
-        main_layout.addWidget(lbl_summary)
-        main_layout.addWidget(lbl_rating)
-
-    # Обработчика клика мышью по карточке
-    def mousePressEvent(self, event: QMouseEvent) -> None:
-        if event.button() == Qt.MouseButton.LeftButton and self.on_click:
-            try:
-                self.on_click(self.partner)
-            except Exception as e:
-                print(f"Ошибка при обработке клика по карточке партнёра: {e}")
-        super().mousePressEvent(event)
+
+# Оформление карточек по ключу базового шрифта, общее для всех делегатов процесса
+_card_styles: dict[str, CardStyle] = {}
+
+
+def card_style(base_font: QFont) -> CardStyle:
+    # Возвращает оформление карточки для базового шрифта, создавая его один раз
+    key = base_font.key()
+    style = _card_styles.get(key)
+    if style is None:
+        style = _card_styles[key] = CardStyle(base_font)
+    return style
+
+
+class PartnerCardDelegate(QStyledItemDelegate):
+    # Отрисовка одной карточки партнёра в строке списка
+
+    def sizeHint(self, option, index) -> QSize:
+        # Ширина карточки задаётся шириной представления
+        return QSize(0, card_style(option.font).card_height + CARD_GAP)
+
+    def paint(self, painter: QPainter, option, index) -> None:
+        item = index.data(PartnerRole)
+        if item is None:
+            return
+
+        style = card_style(option.font)
+        texts = card_texts(item)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        card_rect = QRect(option.rect)
+        card_rect.setHeight(style.card_height)
+
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(CARD_BACKGROUND_HOVER if hovered else CARD_BACKGROUND)
+        painter.drawRoundedRect(card_rect, CARD_RADIUS, CARD_RADIUS)
+
+        content = card_rect.adjusted(CARD_PADDING, CARD_PADDING, -CARD_PADDING, -CARD_PADDING)
+        y = content.top()
+
+        # Верхняя строка: тип + название партнёра слева и скидка справа
+        header_h = style.header_height
+        discount_w = style.accent_metrics.horizontalAdvance(texts.discount)
+
+        painter.setFont(style.accent_font)
+        painter.setPen(ACCENT_COLOR)
+        painter.drawText(
+            QRect(content.right() - discount_w, y, discount_w, header_h),
+            Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+            texts.discount,
+        )
+
+        title_w = max(0, content.width() - discount_w - LINE_SPACING)
+        title = style.title_metrics.elidedText(texts.title, Qt.TextElideMode.ElideRight, title_w)
+        painter.setFont(style.title_font)
+        painter.setPen(TEXT_COLOR)
+        painter.drawText(
+            QRect(content.left(), y, title_w, header_h),
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            title,
+        )
+        y += header_h + LINE_SPACING
+
+        # Остальные строки карточки
+        for field, font, metrics, color in style.lines:
+            text = metrics.elidedText(getattr(texts, field), Qt.TextElideMode.ElideRight, content.width())
+            painter.setFont(font)
+            painter.setPen(color)
+            painter.drawText(
+                QRect(content.left(), y, content.width(), metrics.height()),
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                text,
+            )
+            y += metrics.height() + LINE_SPACING
+
+        painter.restore()
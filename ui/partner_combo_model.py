@@ -0,0 +1,87 @@
+"""
+Модель выпадающего списка партнёров для диалогов
+Партнёры читаются страницами get_partner_page: следующая страница запрашивается,
+только когда пользователь прокрутил открытый список до конца
+Каждая страница читается в своей короткой сессии только для чтения
+"""
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+from services.partner_service import get_partner_page, ORDER_BY_NAME
+from services.unit_of_work import read_session
+
+
+class PartnerComboModel(QAbstractListModel):
+    # Постраничная модель партнёров для QComboBox
+
+    def __init__(self, session_factory, display=None, order: str = ORDER_BY_NAME, page_size: int = 100, parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        # Функция, формирующая текст строки по PartnerListItem
+        self.display = display or (lambda item: item.name)
+        self.order = order
+        self.page_size = page_size
+
+        self._items = []
+        self._cursor = None
+        self._has_more = True
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._items)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._items)):
+            return None
+
+        item = self._items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display(item)
+        if role == Qt.ItemDataRole.UserRole:
+            return item.id
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._has_more
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        # Вызывается представлением при прокрутке до конца списка
+        if not self.canFetchMore(parent):
+            return
+        try:
+            self._fetch_page()
+        except Exception as e:
+            # Исключение нельзя пробрасывать обратно в Qt, дальнейшую подгрузку прекращаем
+            self._has_more = False
+            print("Ошибка при загрузке следующей страницы партнёров:", e)
+
+    def _fetch_page(self) -> None:
+        # Загружает следующую страницу (ошибки БД пробрасываются вызывающему коду)
+        with read_session(self.session_factory) as session:
+            page = get_partner_page(session, self.order, self._cursor, self.page_size)
+        self._cursor = page.next_cursor
+        self._has_more = page.next_cursor is not None
+
+        if page.items:
+            first = len(self._items)
+            self.beginInsertRows(QModelIndex(), first, first + len(page.items) - 1)
+            self._items.extend(page.items)
+            self.endInsertRows()
+
+    def reload(self) -> None:
+        # Сбрасывает модель и загружает первую страницу заново (ошибки БД пробрасываются)
+        self.beginResetModel()
+        self._items = []
+        self._cursor = None
+        self._has_more = True
+        self.endResetModel()
+        self._fetch_page()
+
+    def item_at(self, row: int):
+        # Возвращает строку партнёра (PartnerListItem) по номеру или None
+        if 0 <= row < len(self._items):
+            return self._items[row]
+        return None
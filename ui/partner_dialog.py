@@ -6,19 +6,23 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QFont, QPixmap
 from PyQt6.QtCore import Qt
-from sqlalchemy.orm import Session
 
 from db.models import Partner
 from services.partner_service import get_partner_types, create_or_update_partner
+from services.unit_of_work import unit_of_work, read_session
 
 
 class PartnerDialog(QDialog):
     # Диалог для добавления и редактирования партнёра.
 
-    def __init__(self, session: Session, partner: Partner | None = None, parent: QWidget | None = None):
+    def __init__(self, session_factory, partner: Partner | None = None, parent: QWidget | None = None):
         super().__init__(parent)
-        self.session = session
+        # Фабрика сессий: справочник и сохранение выполняются каждый в своей короткой сессии
+        self.session_factory = session_factory
+        # Редактируемый партнёр (загружен вместе с контактами, вне сессии) или None для нового
         self.partner = partner
+        # id сохранённого партнёра, чтобы главное окно обновило только его карточку
+        self.saved_partner_id: int | None = None
         # Кэш типов партнёров из справочника
         self.partner_types = []
 
@@ -190,7 +194,8 @@ class PartnerDialog(QDialog):
     def load_partner_types(self) -> None:
         # Загружает список типов партнёров из БД и заполняет комбобокс.
         try:
-            self.partner_types = get_partner_types(self.session)
+            with read_session(self.session_factory) as session:
+                self.partner_types = get_partner_types(session)
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить типы партнёров:\n{e}", QMessageBox.StandardButton.Ok,)
             self.partner_types = []
@@ -272,7 +277,13 @@ class PartnerDialog(QDialog):
         # Обработчик нажатия кнопки сохранить или добавить
         try:
             data = self.collect_data()
-            create_or_update_partner(self.session, self.partner, data)
+            with unit_of_work(self.session_factory) as session:
+                partner = None
+                if self.partner is not None:
+                    partner = session.get(Partner, self.partner.id)
+                    if partner is None:
+                        raise RuntimeError("Партнёр был удалён.")
+                saved_id = create_or_update_partner(session, partner, data).id
         except ValueError as e:
             # Ошибки валидации (формат ИНН, email, телефон, рейтинг и остальные
             QMessageBox.warning( self, "Ошибка ввода", str(e), QMessageBox.StandardButton.Ok,)
@@ -281,6 +292,7 @@ class PartnerDialog(QDialog):
             QMessageBox.critical( self, "Ошибка", f"Не удалось сохранить партнёра:\n{e}", QMessageBox.StandardButton.Ok,)
             return
 
+        self.saved_partner_id = saved_id
         self.accept()
 
     def collect_data(self) -> dict:
@@ -0,0 +1,132 @@
+"""
+Фоновая загрузка списка партнёров для главного окна
+Запросы выполняются в отдельном потоке, строки передаются в GUI-поток страницами через сигналы
+Следующая страница загружается только по запросу (когда пользователь докрутил список до конца),
+поэтому объём загруженных данных определяется тем, что реально показано на экране
+Отдельный поток строит по полному списку индекс для поиска партнёров
+и сохраняет этот список в локальный снимок для следующего запуска
+"""
+
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from services.partner_service import get_partner_page, iter_partner_list, ORDER_BY_RATING
+from services.partner_search import PartnerSearchIndex
+from services.partner_snapshot import save_snapshot
+from services.unit_of_work import read_session
+
+
+class PartnerListLoader(QThread):
+    # Поток постраничной загрузки списка партнёров
+
+    # Очередная страница строк PartnerListItem и признак того, что есть следующая
+    chunk_loaded = pyqtSignal(list, bool)
+    # Загрузка завершена полностью
+    load_done = pyqtSignal()
+    # Ошибка загрузки (текст ошибки)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, session_factory, page_size: int = 50, parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        self.page_size = page_size
+        # Соединение DB-API текущего запроса, чтобы можно было прервать его на сервере
+        self._dbapi_connection = None
+        # Запрос следующей страницы; первая страница загружается сразу
+        self._more = threading.Event()
+        self._more.set()
+
+    def run(self) -> None:
+        cursor = None
+        try:
+            while True:
+                self._more.wait()
+                self._more.clear()
+                if self.isInterruptionRequested():
+                    return
+
+                page = self._load_page(cursor)
+                if self.isInterruptionRequested():
+                    return
+
+                self.chunk_loaded.emit(page.items, page.next_cursor is not None)
+                if page.next_cursor is None:
+                    self.load_done.emit()
+                    return
+                cursor = page.next_cursor
+        except Exception as e:
+            # Ошибка после отмены ожидаема (запрос прерван сервером), её не показываем
+            if not self.isInterruptionRequested():
+                self.load_failed.emit(str(e))
+
+    def _load_page(self, cursor):
+        # Каждая страница читается в своей короткой сессии: между страницами соединение свободно
+        # Сессия создаётся в потоке загрузки: объекты Session нельзя делить между потоками
+        with read_session(self.session_factory) as session:
+            self._dbapi_connection = session.connection().connection.dbapi_connection
+            try:
+                return get_partner_page(session, ORDER_BY_RATING, cursor, self.page_size)
+            finally:
+                self._dbapi_connection = None
+
+    def request_more(self) -> None:
+        # Просит загрузить следующую страницу
+        self._more.set()
+
+    def cancel(self) -> None:
+        # Отменяет загрузку: останавливает цикл и прерывает выполняющийся запрос
+        self.requestInterruption()
+        self._more.set()
+        connection = self._dbapi_connection
+        cancel_query = getattr(connection, "cancel", None)
+        if cancel_query is not None:
+            try:
+                cancel_query()
+            except Exception as e:
+                print("Не удалось прервать запрос загрузки партнёров:", e)
+
+
+class PartnerIndexLoader(QThread):
+    # Поток построения поискового индекса по полному списку партнёров
+
+    # Готовый индекс PartnerSearchIndex и строки списка в порядке их чтения из БД
+    index_ready = pyqtSignal(object, list)
+    # Ошибка построения (текст ошибки)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, session_factory, snapshot_path=None, database_key: str = "", parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        # Куда сохранить полученный список для быстрого следующего запуска (None — не сохранять)
+        self.snapshot_path = snapshot_path
+        self.database_key = database_key
+
+    def run(self) -> None:
+        try:
+            index = PartnerSearchIndex()
+            items = []
+            with read_session(self.session_factory) as session:
+                for chunk in iter_partner_list(session):
+                    if self.isInterruptionRequested():
+                        return
+                    items.extend(chunk)
+                    for item in chunk:
+                        index.add_item(item)
+            index.prepare()
+            # Дальше индекс меняет GUI-поток, а список строк только читается
+            self.index_ready.emit(index, items)
+        except Exception as e:
+            if not self.isInterruptionRequested():
+                self.load_failed.emit(str(e))
+            return
+
+        if self.snapshot_path is not None and not self.isInterruptionRequested():
+            try:
+                save_snapshot(self.snapshot_path, self.database_key, items)
+            except Exception as e:
+                print("Не удалось сохранить снимок списка партнёров:", e)
+
+    def cancel(self) -> None:
+        # Останавливает построение после текущей порции
+        self.requestInterruption()
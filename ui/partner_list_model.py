@@ -0,0 +1,160 @@
+"""
+Модель списка партнёров для главного окна
+Хранит строки PartnerListItem в порядке отображения (рейтинг по убыванию, наименование)
+и отдаёт их представлению QListView, которое запрашивает данные только для видимых строк
+Строки подгружаются страницами: когда представление доходит до конца загруженной части,
+модель через сигнал more_requested просит загрузчик принести следующую страницу
+"""
+
+from bisect import bisect_left
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal
+
+from services.partner_service import partner_sort_key
+
+# Роль, по которой делегат и главное окно получают строку партнёра
+PartnerRole = Qt.ItemDataRole.UserRole + 1
+
+
+class PartnerListModel(QAbstractListModel):
+    # Модель строк партнёров
+
+    # Представлению нужна следующая страница строк
+    more_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        # id загруженных партнёров, чтобы строка не попала в список дважды
+        self._ids = set()
+        # Есть ли в БД ещё не загруженные страницы и запрошена ли уже следующая
+        self._has_more = False
+        self._fetch_pending = False
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._items)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._items)):
+            return None
+
+        item = self._items[index.row()]
+        if role == PartnerRole:
+            return item
+        if role == Qt.ItemDataRole.DisplayRole:
+            return item.name
+        return None
+
+    # Постраничная подгрузка
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._has_more and not self._fetch_pending
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+        self._fetch_pending = True
+        self.more_requested.emit()
+
+    def set_has_more(self, has_more: bool) -> None:
+        # Загрузчик сообщает, остались ли ещё страницы
+        self._has_more = has_more
+        self._fetch_pending = False
+
+    def covers(self, item) -> bool:
+        """
+        Попадает ли строка в уже загруженную часть списка
+        Строки за концом загруженной части придут со следующими страницами:
+        partner_sort_key упорядочивает строки так же, как get_partner_page, поэтому граница
+        загруженной части совпадает с курсором следующей страницы
+        """
+        if not self._has_more:
+            return True
+        if not self._items:
+            return False
+        return partner_sort_key(item) <= partner_sort_key(self._items[-1])
+
+    # Изменение содержимого
+
+    def set_items(self, items) -> None:
+        # Полностью заменяет содержимое модели новым списком строк
+        self.beginResetModel()
+        self._items = list(items)
+        self._ids = {item.id for item in self._items}
+        self._has_more = False
+        self._fetch_pending = False
+        self.endResetModel()
+
+    def append_items(self, items) -> None:
+        # Добавляет порцию строк в конец списка (порции приходят уже отсортированными)
+        self._fetch_pending = False
+        items = [item for item in items if item.id not in self._ids]
+        if not items:
+            return
+        first = len(self._items)
+        self.beginInsertRows(QModelIndex(), first, first + len(items) - 1)
+        self._items.extend(items)
+        self._ids.update(item.id for item in items)
+        self.endInsertRows()
+
+    def row_of(self, partner_id: int) -> int | None:
+        # Номер строки партнёра по id или None
+        if partner_id not in self._ids:
+            return None
+        for row, item in enumerate(self._items):
+            if item.id == partner_id:
+                return row
+        return None
+
+    def upsert_item(self, item) -> None:
+        """
+        Добавляет или обновляет одну строку, ставя её на место по порядку сортировки
+        Остальные строки не перестраиваются
+        Если новое место строки ещё не загружено, строка убирается из модели
+        и придёт позже вместе со своей страницей
+        """
+        row = self.row_of(item.id)
+        if row is not None:
+            old = self._items.pop(row)
+            pos = bisect_left(self._items, partner_sort_key(item), key=partner_sort_key)
+            if pos == row and self.covers(item):
+                # Место в списке не изменилось: достаточно перерисовать строку
+                self._items.insert(row, item)
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+                return
+            # Возвращаем строку на место, чтобы удалить её с уведомлением представления
+            self._items.insert(row, old)
+            self.remove_item(item.id)
+
+        if not self.covers(item):
+            return
+
+        pos = bisect_left(self._items, partner_sort_key(item), key=partner_sort_key)
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._items.insert(pos, item)
+        self._ids.add(item.id)
+        self.endInsertRows()
+
+    def remove_item(self, partner_id: int) -> None:
+        # Удаляет строку партнёра, если она есть в модели
+        row = self.row_of(partner_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._items[row]
+        self._ids.discard(partner_id)
+        self.endRemoveRows()
+
+    def clear(self) -> None:
+        self.set_items([])
+
+    def item_at(self, row: int):
+        # Возвращает строку партнёра по номеру или None
+        if 0 <= row < len(self._items):
+            return self._items[row]
+        return None
@@ -0,0 +1,176 @@
+"""
+Формирование PDF-отчётов (и выгрузок истории продаж) в фоновом потоке
+Отчёт формируется в отдельном потоке со своей сессией, окно при этом продолжает работать
+Ход формирования (свёрстанные строки истории и страницы) показывается в немодальном окне
+с кнопкой отмены; отмена срабатывает после текущей страницы, файл отчёта при этом не записывается
+О готовом отчёте сообщает немодальное окно с кнопкой открытия файла
+Если окно, из которого запущен отчёт, закрывается раньше, отчёт продолжает формироваться
+от имени родительского окна (главного окна приложения)
+"""
+
+from PyQt6.QtCore import Qt, QThread, QUrl, pyqtSignal
+from PyQt6.QtGui import QDesktopServices
+from PyQt6.QtWidgets import QApplication, QMessageBox, QProgressDialog, QWidget
+
+from services.unit_of_work import read_session
+
+
+class ReportJob(QThread):
+    # Поток формирования одного PDF-отчёта
+
+    # Ход формирования: строк истории свёрстано, строк всего (0 — неизвестно), страниц свёрстано
+    progress_changed = pyqtSignal(int, int, int)
+    # Отчёт сформирован (путь к файлу)
+    job_done = pyqtSignal(str)
+    # Ошибка формирования (текст ошибки)
+    job_failed = pyqtSignal(str)
+    # Формирование отменено
+    job_cancelled = pyqtSignal()
+
+    def __init__(self, session_factory, render, filename: str, parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        # render(session, progress) формирует отчёт функцией сервиса отчётов
+        self.render = render
+        self.filename = filename
+
+    def run(self) -> None:
+        # Сервис отчётов (и reportlab) загружается в потоке отчёта, а не в GUI-потоке
+        from services.report_service import ReportCancelled
+
+        try:
+            # Сессия создаётся в потоке отчёта: объекты Session нельзя делить между потоками
+            with read_session(self.session_factory) as session:
+                self.render(session, self._progress)
+        except ReportCancelled:
+            self.job_cancelled.emit()
+            return
+        except Exception as e:
+            if self.isInterruptionRequested():
+                self.job_cancelled.emit()
+            else:
+                self.job_failed.emit(str(e))
+            return
+        self.job_done.emit(self.filename)
+
+    def _progress(self, rows_done: int, rows_total: int, pages_done: int) -> None:
+        # Вызывается сервисом отчётов после каждой страницы
+        if self.isInterruptionRequested():
+            from services.report_service import ReportCancelled
+            raise ReportCancelled()
+        self.progress_changed.emit(rows_done, rows_total, pages_done)
+
+    def cancel(self) -> None:
+        # Просит остановить формирование после текущей страницы
+        self.requestInterruption()
+
+    def stop(self) -> None:
+        # Отменяет формирование и дожидается завершения потока (при выходе из приложения)
+        self.cancel()
+        self.wait()
+
+
+def describe_report_progress(title: str, rows_done: int, rows_total: int, pages_done: int) -> str:
+    # Текст хода формирования PDF-отчёта
+    if rows_total and rows_done >= rows_total:
+        return f"{title}: запись файла ({pages_done} стр.)…"
+    if rows_total:
+        return f"{title}: свёрстано строк {rows_done} из {rows_total}, страниц {pages_done}"
+    return f"{title}: свёрстано страниц {pages_done}"
+
+
+def start_report_job(
+    owner: QWidget,
+    session_factory,
+    title: str,
+    filename: str,
+    render,
+    describe_progress=describe_report_progress,
+    window_title: str = "Формирование отчёта",
+    failure_text: str = "Не удалось сформировать PDF-отчёт",
+) -> ReportJob:
+    """
+    Запускает формирование отчёта в фоне и показывает окно хода формирования
+    owner - окно, из которого запущен отчёт
+    title - название отчёта для окон хода формирования и готовности
+    render(session, progress) - формирует отчёт в файл filename
+    describe_progress(title, rows_done, rows_total, pages_done) - текст хода формирования
+    window_title - заголовок окна хода формирования
+    failure_text - начало сообщения об ошибке (за ним следует текст ошибки)
+    """
+    job = ReportJob(session_factory, render, filename, parent=owner)
+
+    dialog = QProgressDialog(f"{title}: подготовка…", "Отменить", 0, 0, owner)
+    dialog.setWindowTitle(window_title)
+    dialog.setWindowModality(Qt.WindowModality.NonModal)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    dialog.setMinimumDuration(0)
+    dialog.setMinimumWidth(420)
+    job.progress_dialog = dialog
+
+    def on_progress(rows_done: int, rows_total: int, pages_done: int) -> None:
+        if rows_total:
+            dialog.setMaximum(rows_total)
+            dialog.setValue(min(rows_done, rows_total))
+        dialog.setLabelText(describe_progress(title, rows_done, rows_total, pages_done))
+
+    def on_canceled() -> None:
+        job.cancel()
+        dialog.setLabelText(f"{title}: отмена…")
+
+    def on_done(path: str) -> None:
+        dialog.close()
+        _notify(job.parent(), QMessageBox.Icon.Information, "Готово", f"{title}: файл сохранён\n{path}", path)
+
+    def on_failed(message: str) -> None:
+        dialog.close()
+        _notify(job.parent(), QMessageBox.Icon.Critical, "Ошибка", f"{failure_text}:\n{message}")
+
+    job.progress_changed.connect(on_progress)
+    job.job_done.connect(on_done)
+    job.job_failed.connect(on_failed)
+    job.job_cancelled.connect(dialog.close)
+    dialog.canceled.connect(on_canceled)
+    job.finished.connect(dialog.deleteLater)
+    job.finished.connect(job.deleteLater)
+
+    # При выходе из приложения незавершённый отчёт отменяется, поток дожидается остановки
+    app = QApplication.instance()
+    if app is not None:
+        app.aboutToQuit.connect(job.stop)
+
+    dialog.show()
+    job.start()
+    return job
+
+
+def release_report_jobs(owner: QWidget) -> None:
+    """
+    Вызывается при закрытии окна owner, запустившего отчёты
+    Незавершённые отчёты переходят к родительскому окну owner вместе с окнами хода формирования;
+    если родителя нет, они отменяются и поток дожидается остановки
+    """
+    host = owner.parentWidget()
+    for job in owner.findChildren(ReportJob, options=Qt.FindChildOption.FindDirectChildrenOnly):
+        if not job.isRunning():
+            continue
+        if host is None:
+            job.stop()
+            continue
+        job.setParent(host)
+        dialog = getattr(job, "progress_dialog", None)
+        if dialog is not None:
+            dialog.setParent(host, dialog.windowFlags())
+            dialog.show()
+
+
+def _notify(parent, icon, title: str, text: str, path: str | None = None) -> None:
+    # Немодальное сообщение о результате; для готового отчёта — с кнопкой открытия файла
+    box = QMessageBox(icon, title, text, QMessageBox.StandardButton.Close, parent)
+    box.setWindowModality(Qt.WindowModality.NonModal)
+    box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+    if path is not None:
+        open_button = box.addButton("Открыть", QMessageBox.ButtonRole.ActionRole)
+        open_button.clicked.connect(lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(path)))
+    box.show()
@@ -2,35 +2,62 @@
 
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-    QComboBox, QPushButton, QTableWidget, QTableWidgetItem,
-    QMessageBox, QWidget, QSizePolicy, QHeaderView, QFileDialog
+    QComboBox, QPushButton, QTableView, QAbstractItemView,
+    QMessageBox, QWidget, QSizePolicy, QHeaderView, QFileDialog,
+    QCheckBox, QDateEdit, QSpinBox, QMenu
 )
 from PyQt6.QtGui import QFont, QPixmap
-from PyQt6.QtCore import Qt
-from sqlalchemy.orm import Session
+from PyQt6.QtCore import Qt, QDate
 
-from db.models import Partner
-from services.partner_service import get_all_partners
-from services.sales_history_service import get_partner_sales
-from services.report_service import generate_partner_sales_report
+from ui.partner_combo_model import PartnerComboModel
+from ui.sales_history_model import SalesHistoryModel, HEADERS
+from ui.sales_history_prefetcher import SalesHistoryPrefetcher
+from ui.report_job import start_report_job, release_report_jobs
+from services.calculation_service import get_product_types
+from services.sales_history_service import SalesHistoryFilter, get_products
+from services.sales_history_cache import shared_history_cache
+from services.unit_of_work import read_session
+
+# Сколько первых строк истории учитывается при подборе ширины столбцов
+COLUMN_SAMPLE_ROWS = 100
+
+# Сколько соседних партнёров с каждой стороны подгружается заранее (0 — не подгружать)
+DEFAULT_PREFETCH_NEIGHBOURS = 2
 
 
 class SalesHistoryDialog(QDialog):
     # Окно истории реализации продукции партнёров
-    def __init__(self, session: Session, parent: QWidget | None = None):
+    def __init__(self, session_factory, parent: QWidget | None = None, prefetch_neighbours: int = DEFAULT_PREFETCH_NEIGHBOURS):
         super().__init__(parent)
-        self.session = session
-        # Список партнёров для списка
-        self.partners: list[Partner] = []
+        # Фабрика сессий: каждая загрузка и отчёт выполняются в своей короткой сессии
+        self.session_factory = session_factory
+        # Постраничная модель партнёров для списка
+        self.partners_model = PartnerComboModel(session_factory, parent=self)
+        # Постраничная модель истории продаж выбранного партнёра
+        # Страницы берутся через общий кэш истории продаж
+        self.sales_model = SalesHistoryModel(session_factory, cache=shared_history_cache(), parent=self)
+        # Фоновая подгрузка первых страниц соседних партнёров в тот же кэш
+        self.prefetch_neighbours = prefetch_neighbours
+        self.prefetcher: SalesHistoryPrefetcher | None = None
+        if prefetch_neighbours > 0:
+            self.prefetcher = SalesHistoryPrefetcher(session_factory, shared_history_cache(), parent=self)
+            self.prefetcher.start()
 
         # Виджеты интерфейса
         self.combo_partners: QComboBox | None = None
-        self.table: QTableWidget | None = None
+        self.check_period: QCheckBox | None = None
+        self.date_from: QDateEdit | None = None
+        self.date_to: QDateEdit | None = None
+        self.combo_products: QComboBox | None = None
+        self.spin_limit: QSpinBox | None = None
+        self.table: QTableView | None = None
+        self.check_monthly_subtotals: QCheckBox | None = None
 
         self.init_ui()
         self.load_partners()
+        self.load_products()
         # Если партнёры есть, сразу подгружаем продажи первого
-        if self.partners:
+        if self.partners_model.rowCount():
             self.load_sales_for_current_partner()
 
     def init_ui(self) -> None:
@@ -38,6 +65,7 @@ class SalesHistoryDialog(QDialog):
         Создаёт и настраивает элементы интерфейса диалога:
             шапку с логотипом
             комбобокс для выбора партнёра
+            отбор продаж: период, продукция или тип продукции, число строк
             таблицу с продажами
             кнопки «Сформировать отчёт» и «Закрыть»
         """
@@ -107,6 +135,7 @@ class SalesHistoryDialog(QDialog):
         lbl_partner.setFont(lbl_font)
 
         self.combo_partners = QComboBox(self)
+        self.combo_partners.setModel(self.partners_model)
         self.combo_partners.setFont(QFont("Segoe UI", 11))
         
         # При смене выбранного партнёра подгружаем его продажи
@@ -116,39 +145,98 @@ class SalesHistoryDialog(QDialog):
         row_top.addWidget(self.combo_partners)
         layout.addLayout(row_top)
 
+        # Отбор продаж: условия передаются в запрос к БД
+        row_filter = QHBoxLayout()
+
+        # Период по умолчанию — текущий квартал
+        today = QDate.currentDate()
+        quarter_start = QDate(today.year(), (today.month() - 1) // 3 * 3 + 1, 1)
+
+        self.check_period = QCheckBox("Период с", self)
+        self.date_from = QDateEdit(quarter_start, self)
+        self.date_to = QDateEdit(today, self)
+        for date_edit in (self.date_from, self.date_to):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd.MM.yyyy")
+            date_edit.setEnabled(False)
+            self.check_period.toggled.connect(date_edit.setEnabled)
+
+        self.combo_products = QComboBox(self)
+        self.combo_products.setSizeAdjustPolicy(QComboBox.SizeAdjustPolicy.AdjustToMinimumContentsLengthWithIcon)
+        self.combo_products.setMinimumContentsLength(20)
+
+        self.spin_limit = QSpinBox(self)
+        self.spin_limit.setRange(0, 1_000_000)
+        self.spin_limit.setSingleStep(100)
+        # 0 — без ограничения
+        self.spin_limit.setSpecialValueText("все")
+
+        btn_apply = QPushButton("Показать", self)
+        btn_apply.clicked.connect(self.load_sales_for_current_partner)
+
+        row_filter.addWidget(self.check_period)
+        row_filter.addWidget(self.date_from)
+        row_filter.addWidget(QLabel("по", self))
+        row_filter.addWidget(self.date_to)
+        row_filter.addSpacing(12)
+        row_filter.addWidget(QLabel("Продукция:", self))
+        row_filter.addWidget(self.combo_products, 1)
+        row_filter.addSpacing(12)
+        row_filter.addWidget(QLabel("Строк:", self))
+        row_filter.addWidget(self.spin_limit)
+        row_filter.addWidget(btn_apply)
+        layout.addLayout(row_filter)
+
         # Таблица продаж
-        self.table = QTableWidget(self)
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Дата продажи", "Продукция", "Количество (м²)"])
+        self.table = QTableView(self)
+        self.table.setModel(self.sales_model)
 
         # Растягивание по экрану
         self.table.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
         header_view = self.table.horizontalHeader()
-        
-        # Ширина столбцов по содержимому
-        header_view.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+
+        # Ширина столбцов задаётся по первым строкам (fit_columns_to_sample):
+        # ResizeToContents измерял бы каждую ячейку таблицы
+        header_view.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         header_view.setStretchLastSection(True)
 
-        self.table.verticalHeader().setVisible(False)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        # Все строки одной высоты: представлению не нужно измерять строки по одной
+        vertical_header = self.table.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.table.fontMetrics().height() + 8)
+
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
 
         layout.addWidget(self.table)
 
         # Кнопки
         buttons_row = QHBoxLayout()
+
+        # Итоги по месяцам в таблице PDF-отчёта
+        self.check_monthly_subtotals = QCheckBox("Итоги по месяцам в отчёте", self)
+        buttons_row.addWidget(self.check_monthly_subtotals)
         buttons_row.addStretch()
 
         btn_report = QPushButton("Сформировать отчёт", self)
+        btn_export = QPushButton("Выгрузить в Excel/CSV", self)
         btn_close = QPushButton("Закрыть", self)
 
         font_btn = QFont("Segoe UI", 11)
         font_btn.setBold(True)
         btn_report.setFont(font_btn)
+        btn_export.setFont(font_btn)
         btn_close.setFont(font_btn)
 
+        # Выгрузка продаж выбранного партнёра или всех партнёров (с текущим отбором)
+        export_menu = QMenu(btn_export)
+        export_menu.addAction("Продажи выбранного партнёра", lambda: self.on_export_clicked(False))
+        export_menu.addAction("Продажи всех партнёров", lambda: self.on_export_clicked(True))
+        btn_export.setMenu(export_menu)
+
         btn_report.setStyleSheet(
             """
             QPushButton {
@@ -171,25 +259,62 @@ class SalesHistoryDialog(QDialog):
         btn_close.clicked.connect(self.reject)
 
         buttons_row.addWidget(btn_report)
+        buttons_row.addWidget(btn_export)
         buttons_row.addWidget(btn_close)
         layout.addLayout(buttons_row)
 
     # Загрузка данных
 
     def load_partners(self) -> None:
-        # Загружает список партнёров из БД и заполняет комбобокс в случае ошибки показывает окно с сообщением и оставляет список пустым
+        # Загружает первую страницу партнёров в комбобокс (остальные подгружаются при прокрутке) в случае ошибки показывает окно с сообщением и оставляет список пустым
+        self.combo_partners.blockSignals(True)
         try:
-            self.partners = get_all_partners(self.session)
+            self.partners_model.reload()
+            self.combo_partners.setCurrentIndex(0 if self.partners_model.rowCount() else -1)
         except Exception as e:
             QMessageBox.critical( self, "Ошибка", f"Не удалось загрузить список партнёров:\n{e}", QMessageBox.StandardButton.Ok,)
-            self.partners = []
+        finally:
+            self.combo_partners.blockSignals(False)
+
+    def load_products(self) -> None:
+        # Заполняет список отбора по продукции: вся продукция, типы продукции, отдельные продукции
+        self.combo_products.clear()
+        self.combo_products.addItem("Вся продукция", None)
+        try:
+            with read_session(self.session_factory) as session:
+                product_types = get_product_types(session)
+                products = get_products(session)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить список продукции:\n{e}", QMessageBox.StandardButton.Ok,)
             return
 
-        self.combo_partners.blockSignals(True)
-        self.combo_partners.clear()
-        for p in self.partners:
-            self.combo_partners.addItem(p.name, p.id)
-        self.combo_partners.blockSignals(False)
+        for product_type in product_types:
+            self.combo_products.addItem(f"Тип: {product_type.name}", ("type", product_type.id))
+        for product in products:
+            self.combo_products.addItem(product.name, ("product", product.id))
+
+    def current_filter(self) -> SalesHistoryFilter:
+        # Отбор продаж по значениям полей формы (ValueError, если период задан неверно)
+        date_from = date_to = None
+        if self.check_period.isChecked():
+            date_from = self.date_from.date().toPyDate()
+            date_to = self.date_to.date().toPyDate()
+            if date_from > date_to:
+                raise ValueError("Начало периода позже его окончания.")
+
+        product_id = product_type_id = None
+        choice = self.combo_products.currentData()
+        if choice is not None:
+            kind, choice_id = choice
+            if kind == "type":
+                product_type_id = choice_id
+            else:
+                product_id = choice_id
+        return SalesHistoryFilter(date_from, date_to, product_id, product_type_id)
+
+    def current_limit(self) -> int | None:
+        # Наибольшее число строк истории (None — без ограничения)
+        return self.spin_limit.value() or None
 
     # Обработчики
     
@@ -200,43 +325,73 @@ class SalesHistoryDialog(QDialog):
         self.load_sales_for_current_partner()
 
     def load_sales_for_current_partner(self) -> None:
-        # Подгружает продажи выбранного партнёра в таблицу
-        idx = self.combo_partners.currentIndex()
-        if idx < 0 or not self.partners:
-            self.table.setRowCount(0)
+        # Показывает первую страницу продаж выбранного партнёра (остальные подгружаются при прокрутке)
+        partner = self.partners_model.item_at(self.combo_partners.currentIndex())
+        try:
+            history_filter = self.current_filter()
+        except ValueError as e:
+            QMessageBox.warning(self, "Отбор продаж", str(e), QMessageBox.StandardButton.Ok,)
             return
 
-        partner = self.partners[idx]
-
         try:
-            sales = get_partner_sales(self.session, partner.id)
+            self.sales_model.set_partner(partner.id if partner is not None else None, history_filter, self.current_limit())
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить продажи:\n{e}", QMessageBox.StandardButton.Ok,)
             return
 
-        self.table.setRowCount(len(sales))
-        for row, (sale_date, product_name, quantity) in enumerate(sales):
-            # Дата в формате ДД.ММ.ГГГГ.
-            date_str = sale_date.strftime("%d.%m.%Y") if hasattr(sale_date, "strftime") else str(sale_date)
-            self.table.setItem(row, 0, QTableWidgetItem(date_str))
-            self.table.setItem(row, 1, QTableWidgetItem(product_name or ""))
-            self.table.setItem(row, 2, QTableWidgetItem(str(quantity)))
+        self.table.scrollToTop()
+        self.fit_columns_to_sample()
+        self.prefetch_neighbours_of(self.combo_partners.currentIndex(), history_filter)
 
-        # Ширину столбцов подстаивается под содержимое
-        self.table.resizeColumnsToContents()
+    def prefetch_neighbours_of(self, index: int, history_filter: SalesHistoryFilter) -> None:
+        # Просит фоновый поток подгрузить соседей партнёра index: сначала ближайших, следующего раньше предыдущего
+        if self.prefetcher is None or index < 0:
+            return
+        partner_ids = []
+        for distance in range(1, self.prefetch_neighbours + 1):
+            for neighbour in (index + distance, index - distance):
+                # Подгружаются только партнёры уже загруженных страниц списка
+                partner = self.partners_model.item_at(neighbour)
+                if partner is not None:
+                    partner_ids.append(partner.id)
+        self.prefetcher.request(partner_ids, history_filter, self.sales_model.first_page_size(self.current_limit()))
+
+    def done(self, result: int) -> None:
+        # При закрытии окна фоновая подгрузка останавливается, а отчёты продолжают формироваться
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        release_report_jobs(self)
+        super().done(result)
+
+    def fit_columns_to_sample(self) -> None:
+        # Ширина столбцов по заголовкам и первым строкам истории, а не по всем ячейкам
+        metrics = self.table.fontMetrics()
+        header_metrics = self.table.horizontalHeader().fontMetrics()
+        sample = self.sales_model.sample_rows(COLUMN_SAMPLE_ROWS)
+        # Последний столбец растягивается до края таблицы
+        for column, title in enumerate(HEADERS[:-1]):
+            width = header_metrics.horizontalAdvance(title)
+            for row in sample:
+                width = max(width, metrics.horizontalAdvance(self.sales_model.display_text(row, column)))
+            self.table.setColumnWidth(column, width + 24)
 
     def on_generate_report_clicked(self) -> None:
         # Формирование ПДФ отчета
-        if not self.partners:
+        if self.partners_model.rowCount() == 0:
             QMessageBox.information(self, "Отчёт", "Нет партнёров для формирования отчёта.", QMessageBox.StandardButton.Ok,)
             return
 
-        idx = self.combo_partners.currentIndex()
-        if idx < 0:
+        partner = self.partners_model.item_at(self.combo_partners.currentIndex())
+        if partner is None:
             QMessageBox.information(self, "Отчёт", "Партнёр не выбран.", QMessageBox.StandardButton.Ok,)
             return
 
-        partner = self.partners[idx]
+        try:
+            history_filter = self.current_filter()
+        except ValueError as e:
+            QMessageBox.warning(self, "Отбор продаж", str(e), QMessageBox.StandardButton.Ok,)
+            return
 
         safe_name = (
             partner.name
@@ -256,10 +411,72 @@ class SalesHistoryDialog(QDialog):
         if not filename:
             return
 
+        limit = self.current_limit()
+        monthly_subtotals = self.check_monthly_subtotals.isChecked()
+
+        def render(session, progress) -> None:
+            # Сервис отчётов (и reportlab) загружается только при первом формировании отчёта
+            from services.report_service import generate_partner_sales_report
+            generate_partner_sales_report(
+                session, partner.id, filename, history_filter, limit,
+                monthly_subtotals=monthly_subtotals, progress=progress,
+            )
+
+        # Отчёт формируется в фоне: окно остаётся доступным, о готовом файле сообщит уведомление
+        start_report_job(self, self.session_factory, f"Отчёт по партнёру «{partner.name}»", filename, render)
+
+    def on_export_clicked(self, all_partners: bool) -> None:
+        # Выгрузка истории продаж в XLSX или CSV (с отбором по периоду и продукции, без ограничения числа строк)
+        partner = None
+        if not all_partners:
+            partner = self.partners_model.item_at(self.combo_partners.currentIndex())
+            if partner is None:
+                QMessageBox.information(self, "Выгрузка", "Партнёр не выбран.", QMessageBox.StandardButton.Ok,)
+                return
+
         try:
-            generate_partner_sales_report(self.session, partner.id, filename)
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось сформировать PDF-отчёт:\n{e}", QMessageBox.StandardButton.Ok,)
+            history_filter = self.current_filter()
+        except ValueError as e:
+            QMessageBox.warning(self, "Отбор продаж", str(e), QMessageBox.StandardButton.Ok,)
+            return
+
+        if partner is not None:
+            safe_name = (
+                partner.name
+                .replace('"', "")
+                .replace("'", "")
+                .replace("/", "_")
+                .replace("\\", "_")
+            )
+            default_name = f"Продажи {safe_name}.xlsx"
+        else:
+            default_name = "Продажи всех партнёров.xlsx"
+
+        filename, _ = QFileDialog.getSaveFileName(
+            self,
+            "Сохранить выгрузку",
+            default_name,
+            "Книга Excel (*.xlsx);;CSV файлы (*.csv)"
+        )
+        if not filename:
             return
 
-        QMessageBox.information(self, "Готово", "PDF-отчёт успешно сформирован.", QMessageBox.StandardButton.Ok,)
+        partner_ids = [partner.id] if partner is not None else None
+
+        def render(session, progress) -> None:
+            from sqlalchemy import text
+            from services.sales_export_service import export_sales
+            # Выгрузка всех продаж дольше ограничения времени запроса окна: снимаем его для этой транзакции
+            session.execute(text("SET LOCAL statement_timeout = 0"))
+            export_sales(
+                session, filename, partner_ids=partner_ids, history_filter=history_filter,
+                progress=lambda rows_written: progress(rows_written, 0, 0),
+            )
+
+        title = f"Выгрузка продаж «{partner.name}»" if partner is not None else "Выгрузка продаж всех партнёров"
+        start_report_job(
+            self, self.session_factory, title, filename, render,
+            describe_progress=lambda title, rows_done, rows_total, pages_done: f"{title}: выгружено строк {rows_done}",
+            window_title="Выгрузка истории продаж",
+            failure_text="Не удалось выгрузить историю продаж",
+        )
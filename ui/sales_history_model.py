@@ -0,0 +1,128 @@
+"""
+Модель таблицы истории продаж партнёра
+История читается страницами get_partner_sales_page: при выборе партнёра загружается
+только первая страница, следующая — когда таблицу прокрутили до конца (canFetchMore/fetchMore)
+Отбор строк (SalesHistoryFilter) и ограничение их числа передаются в запрос каждой страницы
+Страницы берутся через кэш истории продаж: при возврате к уже показанному партнёру
+запрос к БД сводится к проверке версии его истории
+Каждая страница читается в своей короткой сессии только для чтения,
+поэтому открытие истории любого партнёра занимает одинаковое время
+"""
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from services.sales_history_service import get_partner_sales_page
+from services.unit_of_work import read_session
+
+COLUMN_DATE = 0
+COLUMN_PRODUCT = 1
+COLUMN_QUANTITY = 2
+
+HEADERS = ("Дата продажи", "Продукция", "Количество (м²)")
+
+
+class SalesHistoryModel(QAbstractTableModel):
+    # Постраничная модель истории продаж одного партнёра
+
+    def __init__(self, session_factory, page_size: int = 200, cache=None, parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        self.page_size = page_size
+        # Кэш истории продаж (SalesHistoryCache) или None
+        self.cache = cache
+
+        self._partner_id = None
+        self._filter = None
+        # Наибольшее число строк (None — без ограничения)
+        self._limit = None
+        self._rows = []
+        self._cursor = None
+        self._has_more = False
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid() or not (0 <= index.row() < len(self._rows)):
+            return None
+        return self.display_text(self._rows[index.row()], index.column())
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal and 0 <= section < len(HEADERS):
+            return HEADERS[section]
+        return None
+
+    @staticmethod
+    def display_text(row, column: int) -> str:
+        # Текст ячейки: дата в формате ДД.ММ.ГГГГ, наименование продукции, количество
+        if column == COLUMN_DATE:
+            sale_date = row.sale_date
+            return sale_date.strftime("%d.%m.%Y") if hasattr(sale_date, "strftime") else str(sale_date)
+        if column == COLUMN_PRODUCT:
+            return row.product_name or ""
+        return str(row.quantity)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._has_more
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        # Вызывается представлением при прокрутке до конца таблицы
+        if not self.canFetchMore(parent):
+            return
+        try:
+            self._fetch_page()
+        except Exception as e:
+            # Исключение нельзя пробрасывать обратно в Qt, дальнейшую подгрузку прекращаем
+            self._has_more = False
+            print(f"Ошибка при загрузке следующей страницы продаж партнёра id={self._partner_id}:", e)
+
+    def _fetch_page(self) -> None:
+        # Загружает следующую страницу (ошибки БД пробрасываются вызывающему коду)
+        page_size = self.page_size
+        if self._limit is not None:
+            page_size = min(page_size, self._limit - len(self._rows))
+        with read_session(self.session_factory) as session:
+            page = get_partner_sales_page(session, self._partner_id, self._cursor, page_size, self._filter, self.cache)
+        self._cursor = page.next_cursor
+        self._has_more = page.next_cursor is not None
+        if self._limit is not None and len(self._rows) + len(page.items) >= self._limit:
+            self._has_more = False
+
+        if page.items:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page.items) - 1)
+            self._rows.extend(page.items)
+            self.endInsertRows()
+
+    def set_partner(self, partner_id: int | None, history_filter=None, limit: int | None = None) -> None:
+        """
+        Показывает историю партнёра с отбором history_filter и не более limit строк:
+        сбрасывает модель и загружает первую страницу (ошибки БД пробрасываются)
+        """
+        self.beginResetModel()
+        self._partner_id = partner_id
+        self._filter = history_filter
+        self._limit = limit if limit else None
+        self._rows = []
+        self._cursor = None
+        self._has_more = False
+        self.endResetModel()
+        if partner_id is not None:
+            self._fetch_page()
+
+    def first_page_size(self, limit: int | None = None) -> int:
+        # Размер первой страницы при ограничении limit — такой же, как в запросе _fetch_page
+        return min(self.page_size, limit) if limit else self.page_size
+
+    def sample_rows(self, count: int) -> list:
+        # Первые строки модели — по ним подбирается ширина столбцов
+        return self._rows[:count]
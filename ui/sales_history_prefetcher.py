@@ -0,0 +1,73 @@
+"""
+Фоновая подгрузка истории продаж соседних партнёров для окна истории продаж
+Пока пользователь смотрит историю одного партнёра, поток заранее читает первые страницы
+истории соседних партнёров списка и кладёт их в общий кэш истории продаж
+При переходе к соседнему партнёру таблица заполняется из кэша: к БД уходит только
+проверка версии истории (одна строка по ключу) вместо выборки страницы
+Объём работы ограничен: число соседей с каждой стороны и размер страницы задаёт окно истории
+Новый запрос отменяет ещё не выполненную часть предыдущего
+"""
+
+import threading
+
+from PyQt6.QtCore import QThread
+
+from services.sales_history_service import get_partner_sales_page
+from services.unit_of_work import read_session
+
+
+class SalesHistoryPrefetcher(QThread):
+    # Поток заблаговременного чтения первых страниц истории продаж
+
+    def __init__(self, session_factory, cache, parent=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        # Кэш истории продаж (SalesHistoryCache), в который складываются страницы
+        self.cache = cache
+        # Очередной запрос: (id партнёров по порядку, отбор, размер страницы) или None
+        self._request = None
+        self._condition = threading.Condition()
+
+    def request(self, partner_ids: list[int], history_filter, page_size: int) -> None:
+        # Заменяет запрос на подгрузку: партнёры читаются в порядке списка partner_ids
+        with self._condition:
+            self._request = (list(partner_ids), history_filter, page_size)
+            self._condition.notify()
+
+    def _next_request(self):
+        # Ждёт запрос или остановку потока
+        with self._condition:
+            while self._request is None and not self.isInterruptionRequested():
+                self._condition.wait()
+            request, self._request = self._request, None
+            return request
+
+    def _superseded(self) -> bool:
+        # Пришёл новый запрос или поток останавливается: текущий запрос дальше не выполняется
+        with self._condition:
+            return self._request is not None or self.isInterruptionRequested()
+
+    def run(self) -> None:
+        while not self.isInterruptionRequested():
+            request = self._next_request()
+            if request is None:
+                continue
+            partner_ids, history_filter, page_size = request
+            for partner_id in partner_ids:
+                if self._superseded():
+                    break
+                try:
+                    # Сессия создаётся в этом потоке: объекты Session нельзя делить между потоками
+                    with read_session(self.session_factory) as session:
+                        get_partner_sales_page(session, partner_id, None, page_size, history_filter, self.cache)
+                except Exception as e:
+                    # Подгрузка необязательна: при ошибке история будет прочитана при переходе
+                    print(f"Ошибка при подгрузке продаж партнёра id={partner_id}:", e)
+                    break
+
+    def stop(self) -> None:
+        # Останавливает поток после текущего запроса к БД и дожидается его завершения
+        with self._condition:
+            self.requestInterruption()
+            self._condition.notify()
+        self.wait()